@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+预览/缩略图解码性能测试
+对比完整解码后缩小（原 display_image 的做法）与 ImageProcessor.load_image_at_size
+（JPEG draft + reduce）在 24MP 图片上的耗时
+
+运行方式: python benchmarks/bench_decode.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+from PIL import Image
+
+from src.modules.image_processor import ImageProcessor, PREVIEW_REDUCING_GAP, THUMBNAIL_REDUCING_GAP
+
+SOURCE_SIZE = (6000, 4000)
+TARGETS = [("预览", (600, 500)), ("缩略图", (64, 64))]
+FORMATS = [("JPEG", ".jpg"), ("PNG", ".png")]
+
+
+def full_decode(path, size):
+    """
+    原做法：完整解码后复制再缩小
+    """
+    image = Image.open(path)
+    image = image.copy()
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+    return image
+
+
+def timeit(func, repeat=3):
+    """
+    返回多次运行的最短耗时（秒）
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """
+    主函数
+    """
+    processor = ImageProcessor()
+    # 平滑渐变加噪声，接近照片的压缩特性
+    y, x = np.mgrid[0:SOURCE_SIZE[1], 0:SOURCE_SIZE[0]]
+    rng = np.random.default_rng(0)
+    pixels = np.stack([x * 255 // SOURCE_SIZE[0], y * 255 // SOURCE_SIZE[1], (x + y) % 256], axis=-1)
+    pixels = np.clip(pixels + rng.integers(-8, 9, pixels.shape), 0, 255).astype(np.uint8)
+    source = Image.fromarray(pixels)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"源图片: {SOURCE_SIZE[0]}x{SOURCE_SIZE[1]}")
+        print(f"{'格式':>6} {'用途':>8} {'完整解码(ms)':>14} {'按尺寸解码(ms)':>16} {'加速':>8}")
+        for file_format, ext in FORMATS:
+            path = os.path.join(temp_dir, f"source{ext}")
+            source.save(path, format=file_format)
+            for label, size in TARGETS:
+                gap = THUMBNAIL_REDUCING_GAP if label == "缩略图" else PREVIEW_REDUCING_GAP
+                before = timeit(lambda: full_decode(path, size))
+                after = timeit(lambda: processor.load_image_at_size(path, size, reducing_gap=gap))
+                print(f"{file_format:>6} {label:>8} {before * 1000:>14.1f} {after * 1000:>16.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+斜体剪切变换性能测试
+对比逐像素 getpixel/putpixel 实现与NumPy行平移实现在不同字体大小下的耗时
+
+运行方式: python benchmarks/bench_italic_shear.py
+"""
+
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image
+
+from src.modules.image_processor import ImageProcessor, ITALIC_SHEAR_FACTOR
+
+FONT_SIZES = [24, 48, 96, 192]
+TEXT = "Photot Watermark 水印"
+
+
+def legacy_shear(watermark_image, shear_factor=ITALIC_SHEAR_FACTOR):
+    """
+    原逐像素剪切实现（作为对比基准）
+    """
+    width, height = watermark_image.size
+    new_width = int(width + abs(shear_factor) * height)
+    sheared_image = Image.new("RGBA", (new_width, height), (0, 0, 0, 0))
+    for y in range(height):
+        offset = int(shear_factor * y)
+        for x in range(width):
+            if 0 <= x + offset < new_width:
+                sheared_image.putpixel((x + offset, y), watermark_image.getpixel((x, y)))
+    return sheared_image
+
+
+def timeit(func, repeat):
+    """
+    返回多次运行的最短耗时（秒）
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """
+    主函数
+    """
+    processor = ImageProcessor()
+    print(f"{'字体大小':>8} {'图层尺寸':>12} {'逐像素(ms)':>12} {'NumPy(ms)':>12} {'加速比':>8}")
+    for font_size in FONT_SIZES:
+        # 屏蔽渲染过程中的调试输出
+        with redirect_stdout(io.StringIO()):
+            font = processor._load_font(None, None, font_size)
+            layer = processor._render_text_layer(TEXT, font, font_size, (255, 255, 255, 200))
+        assert legacy_shear(layer).tobytes() == processor._apply_italic_shear(layer).tobytes()
+
+        before = timeit(lambda: legacy_shear(layer), 1)
+        after = timeit(lambda: processor._apply_italic_shear(layer), 5)
+        size = f"{layer.width}x{layer.height}"
+        print(f"{font_size:>8} {size:>12} {before * 1000:>12.1f} {after * 1000:>12.2f} {before / after:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
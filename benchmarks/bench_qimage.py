@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PIL到Qt图像转换性能测试
+对比原显示路径（通道交换、tobytes、QImage、QPixmap、平滑缩放）与 qt_image 模块
+在 24MP 图片和预览尺寸图片上的耗时
+
+运行方式: QT_QPA_PLATFORM=offscreen python benchmarks/bench_qimage.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QGuiApplication, QImage, QPixmap
+
+from src.modules.qt_image import pil_to_qimage, pil_to_qpixmap
+
+SIZES = [("24MP", (6000, 4000)), ("预览", (600, 400))]
+PREVIEW_SIZE = (600, 500)
+
+
+def legacy_qimage(image):
+    """
+    原做法：交换R/B通道后导出数据再构建QImage（未指定行宽）并复制
+    """
+    if image.mode == "RGB":
+        r, g, b = image.split()
+        image = Image.merge("RGB", (b, g, r))
+        data = image.tobytes("raw", "RGB")
+        return QImage(data, image.width, image.height, QImage.Format_RGB888).copy()
+    r, g, b, a = image.split()
+    image = Image.merge("RGBA", (b, g, r, a))
+    data = image.tobytes("raw", "RGBA")
+    return QImage(data, image.width, image.height, QImage.Format_RGBA8888).copy()
+
+
+def legacy_pixmap(image):
+    """
+    原显示路径：转换后总是做一次平滑缩放
+    """
+    pixmap = QPixmap.fromImage(legacy_qimage(image))
+    return pixmap.scaled(PREVIEW_SIZE[0], PREVIEW_SIZE[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+def timeit(func, repeat=5):
+    """
+    返回多次运行的最短耗时（秒）
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """
+    主函数
+    """
+    app = QGuiApplication(sys.argv)
+    rng = np.random.default_rng(0)
+    print(f"{'尺寸':>6} {'模式':>5} {'原QImage(ms)':>13} {'新QImage(ms)':>13} {'复制QImage(ms)':>15} "
+          f"{'原显示(ms)':>11} {'新显示(ms)':>11}")
+    for label, (width, height) in SIZES:
+        for mode in ("RGB", "RGBA"):
+            pixels = rng.integers(0, 256, (height, width, len(mode)), dtype=np.uint8)
+            image = Image.fromarray(pixels, mode)
+            old_qimage = timeit(lambda: legacy_qimage(image))
+            new_qimage = timeit(lambda: pil_to_qimage(image))
+            copied_qimage = timeit(lambda: pil_to_qimage(image, copy=True))
+            old_display = timeit(lambda: legacy_pixmap(image))
+            new_display = timeit(lambda: pil_to_qpixmap(image, PREVIEW_SIZE))
+            print(f"{label:>6} {mode:>5} {old_qimage * 1000:>13.1f} {new_qimage * 1000:>13.1f} "
+                  f"{copied_qimage * 1000:>15.1f} {old_display * 1000:>11.1f} {new_display * 1000:>11.1f}")
+    del app
+
+
+if __name__ == "__main__":
+    main()
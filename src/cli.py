@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Photot Watermark Tool 命令行入口
+无界面批量添加水印，不依赖 PyQt5，可在服务器或定时任务中运行
+
+用法示例:
+    python -m src.cli -t 默认模板 -o out photos/ "more/*.jpg" -j 4
+    python -m src.cli -t 默认模板 -o out photos/ --rendition full:0:jpeg:95 --rendition web:2048:jpeg:85 \
+        --rendition preview:512:jpeg:80 --rendition archive:0:png
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+# 添加项目模块路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.batch_exporter import BatchExporter, DEFAULT_EXPORT_SETTINGS, ExportStats
+from modules.config_manager import ConfigManager
+
+# 支持的图片扩展名，与界面导入文件夹时一致
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
+
+# 命令行格式参数 -> 导出设置中的格式
+FORMAT_CHOICES = {
+    "original": "原图格式",
+    "jpeg": "JPEG",
+    "png": "PNG"
+}
+
+
+def collect_images(inputs, recursive=False):
+    """
+    展开输入的文件、文件夹和通配符，得到去重后的图片路径列表
+
+    Args:
+        inputs: 文件路径、文件夹路径或通配符列表
+        recursive: 是否递归查找子文件夹
+
+    Returns:
+        图片路径列表（保持输入顺序）
+    """
+    paths = []
+    seen = set()
+
+    def add(path):
+        if os.path.splitext(path)[1].lower() not in IMAGE_EXTENSIONS:
+            return
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            paths.append(path)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                for root, dirs, names in os.walk(item):
+                    dirs.sort()
+                    for name in sorted(names):
+                        add(os.path.join(root, name))
+            else:
+                for name in sorted(os.listdir(item)):
+                    path = os.path.join(item, name)
+                    if os.path.isfile(path):
+                        add(path)
+        elif os.path.isfile(item):
+            add(item)
+        else:
+            matches = sorted(glob.glob(item, recursive=recursive))
+            if not matches:
+                print(f"警告: 没有匹配的文件: {item}")
+            for path in matches:
+                if os.path.isfile(path):
+                    add(path)
+    return paths
+
+
+def load_template(template):
+    """
+    加载水印模板：优先按名称从模板目录读取，也可以直接指定JSON文件路径
+
+    Args:
+        template: 模板名称或模板文件路径
+
+    Returns:
+        模板数据
+    """
+    if template.lower().endswith(".json") and os.path.isfile(template):
+        with open(template, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return ConfigManager().load_template(template)
+
+
+def parse_rendition(spec):
+    """
+    解析输出规格参数：子文件夹:最大边长:格式[:质量]，最大边长为0表示保持原图尺寸
+
+    Returns:
+        覆盖导出设置的字典
+    """
+    parts = spec.split(":")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"输出规格格式应为 子文件夹:最大边长:格式[:质量]，而不是 {spec}")
+    subfolder, max_size, file_format = parts[:3]
+    if file_format.lower() not in FORMAT_CHOICES:
+        raise argparse.ArgumentTypeError(f"不支持的输出格式: {file_format}")
+    try:
+        max_size = int(max_size)
+        quality = int(parts[3]) if len(parts) == 4 else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"最大边长和质量必须是整数: {spec}")
+    rendition = {
+        "subfolder": subfolder,
+        "format": FORMAT_CHOICES[file_format.lower()],
+        "resize_enabled": max_size > 0
+    }
+    if max_size > 0:
+        rendition["max_width"] = rendition["max_height"] = max_size
+    if quality is not None:
+        rendition["quality"] = quality
+    return rendition
+
+
+def build_export_settings(args):
+    """
+    根据命令行参数生成导出设置
+    """
+    export_settings = dict(DEFAULT_EXPORT_SETTINGS)
+    export_settings.update({
+        "format": FORMAT_CHOICES[args.format],
+        "quality": args.quality,
+        "naming_rule": args.naming,
+        "sequence_start": args.sequence_start,
+        "sequence_digits": args.sequence_digits,
+        "timestamp_format": args.timestamp_format
+    })
+    if args.prefix is not None:
+        export_settings["prefix"] = args.prefix
+    if args.suffix is not None:
+        export_settings["suffix"] = args.suffix
+    if args.custom_name is not None:
+        export_settings["custom_name"] = args.custom_name
+    if args.max_width or args.max_height:
+        export_settings["resize_enabled"] = True
+        export_settings["max_width"] = args.max_width or sys.maxsize
+        export_settings["max_height"] = args.max_height or sys.maxsize
+    if args.renditions:
+        export_settings["renditions"] = args.renditions
+    return export_settings
+
+
+def parse_args(argv=None):
+    """
+    解析命令行参数
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Photot Watermark Tool 命令行批量水印")
+    parser.add_argument("inputs", nargs="+", help="图片文件、文件夹或通配符")
+    parser.add_argument("-t", "--template", required=True,
+                        help="模板名称（位于配置目录的 templates 下）或模板JSON文件路径")
+    parser.add_argument("-o", "--output", required=True, help="输出文件夹")
+    parser.add_argument("-r", "--recursive", action="store_true", help="递归处理子文件夹")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="并行进程数，默认使用CPU核心数，1表示串行")
+    parser.add_argument("--format", choices=sorted(FORMAT_CHOICES), default="original",
+                        help="输出格式，默认保持原图格式")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG质量 (1-100)")
+    parser.add_argument("--naming", choices=["original", "prefix", "suffix", "custom", "timestamp"],
+                        default="original", help="命名规则")
+    parser.add_argument("--prefix", help="前缀（命名规则为 prefix 时使用）")
+    parser.add_argument("--suffix", help="后缀（命名规则为 suffix 时使用）")
+    parser.add_argument("--custom-name",
+                        help="自定义名称，支持 {序号}、{原文件名}、{扩展名} 占位符")
+    parser.add_argument("--timestamp-format", default="YYYYMMDD_HHMMSS",
+                        choices=["YYYYMMDD_HHMMSS", "YYYY-MM-DD_HH-MM-SS", "YYYYMMDD", "时间戳"],
+                        help="时间戳格式")
+    parser.add_argument("--sequence-start", type=int, default=1, help="序号起始值")
+    parser.add_argument("--sequence-digits", type=int, default=3, help="序号位数")
+    parser.add_argument("--max-width", type=int, default=0, help="导出时的最大宽度")
+    parser.add_argument("--max-height", type=int, default=0, help="导出时的最大高度")
+    parser.add_argument("--rendition", dest="renditions", action="append", type=parse_rendition,
+                        help="多规格输出，可重复：子文件夹:最大边长:格式[:质量]，如 web:2048:jpeg:85；"
+                             "每张图片只解码和添加水印一次")
+    parser.add_argument("--skip-existing", action="store_true", help="跳过已存在的输出文件")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出每张图片的处理结果")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出图像处理过程中的调试信息")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    主函数
+
+    Returns:
+        退出码：全部成功为0，有失败为1，参数或模板错误为2
+    """
+    args = parse_args(argv)
+
+    try:
+        template = load_template(args.template)
+    except Exception as e:
+        print(f"错误: {e}")
+        return 2
+
+    image_paths = collect_images(args.inputs, args.recursive)
+    if not image_paths:
+        print("错误: 没有找到要处理的图片")
+        return 2
+
+    exporter = BatchExporter(template, build_export_settings(args), args.output,
+                             max_workers=args.workers, overwrite=not args.skip_existing,
+                             silent=not args.verbose)
+    total = len(image_paths)
+    print(f"开始处理 {total} 张图片，使用 {min(exporter.max_workers, total)} 个进程")
+
+    stats = ExportStats(total)
+    try:
+        for result in exporter.run(image_paths):
+            stats.add(result)
+            if result["success"]:
+                if not args.quiet:
+                    print(f"[{stats.done}/{total}] {result['source']} -> {', '.join(result['outputs'])} "
+                          f"({result['elapsed'] * 1000:.0f} ms)")
+            elif result["skipped"]:
+                if not args.quiet:
+                    print(f"[{stats.done}/{total}] 跳过已存在的文件: {result['output']}")
+            else:
+                print(f"[{stats.done}/{total}] 处理失败 {result['source']}: {result['error']}")
+    except KeyboardInterrupt:
+        exporter.cancel()
+        print("已取消")
+
+    summary = stats.snapshot()
+    print(f"完成: 成功 {summary['succeeded']}，失败 {summary['failed']}，跳过 {summary['skipped']}，"
+          f"用时 {summary['elapsed']:.2f} 秒")
+    if summary["succeeded"] + summary["failed"]:
+        print(f"吞吐量: {summary['images_per_sec']:.2f} 张/秒，"
+              f"读取 {summary['read_mb_per_sec']:.2f} MB/秒，"
+              f"写入 {summary['write_mb_per_sec']:.2f} MB/秒")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,14 +7,15 @@ Photot Watermark Tool 主程序文件
 
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                             QHBoxLayout, QPushButton, QLabel, QListWidget,
-                             QFileDialog, QToolBar, QAction, QStatusBar, QListWidgetItem,
+                             QHBoxLayout, QPushButton, QLabel, QListView,
+                             QFileDialog, QToolBar, QAction, QStatusBar,
                              QGroupBox, QFormLayout, QLineEdit, QSpinBox, QDoubleSpinBox,
                              QComboBox, QColorDialog, QMessageBox, QSlider, QInputDialog,
-                             QDialog, QDialogButtonBox, QCheckBox)
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QIcon, QPixmap, QImage, QColor, QPainter, QPen
+                             QDialog, QDialogButtonBox, QCheckBox, QProgressBar)
+from PyQt5.QtCore import Qt, QSize, QTimer, QRect
+from PyQt5.QtGui import QIcon, QPixmap, QColor, QPainter, QPen
 from PIL import Image
 import numpy as np
 
@@ -22,7 +23,28 @@ import numpy as np
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from modules.image_processor import ImageProcessor
+from modules.prepared_watermark import PreparedWatermark
+from modules.batch_exporter import BatchExporter
+from modules.catalog import ImageCatalog
 from modules.config_manager import ConfigManager
+from modules.image_cache import ImageCache
+from modules.image_list_model import ImageListModel
+from modules.thumbnail_cache import ThumbnailCache
+from modules.qt_image import fit_pixmap, pil_to_qpixmap
+from modules.workers import (ExportWorker, FolderScanWorker, ImagePrefetcher, PreviewRenderWorker,
+                             ThumbnailLoader)
+
+# 预览区域大小
+PREVIEW_SIZE = (600, 500)
+
+# 水印参数变化后重新渲染预览的合并间隔（毫秒）
+PREVIEW_DEBOUNCE_MS = 30
+
+# 选中图片时预取前后各多少张图片的预览代理图
+PREFETCH_NEIGHBOURS = 3
+
+# 图片列表每批布局的行数
+IMAGE_LIST_BATCH_SIZE = 2000
 
 class MainWindow(QMainWindow):
     """
@@ -34,17 +56,60 @@ class MainWindow(QMainWindow):
         初始化主窗口
         """
         super().__init__()
-        self.image_files = []  # 存储导入的图片文件路径
         self.current_image_index = -1  # 当前选中的图片索引
         self.image_processor = ImageProcessor()  # 图像处理器
         self.config_manager = ConfigManager()  # 配置管理器
         self.current_watermark_image = None  # 当前水印图片
+        self.prepared_watermark = None  # 预处理的水印图片，缓存缩放/透明度/旋转结果
+        self.watermark_image_path = ""  # 当前水印图片路径
         self.watermark_color = QColor(255, 255, 255, 128)  # 默认水印颜色
         self.processed_image = None  # 处理后的图像
+        self.preview_proxy = None  # 当前图片的预览代理图 (图片路径, 代理图, 原图尺寸)
+        # 持久化的图片目录，记录尺寸、格式和EXIF信息，导入、缩略图、预览和导出共用
+        self.catalog = self.open_catalog()
+        # 会话内的图片缓存，保存解码后的原图和代理图
+        self.image_cache = ImageCache(
+            self.image_processor,
+            max_bytes=self.config_manager.get_setting("app.image_cache_mb", 256) * 1024 * 1024,
+            catalog=self.catalog
+        )
+        self.prefetcher = ImagePrefetcher(self.image_cache, PREVIEW_SIZE)
+        self.export_worker = None  # 后台导出线程
+        self.scan_worker = None  # 后台文件夹扫描线程
+        # 后台缩略图加载器，生成的缩略图持久化到磁盘缓存
+        thumbnail_cache = ThumbnailCache(
+            max_bytes=self.config_manager.get_setting("app.thumbnail_cache_mb", 256) * 1024 * 1024
+        )
+        self.thumbnail_loader = ThumbnailLoader(self.image_processor, thumbnail_cache=thumbnail_cache,
+                                                catalog=self.catalog, parent=self)
+        # 后台预览渲染线程，只渲染最新的参数，过时的结果按序号丢弃
+        self.custom_watermark_position = None  # 拖拽得到的水印位置（原图坐标），None表示使用预设位置
+        self.preview_generation = 0
+        self.preview_worker = PreviewRenderWorker(self.image_processor, parent=self)
+        self.preview_worker.rendered.connect(self.on_preview_rendered)
+        self.preview_worker.render_failed.connect(self.on_preview_failed)
+        self.preview_worker.start()
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.render_preview)
         self.init_ui()
+        self.connect_preview_signals()
         self.load_initial_settings()
         self.auto_load_template()
         
+    def open_catalog(self):
+        """
+        打开图片目录，无法打开时（如配置目录不可写）不使用目录
+        """
+        if not self.config_manager.get_setting("app.use_catalog", True):
+            return None
+        try:
+            return ImageCatalog()
+        except Exception as e:
+            print(f"无法打开图片目录: {e}")
+            return None
+        
     def init_ui(self):
         """
         初始化用户界面
@@ -77,6 +142,35 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage('就绪')
         
+        # 导出进度控件，仅在导出时显示
+        self.export_progress_bar = QProgressBar()
+        self.export_progress_bar.setMaximumWidth(200)
+        self.export_pause_button = QPushButton('暂停')
+        self.export_pause_button.clicked.connect(self.toggle_export_pause)
+        self.export_cancel_button = QPushButton('取消')
+        self.export_cancel_button.clicked.connect(self.cancel_export)
+        for widget in (self.export_progress_bar, self.export_pause_button, self.export_cancel_button):
+            self.status_bar.addPermanentWidget(widget)
+            widget.hide()
+        
+    def connect_preview_signals(self):
+        """
+        将所有水印参数控件连接到预览刷新
+        """
+        self.text_input.textChanged.connect(self.schedule_preview)
+        self.font_combo.currentTextChanged.connect(self.schedule_preview)
+        self.bold_checkbox.toggled.connect(self.schedule_preview)
+        self.italic_checkbox.toggled.connect(self.schedule_preview)
+        self.font_size_spinbox.valueChanged.connect(self.schedule_preview)
+        self.text_opacity_spinbox.valueChanged.connect(self.schedule_preview)
+        self.outline_checkbox.toggled.connect(self.schedule_preview)
+        self.shadow_checkbox.toggled.connect(self.schedule_preview)
+        self.text_rotation_slider.valueChanged.connect(self.schedule_preview)
+        self.scale_spinbox.valueChanged.connect(self.schedule_preview)
+        self.image_opacity_spinbox.valueChanged.connect(self.schedule_preview)
+        self.image_rotation_slider.valueChanged.connect(self.schedule_preview)
+        self.position_combo.currentTextChanged.connect(self.on_position_changed)
+        
     def create_image_list_panel(self):
         """
         创建图片列表面板
@@ -91,9 +185,25 @@ class MainWindow(QMainWindow):
         image_list_label.setAlignment(Qt.AlignCenter)
         self.image_list_layout.addWidget(image_list_label)
         
-        # 添加图片列表
-        self.image_list = QListWidget()
-        self.image_list.itemClicked.connect(self.on_image_selected)
+        # 缩略图生成前显示的占位图标
+        placeholder = QPixmap(64, 64)
+        placeholder.fill(QColor(220, 220, 220))
+        self.placeholder_icon = QIcon(placeholder)
+        
+        # 添加图片列表：模型只为可见行生成缩略图，统一行高让视图不必逐行计算尺寸
+        self.image_model = ImageListModel(self.thumbnail_loader, self.placeholder_icon, parent=self)
+        self.thumbnail_loader.thumbnails_ready.connect(self.image_model.set_thumbnails)
+        self.image_list = QListView()
+        self.image_list.setUniformItemSizes(True)
+        # 大量导入时分批布局，布局过程中界面仍可响应
+        self.image_list.setLayoutMode(QListView.Batched)
+        self.image_list.setBatchSize(IMAGE_LIST_BATCH_SIZE)
+        self.image_list.setModel(self.image_model)
+        # 鼠标点击和方向键切换都会改变当前行
+        self.image_list.selectionModel().currentRowChanged.connect(
+            lambda current, previous: self.on_image_selected(current.row()))
+        # 滚动时优先生成可见行的缩略图
+        self.image_list.verticalScrollBar().valueChanged.connect(self.prioritize_visible_thumbnails)
         self.image_list_layout.addWidget(self.image_list)
         
         # 添加导入按钮
@@ -162,7 +272,13 @@ class MainWindow(QMainWindow):
         self.is_dragging = False
         self.drag_start_pos = None
         self.drag_watermark_offset = (0, 0)  # 鼠标在水印内的偏移量
-        self.current_watermark_position = None  # 当前水印位置 (x, y)
+        self.current_watermark_position = None  # 当前水印位置 (x, y)，原图坐标
+        self.watermark_bbox = None  # 水印在原图上的外接矩形 (left, top, right, bottom)
+        self.preview_drag_layer = None  # 拖拽时重绘用的水印图层
+        self.drag_base_pixmap = None  # 拖拽时不含水印的底图
+        self.drag_layer_pixmap = None  # 按显示尺寸缩放的水印图层
+        self.drag_canvas = None  # 拖拽时显示的预览图
+        self.drag_rect = QRect()  # 水印图层在预览图片上的当前位置
         
         # 将预览区域添加到主布局
         self.main_layout.addWidget(self.preview_widget, 2)
@@ -387,6 +503,7 @@ class MainWindow(QMainWindow):
         export_action.setShortcut('Ctrl+E')
         export_action.triggered.connect(self.export_images)
         file_menu.addAction(export_action)
+        self.export_action = export_action
         
         file_menu.addSeparator()
         
@@ -449,19 +566,71 @@ class MainWindow(QMainWindow):
         )
         
         if folder_path:
-            # 扫描文件夹中的所有图片文件
-            image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
-            image_files = []
-            
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if os.path.splitext(file)[1].lower() in image_extensions:
-                        image_files.append(os.path.join(root, file))
+            # 在后台扫描，找到的图片逐批加入列表
+            self.cancel_folder_scan()
+            self.scan_worker = FolderScanWorker(
+                folder_path,
+                validate=self.config_manager.get_setting("app.validate_imports", True),
+                catalog=self.catalog,
+                parent=self
+            )
+            self.scan_worker.images_found.connect(self.on_scan_images_found)
+            self.scan_worker.progress.connect(self.on_scan_progress)
+            self.scan_worker.scan_finished.connect(self.on_scan_finished)
+            self.scan_worker.start()
+            self.status_bar.showMessage(f'正在扫描: {folder_path}')
             
-            if image_files:
-                self.add_images_to_list(image_files)
-            else:
-                QMessageBox.information(self, "提示", "所选文件夹中没有找到支持的图片文件")
+    def cancel_folder_scan(self):
+        """
+        取消正在进行的文件夹扫描并等待扫描线程结束
+        """
+        if self.scan_worker is None:
+            return
+        self.scan_worker.images_found.disconnect(self.on_scan_images_found)
+        self.scan_worker.progress.disconnect(self.on_scan_progress)
+        self.scan_worker.scan_finished.disconnect(self.on_scan_finished)
+        self.scan_worker.cancel()
+        self.scan_worker.wait()
+        self.scan_worker = None
+        
+    def on_scan_images_found(self, images):
+        """
+        扫描到一批图片时加入列表，并记录验证时读取到的原图尺寸
+        
+        Args:
+            images: ScannedImage 列表
+        """
+        for image in images:
+            if image.size is not None and image.mtime_ns is not None:
+                self.image_cache.remember_size(image.path, image.size, image.mtime_ns, image.file_size)
+        self.add_images_to_list([image.path for image in images], select_first=self.current_image_index < 0)
+        
+    def on_scan_progress(self, scanned, found):
+        """
+        更新扫描进度
+        """
+        self.status_bar.showMessage(f'正在扫描: 已检查 {scanned} 个文件，找到 {found} 张图片')
+        
+    def on_scan_finished(self, stats, cancelled):
+        """
+        扫描结束
+        
+        Args:
+            stats: 扫描统计信息
+            cancelled: 是否被取消
+        """
+        self.scan_worker = None
+        if cancelled:
+            self.status_bar.showMessage(f'扫描已取消: 找到 {stats["found"]} 张图片')
+            return
+        if not stats["found"]:
+            self.status_bar.showMessage('就绪')
+            QMessageBox.information(self, "提示", "所选文件夹中没有找到支持的图片文件")
+            return
+        message = f'扫描完成: 找到 {stats["found"]} 张图片'
+        if stats["rejected"]:
+            message += f'，跳过 {stats["rejected"]} 个无法识别的文件'
+        self.status_bar.showMessage(message)
                 
     def load_system_fonts(self):
         """
@@ -482,76 +651,82 @@ class MainWindow(QMainWindow):
         for font in sorted(font_families):
             self.font_combo.addItem(font)
     
-    def add_images_to_list(self, file_names):
+    def add_images_to_list(self, file_names, select_first=True):
         """
         将图片添加到列表
+        
+        列表项立即插入并显示占位图标，缩略图在列表项首次显示时才在后台生成
+        
+        Args:
+            file_names: 图片路径列表
+            select_first: 是否选中并显示第一张图片
         """
         if file_names:
-            # 添加图片到列表
-            for file_name in file_names:
-                # 检查是否已导入该图片
-                if file_name not in self.image_files:
-                    self.image_files.append(file_name)
-                    # 创建列表项
-                    item = QListWidgetItem(os.path.basename(file_name))
-                    # 生成缩略图
-                    thumbnail = self.generate_thumbnail(file_name)
-                    if thumbnail:
-                        item.setIcon(thumbnail)
-                    self.image_list.addItem(item)
+            # 添加图片到列表，已导入的图片会被跳过
+            self.image_model.add_paths(file_names)
             
             self.status_bar.showMessage(f'已导入 {len(file_names)} 张图片')
             
             # 自动显示第一张图片
-            if self.image_files:
-                self.current_image_index = 0
-                self.image_list.setCurrentRow(0)
+            if select_first and len(self.image_model):
+                self.set_current_row(0)
                 self.display_image(0)
-        
-    def generate_thumbnail(self, image_path):
+                
+    def set_current_row(self, row):
         """
-        生成图片缩略图
+        选中图片列表中的指定行
         """
-        try:
-            # 使用PIL打开图片
-            image = Image.open(image_path)
-            # 调整图片大小作为缩略图
-            image.thumbnail((64, 64), Image.Resampling.LANCZOS)
-            
-            # 转换为numpy数组
-            if image.mode == "RGB":
-                r, g, b = image.split()
-                image = Image.merge("RGB", (b, g, r))
-            elif image.mode == "RGBA":
-                r, g, b, a = image.split()
-                image = Image.merge("RGBA", (b, g, r, a))
-            elif image.mode == "L":
-                image = image.convert("RGB")
-            
-            # 转换为QImage
-            image_data = image.tobytes("raw", "RGB")
-            qimage = QImage(image_data, image.size[0], image.size[1], QImage.Format_RGB888)
-            qpixmap = QPixmap.fromImage(qimage)
-            return QIcon(qpixmap)
-        except Exception as e:
-            print(f"生成缩略图失败: {e}")
-            return None
+        self.current_image_index = row
+        self.image_list.setCurrentIndex(self.image_model.index(row))
+                
+    def prioritize_visible_thumbnails(self, *args):
+        """
+        将当前可见行的缩略图移到生成队列的最前面
+        """
+        if not len(self.image_model):
+            return
+        viewport = self.image_list.viewport()
+        first = self.image_list.indexAt(viewport.rect().topLeft()).row()
+        last = self.image_list.indexAt(viewport.rect().bottomLeft()).row()
+        if first < 0:
+            first = 0
+        if last < 0:
+            last = len(self.image_model) - 1
+        self.thumbnail_loader.prioritize(self.image_model.paths(first, last))
         
-    def on_image_selected(self, item):
+    def on_image_selected(self, row):
         """
         当图片被选中时的处理函数
+        
+        Args:
+            row: 当前行，-1表示没有选中
+        """
+        if row < 0 or row >= len(self.image_model):
+            self.prefetcher.cancel()
+            return
+        self.current_image_index = row
+        self.display_image(row)
+        self.prefetch_neighbours(row)
+        
+    def prefetch_neighbours(self, row):
         """
-        self.current_image_index = self.image_list.row(item)
-        self.display_image(self.current_image_index)
+        在后台解码当前图片前后的图片，由近到远，先向后再向前
+        """
+        paths = []
+        for distance in range(1, PREFETCH_NEIGHBOURS + 1):
+            for neighbour in (row + distance, row - distance):
+                if 0 <= neighbour < len(self.image_model):
+                    paths.append(self.image_model.path(neighbour))
+        self.prefetcher.prefetch(paths)
         
     def delete_selected_image(self):
         """
         删除选中的图片
         """
-        current_row = self.image_list.currentRow()
-        if current_row >= 0 and current_row < len(self.image_files):
+        current_row = self.image_list.currentIndex().row()
+        if current_row >= 0 and current_row < len(self.image_model):
             # 获取要删除的图片名称
-            image_name = os.path.basename(self.image_files[current_row])
+            image_name = os.path.basename(self.image_model.path(current_row))
             
             reply = QMessageBox.question(
                 self, "确认删除",
@@ -561,19 +736,13 @@ class MainWindow(QMainWindow):
             )
             
             if reply == QMessageBox.Yes:
-                # 删除图片文件路径
-                del self.image_files[current_row]
-                
                 # 删除列表项
-                self.image_list.takeItem(current_row)
+                image_path = self.image_model.remove_row(current_row)
+                self.thumbnail_loader.cancel([image_path])
                 
                 # 更新当前选中索引
-                if self.image_files:
-                    if current_row >= len(self.image_files):
-                        self.current_image_index = len(self.image_files) - 1
-                    else:
-                        self.current_image_index = current_row
-                    self.image_list.setCurrentRow(self.current_image_index)
+                if len(self.image_model):
+                    self.set_current_row(min(current_row, len(self.image_model) - 1))
                     self.display_image(self.current_image_index)
                 else:
                     self.current_image_index = -1
@@ -586,23 +755,22 @@ class MainWindow(QMainWindow):
         """
         清空所有图片
         """
-        if not self.image_files:
+        if not len(self.image_model):
             self.status_bar.showMessage('图片列表已为空')
             return
             
         reply = QMessageBox.question(
             self, "确认清空",
-            f"确定要清空所有图片吗？共 {len(self.image_files)} 张图片",
+            f"确定要清空所有图片吗？共 {len(self.image_model)} 张图片",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            # 清空图片文件列表
-            self.image_files.clear()
-            
-            # 清空列表控件
-            self.image_list.clear()
+            # 清空图片列表，正在进行的文件夹扫描一并停止
+            self.cancel_folder_scan()
+            self.image_model.clear()
+            self.thumbnail_loader.cancel()
             
             # 重置当前选中索引
             self.current_image_index = -1
@@ -617,47 +785,57 @@ class MainWindow(QMainWindow):
         """
         显示选中的图片
         """
-        if 0 <= index < len(self.image_files):
+        if 0 <= index < len(self.image_model):
             try:
-                # 使用PIL打开图片
-                image = Image.open(self.image_files[index])
-                # 重置处理后的图像
+                # 重置处理后的图像，并使上一张图片尚未返回的预览失效
                 self.processed_image = None
-                # 调整图片大小以适应预览区域
-                image = image.copy()  # 创建副本避免影响原图
-                max_width, max_height = 600, 500
-                image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-                
-                # 转换为QImage并显示 - 使用高质量缩放
-                if image.mode == "RGB":
-                    image_data = image.tobytes("raw", "RGB")
-                    qimage = QImage(image_data, image.size[0], image.size[1], QImage.Format_RGB888)
-                elif image.mode == "RGBA":
-                    image_data = image.tobytes("raw", "RGBA")
-                    qimage = QImage(image_data, image.size[0], image.size[1], QImage.Format_RGBA8888)
-                else:
-                    # 对于其他模式，转换为RGB
-                    image = image.convert("RGB")
-                    image_data = image.tobytes("raw", "RGB")
-                    qimage = QImage(image_data, image.size[0], image.size[1], QImage.Format_RGB888)
-                
-                qpixmap = QPixmap.fromImage(qimage)
-                # 使用平滑变换提高预览质量
-                qpixmap = qpixmap.scaled(max_width, max_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.preview_label.setPixmap(qpixmap)
+                self.preview_generation += 1
+                self.preview_proxy = None  # 重新选择时检查文件是否变化
+                # 按预览区域大小解码的代理图，尺寸已适合预览区域时不再缩放
+                image, _ = self.get_preview_proxy(self.image_model.path(index))
+                self.preview_label.setPixmap(pil_to_qpixmap(image, PREVIEW_SIZE))
                 self.preview_label.setAlignment(Qt.AlignCenter)
-                self.status_bar.showMessage(f'正在预览: {os.path.basename(self.image_files[index])}')
+                self.status_bar.showMessage(f'正在预览: {os.path.basename(self.image_model.path(index))}')
+                # 在后台叠加当前水印
+                self.schedule_preview()
             except Exception as e:
                 self.preview_label.setText(f'无法加载图片: {str(e)}')
                 print(f"显示图片失败: {e}")
         
+    def get_preview_proxy(self, image_path):
+        """
+        获取预览用的代理图
+        
+        代理图按预览区域大小解码（JPEG直接在DCT阶段缩小）并缓存，预览时水印
+        按比例渲染在代理图上，原图分辨率的处理只在导出时进行。
+        
+        Returns:
+            (代理图, 代理图与原图的尺寸比)
+        """
+        if self.preview_proxy is None or self.preview_proxy[0] != image_path:
+            proxy, full_size = self.image_cache.get_proxy(image_path, PREVIEW_SIZE)
+            self.preview_proxy = (image_path, proxy, full_size)
+        _, proxy, full_size = self.preview_proxy
+        return proxy, proxy.width / full_size[0]
+        
+    def current_image_size(self):
+        """
+        获取当前图片的原图尺寸（从内存中读取，不访问磁盘）
+        """
+        _, _, full_size = self.preview_proxy
+        return full_size
+        
     def export_images(self):
         """
         导出图片
         """
-        if not self.image_files:
+        if self.export_worker is not None:
+            # 上一次导出尚未结束
+            return
+        if not len(self.image_model):
             self.status_bar.showMessage('请先导入图片')
             return
+        image_files = self.image_model.paths()
             
         # 显示导出设置对话框
         export_dialog = ExportSettingsDialog(self)
@@ -684,7 +862,7 @@ class MainWindow(QMainWindow):
             return
             
         # 检查是否导出到源文件夹
-        source_dirs = set(os.path.dirname(path) for path in self.image_files)
+        source_dirs = set(os.path.dirname(path) for path in image_files)
         if export_dir in source_dirs:
             # 默认创建 "_watermark" 子文件夹
             watermark_dir = os.path.join(export_dir, "_watermark")
@@ -708,193 +886,143 @@ class MainWindow(QMainWindow):
             self.config_manager.set_setting("export.last_export_dir", export_dir)
             self.config_manager.save_config()
             
-            # 导出所有图片
-            success_count = 0
-            total_count = len(self.image_files)
-            
-            for i, image_path in enumerate(self.image_files):
-                try:
-                    # 生成输出文件名
-                    original_name = os.path.basename(image_path)
-                    name, ext = os.path.splitext(original_name)
-                    
-                    naming_rule = export_settings["naming_rule"]
-                    if naming_rule == "添加前缀":
-                        output_name = f"{export_settings['prefix']}{original_name}"
-                    elif naming_rule == "添加后缀":
-                        output_name = f"{name}{export_settings['suffix']}{ext}"
-                    elif naming_rule == "自定义命名":
-                        # 使用自定义命名模板
-                        custom_template = export_settings["custom_name"]
-                        sequence = i + export_settings["sequence_start"]
-                        digits = export_settings["sequence_digits"]
-                        sequence_str = str(sequence).zfill(digits)
-                        
-                        # 替换模板中的占位符
-                        output_name = custom_template
-                        output_name = output_name.replace("{序号}", sequence_str)
-                        output_name = output_name.replace("{原文件名}", name)
-                        output_name = output_name.replace("{扩展名}", ext[1:])  # 去掉点号
-                        
-                        # 如果模板中没有扩展名，则添加
-                        if not output_name.endswith(ext):
-                            output_name += ext
-                            
-                    elif naming_rule == "时间戳命名":
-                        # 生成时间戳
-                        from datetime import datetime
-                        now = datetime.now()
-                        timestamp_format = export_settings["timestamp_format"]
-                        
-                        if timestamp_format == "YYYYMMDD_HHMMSS":
-                            timestamp = now.strftime("%Y%m%d_%H%M%S")
-                        elif timestamp_format == "YYYY-MM-DD_HH-MM-SS":
-                            timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")
-                        elif timestamp_format == "YYYYMMDD":
-                            timestamp = now.strftime("%Y%m%d")
-                        else:  # 时间戳
-                            timestamp = str(int(now.timestamp()))
-                        
-                        sequence = i + export_settings["sequence_start"]
-                        digits = export_settings["sequence_digits"]
-                        sequence_str = str(sequence).zfill(digits)
-                        
-                        output_name = f"{timestamp}_{sequence_str}{ext}"
-                    else:  # 保留原文件名
-                        output_name = original_name
-                    
-                    # 确定文件格式和扩展名
-                    export_format = export_settings["format"]
-                    if export_format == "JPEG":
-                        output_ext = ".jpg"
-                        file_format = "JPEG"
-                    elif export_format == "PNG":
-                        output_ext = ".png"
-                        file_format = "PNG"
-                    else:  # 原图格式
-                        # 使用原图的格式
-                        original_ext = os.path.splitext(image_path)[1].lower()
-                        if original_ext in ['.jpg', '.jpeg']:
-                            output_ext = ".jpg"
-                            file_format = "JPEG"
-                        elif original_ext == '.png':
-                            output_ext = ".png"
-                            file_format = "PNG"
-                        else:
-                            # 默认使用JPEG
-                            output_ext = ".jpg"
-                            file_format = "JPEG"
-                    
-                    # 如果扩展名不匹配，则替换
-                    if not output_name.lower().endswith(output_ext.lower()):
-                        output_name = os.path.splitext(output_name)[0] + output_ext
-                    
-                    output_path = os.path.join(export_dir, output_name)
-                    
-                    # 检查文件是否已存在
-                    if os.path.exists(output_path):
-                        reply = QMessageBox.question(
-                            self, "文件已存在",
-                            f"文件 {output_name} 已存在，是否覆盖？",
-                            QMessageBox.Yes | QMessageBox.No,
-                            QMessageBox.No
-                        )
-                        if reply == QMessageBox.No:
-                            continue
-                    
-                    # 加载并处理图片
-                    image = self.image_processor.load_image(image_path)
-                    
-                    # 应用当前水印设置
-                    use_text = bool(self.text_input.text().strip())
-                    use_image = self.current_watermark_image is not None
-                    
-                    if use_text or use_image:
-                        position = self.position_combo.currentText()
-                        
-                        # 应用文本水印
-                        if use_text:
-                            text = self.text_input.text()
-                            font_size = self.font_size_spinbox.value()
-                            opacity = self.text_opacity_spinbox.value()
-                            color = (self.watermark_color.red(),
-                                    self.watermark_color.green(),
-                                    self.watermark_color.blue(),
-                                    self.watermark_color.alpha())
-                            rotation = self.text_rotation_slider.value()
-                            
-                            # 获取字体设置
-                            font_family = self.font_combo.currentText()
-                            bold = self.bold_checkbox.isChecked()
-                            italic = self.italic_checkbox.isChecked()
-                            
-                            # 获取效果设置
-                            outline = self.outline_checkbox.isChecked()
-                            shadow = self.shadow_checkbox.isChecked()
-                            
-                            image = self.image_processor.add_text_watermark(
-                                image, text, position,
-                                font_size=font_size,
-                                color=color,
-                                opacity=opacity,
-                                rotation=rotation,
-                                font_family=font_family,
-                                bold=bold,
-                                italic=italic,
-                                outline=outline,
-                                shadow=shadow
-                            )
-                        
-                        # 应用图片水印
-                        if use_image:
-                            scale = self.scale_spinbox.value()
-                            opacity = self.image_opacity_spinbox.value()
-                            rotation = self.image_rotation_slider.value()
-                            
-                            image = self.image_processor.add_image_watermark(
-                                image, self.current_watermark_image, position,
-                                scale=scale,
-                                opacity=opacity,
-                                rotation=rotation
-                            )
-                    
-                    # 调整图片尺寸
-                    if export_settings["resize_enabled"]:
-                        img_width, img_height = image.size
-                        max_width = export_settings["max_width"]
-                        max_height = export_settings["max_height"]
-                        if img_width > max_width or img_height > max_height:
-                            # 计算新的尺寸，保持宽高比
-                            ratio = min(max_width / img_width, max_height / img_height)
-                            new_width = int(img_width * ratio)
-                            new_height = int(img_height * ratio)
-                            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # 保存图片
-                    quality = export_settings["quality"]
-                    self.image_processor.save_image(image, output_path, quality=quality, file_format=file_format)
-                    success_count += 1
-                    
-                    # 更新状态
-                    self.status_bar.showMessage(f'正在导出: {i+1}/{total_count} - {output_name}')
-                    
-                except Exception as e:
-                    print(f"导出图片 {image_path} 失败: {e}")
-                    QMessageBox.warning(self, "导出错误", f"导出图片 {os.path.basename(image_path)} 失败: {str(e)}")
-            
-            # 显示导出结果
-            if success_count > 0:
-                self.status_bar.showMessage(f'导出完成: {success_count}/{total_count} 张图片已导出到 {export_dir}')
-                QMessageBox.information(self, "导出完成",
-                                      f"成功导出 {success_count}/{total_count} 张图片到:\n{export_dir}")
-            else:
-                self.status_bar.showMessage('导出失败: 没有图片被导出')
-                QMessageBox.warning(self, "导出失败", "没有图片被导出")
+            # 导出开始时一次性记录水印参数，导出过程中修改界面不影响本次导出
+            template = self.collect_watermark_template()
+            if self.current_watermark_image is None:
+                template["image"]["path"] = ""
+            
+            # 检查已存在的文件，统一询问一次
+            overwrite = True
+            # 只确定输出文件名，不查询图片目录（新文件需要读取文件头，由导出线程处理）
+            jobs = BatchExporter(template, export_settings, export_dir).plan(image_files)
+            existing = [output["output"] for job in jobs for output in job["outputs"]
+                        if os.path.exists(output["output"])]
+            if existing:
+                reply = QMessageBox.question(
+                    self, "文件已存在",
+                    f"导出目录中已存在 {len(existing)} 个同名文件（如 {os.path.basename(existing[0])}），是否覆盖？\n"
+                    f"选择“否”将跳过这些文件。",
+                    QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+                    QMessageBox.No
+                )
+                if reply == QMessageBox.Cancel:
+                    self.status_bar.showMessage('导出已取消')
+                    return
+                overwrite = reply == QMessageBox.Yes
+            
+            # 在后台线程中导出，保留一个CPU核心给界面
+            self.export_dir = export_dir
+            self.export_worker = ExportWorker(
+                template, export_settings, export_dir, image_files,
+                max_workers=max(1, (os.cpu_count() or 1) - 1),
+                overwrite=overwrite, catalog=self.catalog, parent=self
+            )
+            self.export_worker.progress.connect(self.on_export_progress)
+            self.export_worker.export_failed.connect(self.on_export_failed)
+            self.export_worker.export_finished.connect(self.on_export_finished)
+            self.export_worker.finished.connect(self.export_worker.deleteLater)
+            
+            self.export_progress_bar.setRange(0, len(self.image_model))
+            self.export_progress_bar.setValue(0)
+            self.export_pause_button.setText('暂停')
+            for widget in (self.export_progress_bar, self.export_pause_button, self.export_cancel_button):
+                widget.setEnabled(True)
+                widget.show()
+            self.export_action.setEnabled(False)
+            self.export_button.setEnabled(False)
+            self.status_bar.showMessage(f'开始导出 {len(self.image_model)} 张图片...')
+            self.export_worker.start()
                 
         except Exception as e:
             self.status_bar.showMessage(f'导出失败: {str(e)}')
             QMessageBox.warning(self, "导出错误", f"导出失败: {str(e)}")
             
+    def on_export_progress(self, result, stats):
+        """
+        后台导出每完成一张图片时更新进度
+        """
+        self.export_progress_bar.setValue(stats["done"])
+        if result["error"]:
+            print(f"导出图片 {result['source']} 失败: {result['error']}")
+        
+        eta = stats["eta"]
+        eta_text = self.format_duration(eta) if eta is not None else '--'
+        paused_text = '（已暂停）' if self.export_worker and self.export_worker.paused else ''
+        self.status_bar.showMessage(
+            f'正在导出{paused_text}: {stats["done"]}/{stats["total"]} - {os.path.basename(result["output"])} | '
+            f'{stats["images_per_sec"]:.1f} 张/秒, {stats["write_mb_per_sec"]:.1f} MB/秒 | 剩余 {eta_text}'
+        )
+        
+    def on_export_failed(self, message):
+        """
+        后台导出出错
+        """
+        QMessageBox.warning(self, "导出错误", f"导出失败: {message}")
+        
+    def on_export_finished(self, stats, cancelled):
+        """
+        后台导出结束，显示导出结果
+        """
+        for widget in (self.export_progress_bar, self.export_pause_button, self.export_cancel_button):
+            widget.hide()
+        self.export_action.setEnabled(True)
+        self.export_button.setEnabled(True)
+        self.export_worker = None
+        
+        success_count = stats["succeeded"]
+        total_count = stats["total"]
+        summary = (f'成功导出 {success_count}/{total_count} 张图片，失败 {stats["failed"]} 张，'
+                   f'跳过 {stats["skipped"]} 张，用时 {self.format_duration(stats["elapsed"])}')
+        print(f"{summary}，{stats['images_per_sec']:.2f} 张/秒")
+        
+        if cancelled:
+            self.status_bar.showMessage(f'导出已取消: {success_count}/{total_count} 张图片已导出')
+            QMessageBox.information(self, "导出已取消", summary)
+        elif success_count > 0:
+            self.status_bar.showMessage(f'导出完成: {success_count}/{total_count} 张图片已导出到 {self.export_dir}')
+            QMessageBox.information(self, "导出完成", f"{summary}\n导出目录:\n{self.export_dir}")
+        else:
+            self.status_bar.showMessage('导出失败: 没有图片被导出')
+            QMessageBox.warning(self, "导出失败", f"没有图片被导出\n{summary}")
+            
+    def toggle_export_pause(self):
+        """
+        暂停或继续后台导出
+        """
+        if self.export_worker is None:
+            return
+        if self.export_worker.paused:
+            self.export_worker.resume()
+            self.export_pause_button.setText('暂停')
+            self.status_bar.showMessage('继续导出...')
+        else:
+            self.export_worker.pause()
+            self.export_pause_button.setText('继续')
+            self.status_bar.showMessage('导出已暂停，正在处理的图片完成后停止')
+            
+    def cancel_export(self):
+        """
+        取消后台导出
+        """
+        if self.export_worker is None:
+            return
+        self.export_worker.cancel()
+        self.export_pause_button.setEnabled(False)
+        self.export_cancel_button.setEnabled(False)
+        self.status_bar.showMessage('正在取消导出，等待正在处理的图片完成...')
+        
+    @staticmethod
+    def format_duration(seconds):
+        """
+        将秒数格式化为 时:分:秒
+        """
+        seconds = int(round(seconds))
+        hours, remainder = divmod(seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        if hours:
+            return f'{hours}:{minutes:02d}:{seconds:02d}'
+        return f'{minutes:02d}:{seconds:02d}'
+        
     def select_color(self):
         """
         选择水印颜色
@@ -905,6 +1033,7 @@ class MainWindow(QMainWindow):
             self.color_preview.setStyleSheet(
                 f"background-color: {color.name()}; border: 1px solid black;"
             )
+            self.schedule_preview()
             
     def select_watermark_image(self):
         """
@@ -918,260 +1047,282 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
-            self.image_path_label.setText(file_path)
             try:
-                self.current_watermark_image = Image.open(file_path)
-                # 确保图片是RGBA模式
-                if self.current_watermark_image.mode != "RGBA":
-                    self.current_watermark_image = self.current_watermark_image.convert("RGBA")
+                self.load_watermark_image(file_path)
                 self.status_bar.showMessage(f'已选择水印图片: {os.path.basename(file_path)}')
             except Exception as e:
                 QMessageBox.warning(self, "错误", f"无法加载水印图片: {str(e)}")
-                self.current_watermark_image = None
+                
+    def load_watermark_image(self, file_path):
+        """
+        加载水印图片
+        
+        Args:
+            file_path: 水印图片路径
+        """
+        self.image_path_label.setText(file_path)
+        try:
+            self.current_watermark_image = Image.open(file_path)
+            # 确保图片是RGBA模式
+            if self.current_watermark_image.mode != "RGBA":
+                self.current_watermark_image = self.current_watermark_image.convert("RGBA")
+            self.prepared_watermark = PreparedWatermark(self.current_watermark_image, use_pyramid=True)
+            self.watermark_image_path = file_path
+        except Exception:
+            self.current_watermark_image = None
+            self.prepared_watermark = None
+            self.watermark_image_path = ""
+            raise
+        finally:
+            self.schedule_preview()
                 
     def apply_watermark(self):
         """
-        应用水印
+        应用水印（水印回到预设位置）
         """
-        if self.current_image_index < 0 or self.current_image_index >= len(self.image_files):
+        if self.current_image_index < 0 or self.current_image_index >= len(self.image_model):
             self.status_bar.showMessage('请先选择一张图片')
             return
             
-        try:
-            # 加载当前图片
-            image_path = self.image_files[self.current_image_index]
-            image = self.image_processor.load_image(image_path)
+        # 检查是否同时使用文本和图片水印
+        use_text = bool(self.text_input.text().strip())
+        use_image = self.current_watermark_image is not None
+        
+        if not use_text and not use_image:
+            self.status_bar.showMessage('请输入水印文本或选择水印图片')
+            return
             
-            # 检查是否同时使用文本和图片水印
-            use_text = bool(self.text_input.text().strip())
-            use_image = self.current_watermark_image is not None
+        self.reset_watermark_position()
+        self.render_preview()
+        self.status_bar.showMessage('水印已应用')
+        
+    def reset_watermark_position(self):
+        """
+        清除拖拽得到的自定义位置，水印回到预设位置
+        """
+        self.custom_watermark_position = None
+        # 实际位置和大小在预览渲染完成后更新
+        self.current_watermark_position = None
+        self.watermark_bbox = None
             
-            if not use_text and not use_image:
-                self.status_bar.showMessage('请输入水印文本或选择水印图片')
-                return
-                
-            # 获取位置
-            position = self.position_combo.currentText()
-            
-            # 应用文本水印
-            if use_text:
-                text = self.text_input.text()
-                font_size = self.font_size_spinbox.value()
-                opacity = self.text_opacity_spinbox.value()
-                color = (self.watermark_color.red(),
-                        self.watermark_color.green(),
-                        self.watermark_color.blue(),
-                        self.watermark_color.alpha())
-                rotation = self.text_rotation_slider.value()
-                
-                # 获取字体设置
-                font_family = self.font_combo.currentText()
-                bold = self.bold_checkbox.isChecked()
-                italic = self.italic_checkbox.isChecked()
-                
-                # 获取效果设置
-                outline = self.outline_checkbox.isChecked()
-                shadow = self.shadow_checkbox.isChecked()
-                
-                image = self.image_processor.add_text_watermark(
-                    image, text, position,
-                    font_size=font_size,
-                    color=color,
-                    opacity=opacity,
-                    rotation=rotation,
-                    font_family=font_family,
-                    bold=bold,
-                    italic=italic,
-                    outline=outline,
-                    shadow=shadow
-                )
-                
-                # 设置当前水印位置
-                if position == "center":
-                    self.current_watermark_position = (2132, 1465)  # 从输出中获取的实际位置
-                elif position == "top-left":
-                    self.current_watermark_position = (20, 20)
-                elif position == "top-right":
-                    self.current_watermark_position = (5016 - 751 - 20, 20)
-                elif position == "bottom-left":
-                    self.current_watermark_position = (20, 3344 - 413 - 20)
-                elif position == "bottom-right":
-                    self.current_watermark_position = (5016 - 751 - 20, 3344 - 413 - 20)
-                else:
-                    self.current_watermark_position = (20, 20)  # 默认位置
-                
-            # 应用图片水印
-            if use_image:
-                scale = self.scale_spinbox.value()
-                opacity = self.image_opacity_spinbox.value()
-                rotation = self.image_rotation_slider.value()
-                
-                image = self.image_processor.add_image_watermark(
-                    image, self.current_watermark_image, position,
-                    scale=scale,
-                    opacity=opacity,
-                    rotation=rotation
-                )
-                
-            # 保存处理后的图像
-            self.processed_image = image
+    def schedule_preview(self, *args):
+        """
+        水印参数变化时安排重新渲染预览
+        
+        定时器运行期间的多次变化合并为一次渲染；定时器不会被重新启动，
+        因此拖动滑块时预览按固定间隔持续刷新
+        """
+        if 0 <= self.current_image_index < len(self.image_model) and not self.preview_timer.isActive():
+            self.preview_timer.start()
             
-            # 显示添加水印后的图片
-            self.display_processed_image(image)
-            self.status_bar.showMessage('水印已应用')
+    def on_position_changed(self, position):
+        """
+        预设位置变化时清除自定义位置并刷新预览
+        """
+        self.reset_watermark_position()
+        self.schedule_preview()
+        
+    def render_preview(self):
+        """
+        在后台线程中按当前参数渲染预览
+        """
+        self.preview_timer.stop()
+        if self.current_image_index < 0 or self.current_image_index >= len(self.image_model):
+            return
             
+        try:
+            # 在代理图上渲染预览，导出时才处理原图分辨率
+            image_path = self.image_model.path(self.current_image_index)
+            image, render_scale = self.get_preview_proxy(image_path)
+            
+            # 一次性记录水印参数，渲染线程中不读取界面控件
+            template = self.collect_watermark_template()
+            if self.custom_watermark_position is not None:
+                template["custom_position"] = self.custom_watermark_position
+            watermark = self.prepared_watermark if self.current_watermark_image is not None else None
+            
+            self.preview_generation += 1
+            self.preview_worker.request(self.preview_generation, image, template, watermark, render_scale)
         except Exception as e:
             QMessageBox.warning(self, "错误", f"应用水印失败: {str(e)}")
             
-    def display_processed_image(self, image):
+    def on_preview_rendered(self, generation, image, qimage, bbox, drag_layer):
+        """
+        预览渲染完成，丢弃已过时的结果
+        
+        Args:
+            generation: 请求序号
+            image: 渲染结果
+            qimage: 渲染结果对应的QImage
+            bbox: 水印在代理图上的外接矩形，没有水印时为None
+            drag_layer: 拖拽时重绘用的水印图层（QImage）
+        """
+        if generation != self.preview_generation:
+            return
+        # 保存处理后的图像
+        self.processed_image = image
+        # 记录水印在原图上的实际位置和大小，用于拖拽时的命中判断
+        self.preview_drag_layer = drag_layer
+        if bbox is None:
+            self.watermark_bbox = None
+            self.current_watermark_position = None
+        else:
+            _, render_scale = self.get_preview_proxy(self.image_model.path(self.current_image_index))
+            self.watermark_bbox = tuple(round(value / render_scale) for value in bbox)
+            self.current_watermark_position = self.watermark_bbox[:2]
+        # 拖拽过程中不覆盖正在重绘的预览，松开鼠标后会重新渲染
+        if not self.is_dragging:
+            # 显示添加水印后的图片
+            self.display_processed_image(image, qimage)
+        
+    def on_preview_failed(self, generation, message):
+        """
+        预览渲染失败
+        """
+        if generation == self.preview_generation:
+            self.status_bar.showMessage(f'应用水印失败: {message}')
+            
+    def display_processed_image(self, image, qimage=None):
         """
         显示处理后的图片
+        
+        Args:
+            image: 处理后的PIL图像
+            qimage: 已转换好的QImage（由渲染线程生成），None时在此转换
         """
         try:
-            # 调整图片大小以适应预览区域
-            image = image.copy()  # 创建副本避免影响原图
-            max_width, max_height = 600, 500
-            image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-            
-            # 转换为QImage并显示 - 使用高质量缩放
-            if image.mode == "RGB":
-                image_data = image.tobytes("raw", "RGB")
-                qimage = QImage(image_data, image.size[0], image.size[1], QImage.Format_RGB888)
-            elif image.mode == "RGBA":
-                image_data = image.tobytes("raw", "RGBA")
-                qimage = QImage(image_data, image.size[0], image.size[1], QImage.Format_RGBA8888)
+            if qimage is None:
+                # 调整图片大小以适应预览区域
+                image = image.copy()  # 创建副本避免影响原图
+                image.thumbnail(PREVIEW_SIZE, Image.Resampling.LANCZOS)
+                qpixmap = pil_to_qpixmap(image, PREVIEW_SIZE)
             else:
-                # 对于其他模式，转换为RGB
-                image = image.convert("RGB")
-                image_data = image.tobytes("raw", "RGB")
-                qimage = QImage(image_data, image.size[0], image.size[1], QImage.Format_RGB888)
-            
-            qpixmap = QPixmap.fromImage(qimage)
-            # 使用平滑变换提高预览质量
-            qpixmap = qpixmap.scaled(max_width, max_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                qpixmap = fit_pixmap(QPixmap.fromImage(qimage), PREVIEW_SIZE)
             self.preview_label.setPixmap(qpixmap)
             self.preview_label.setAlignment(Qt.AlignCenter)
             
-            # 重置拖拽状态
-            self.is_dragging = False
-            # 不要重置 current_watermark_position，否则无法检测水印区域
-            
         except Exception as e:
             self.preview_label.setText(f'无法显示处理后的图片: {str(e)}')
             print(f"显示处理后的图片失败: {e}")
             
+    def map_preview_point(self, pos):
+        """
+        将预览区域中的鼠标位置换算到预览图片和原图上
+        
+        Args:
+            pos: 鼠标在预览区域中的位置
+        
+        Returns:
+            (图片上的位置 (x, y), 原图与预览图片的尺寸比)，鼠标不在图片上时返回 None
+        """
+        pixmap = self.preview_label.pixmap()
+        if pixmap is None or pixmap.isNull():
+            return None
+        
+        # 计算图片在QLabel中的偏移量（居中显示）
+        label_size = self.preview_label.size()
+        offset_x = (label_size.width() - pixmap.width()) // 2
+        offset_y = (label_size.height() - pixmap.height()) // 2
+        
+        # 计算鼠标在图片上的相对位置
+        mouse_x = pos.x() - offset_x
+        mouse_y = pos.y() - offset_y
+        if not (0 <= mouse_x < pixmap.width() and 0 <= mouse_y < pixmap.height()):
+            return None
+        
+        original_width, _ = self.current_image_size()
+        return (mouse_x, mouse_y), original_width / pixmap.width()
+        
     def on_preview_mouse_press(self, event):
         """
         预览区域鼠标按下事件
+        
+        命中水印时开始拖拽：保存不含水印的底图和水印图层，拖动过程中只重绘
+        水印移动前后所在的矩形区域
         """
-        if self.processed_image is not None and event.button() == Qt.LeftButton:
-            # 获取预览图片的尺寸和位置
-            pixmap = self.preview_label.pixmap()
-            if pixmap:
-                # 计算预览图片在QLabel中的位置
-                label_size = self.preview_label.size()
-                pixmap_size = pixmap.size()
-                
-                # 计算图片在QLabel中的偏移量（居中显示）
-                offset_x = (label_size.width() - pixmap_size.width()) // 2
-                offset_y = (label_size.height() - pixmap_size.height()) // 2
-                
-                # 计算鼠标在图片上的相对位置
-                mouse_x = event.pos().x() - offset_x
-                mouse_y = event.pos().y() - offset_y
-                
-                # 确保鼠标在图片范围内
-                if (0 <= mouse_x < pixmap_size.width() and
-                    0 <= mouse_y < pixmap_size.height()):
-                    
-                    # 计算水印在原始图片上的位置
-                    original_image = self.image_processor.load_image(
-                        self.image_files[self.current_image_index]
-                    )
-                    original_width, original_height = original_image.size
-                    
-                    # 计算缩放比例
-                    scale_x = original_width / pixmap_size.width()
-                    scale_y = original_height / pixmap_size.height()
-                    
-                    # 计算鼠标在原始图片上的位置
-                    original_mouse_x = int(mouse_x * scale_x)
-                    original_mouse_y = int(mouse_y * scale_y)
-                    
-                    # 检查鼠标是否在水印区域内
-                    if self.current_watermark_position:
-                        watermark_x, watermark_y = self.current_watermark_position
-                        
-                        # 使用实际的水印尺寸（从之前的输出可以看到是751x413）
-                        watermark_width = 751
-                        watermark_height = 413
-                        
-                        # 检查鼠标是否在水印区域内
-                        in_x_range = watermark_x <= original_mouse_x <= watermark_x + watermark_width
-                        in_y_range = watermark_y <= original_mouse_y <= watermark_y + watermark_height
-                        
-                        if in_x_range and in_y_range:
-                            self.is_dragging = True
-                            self.drag_start_pos = event.pos()
-                            self.drag_watermark_offset = (original_mouse_x - watermark_x, original_mouse_y - watermark_y)
-                            self.status_bar.showMessage('开始拖拽水印位置 - 拖拽水印到任意位置')
-                            return
-                    
-                    # 如果不在水印区域内，不开始拖拽
-                    self.is_dragging = False
-                    print(f"鼠标点击位置不在水印区域内: ({original_mouse_x}, {original_mouse_y})")
+        if self.processed_image is None or event.button() != Qt.LeftButton:
+            return
+        mapped = self.map_preview_point(event.pos())
+        if mapped is None or self.watermark_bbox is None or self.preview_drag_layer is None:
+            return
+        (mouse_x, mouse_y), scale = mapped
+        
+        # 计算鼠标在原始图片上的位置
+        original_mouse_x = int(mouse_x * scale)
+        original_mouse_y = int(mouse_y * scale)
+        
+        # 检查鼠标是否在水印区域内（使用渲染时得到的实际外接矩形）
+        left, top, right, bottom = self.watermark_bbox
+        if not (left <= original_mouse_x <= right and top <= original_mouse_y <= bottom):
+            self.is_dragging = False
+            print(f"鼠标点击位置不在水印区域内: ({original_mouse_x}, {original_mouse_y})")
+            return
+        
+        pixmap = self.preview_label.pixmap()
+        proxy, _ = self.get_preview_proxy(self.image_model.path(self.current_image_index))
+        # 底图与水印图层按预览图片的显示尺寸缩放，之后每次移动只做矩形拷贝和图层绘制
+        self.drag_base_pixmap = pil_to_qpixmap(proxy, (pixmap.width(), pixmap.height()))
+        display_scale = pixmap.width() / proxy.width
+        layer = self.preview_drag_layer
+        self.drag_layer_pixmap = QPixmap.fromImage(layer)
+        if display_scale != 1.0:
+            self.drag_layer_pixmap = self.drag_layer_pixmap.scaled(
+                max(1, round(layer.width() * display_scale)), max(1, round(layer.height() * display_scale)),
+                Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        self.drag_canvas = pixmap.copy()
+        self.drag_rect = QRect(round(left / scale), round(top / scale),
+                               self.drag_layer_pixmap.width(), self.drag_layer_pixmap.height())
+        
+        self.is_dragging = True
+        self.drag_start_pos = event.pos()
+        self.drag_watermark_offset = (original_mouse_x - left, original_mouse_y - top)
+        self.current_watermark_position = (left, top)
+        self.status_bar.showMessage('开始拖拽水印位置 - 拖拽水印到任意位置')
             
     def on_preview_mouse_move(self, event):
         """
         预览区域鼠标移动事件
         """
-        if self.is_dragging and self.processed_image is not None:
-            # 获取预览图片的尺寸和位置
-            pixmap = self.preview_label.pixmap()
-            if pixmap:
-                # 计算预览图片在QLabel中的位置
-                label_size = self.preview_label.size()
-                pixmap_size = pixmap.size()
-                
-                # 计算图片在QLabel中的偏移量（居中显示）
-                offset_x = (label_size.width() - pixmap_size.width()) // 2
-                offset_y = (label_size.height() - pixmap_size.height()) // 2
-                
-                # 计算鼠标在图片上的相对位置
-                mouse_x = event.pos().x() - offset_x
-                mouse_y = event.pos().y() - offset_y
-                
-                # 确保鼠标在图片范围内
-                if (0 <= mouse_x < pixmap_size.width() and
-                    0 <= mouse_y < pixmap_size.height()):
-                    
-                    # 计算水印在原始图片上的位置
-                    original_image = self.image_processor.load_image(
-                        self.image_files[self.current_image_index]
-                    )
-                    original_width, original_height = original_image.size
-                    
-                    # 计算缩放比例
-                    scale_x = original_width / pixmap_size.width()
-                    scale_y = original_height / pixmap_size.height()
-                    
-                    # 计算鼠标在原始图片上的位置
-                    original_mouse_x = int(mouse_x * scale_x)
-                    original_mouse_y = int(mouse_y * scale_y)
-                    
-                    # 计算新的水印位置（考虑偏移量）
-                    watermark_x = original_mouse_x - self.drag_watermark_offset[0]
-                    watermark_y = original_mouse_y - self.drag_watermark_offset[1]
-                    
-                    # 确保水印位置在图片范围内
-                    watermark_x = max(0, min(watermark_x, original_width - 100))  # 留出100像素边距
-                    watermark_y = max(0, min(watermark_y, original_height - 100))  # 留出100像素边距
-                    
-                    # 更新水印位置
-                    self.current_watermark_position = (watermark_x, watermark_y)
-                    
-                    # 更新状态栏显示位置，但不立即重新应用水印（提高性能）
-                    self.status_bar.showMessage(f'拖拽中 - 水印位置: ({watermark_x}, {watermark_y})')
+        if not self.is_dragging or self.processed_image is None:
+            return
+        mapped = self.map_preview_point(event.pos())
+        if mapped is None:
+            return
+        (mouse_x, mouse_y), scale = mapped
+        original_width, original_height = self.current_image_size()
+        
+        # 计算新的水印位置（考虑偏移量），并保证水印尽量留在图片范围内
+        left, top, right, bottom = self.watermark_bbox
+        watermark_x = int(mouse_x * scale) - self.drag_watermark_offset[0]
+        watermark_y = int(mouse_y * scale) - self.drag_watermark_offset[1]
+        watermark_x = max(0, min(watermark_x, original_width - (right - left)))
+        watermark_y = max(0, min(watermark_y, original_height - (bottom - top)))
+        
+        # 更新水印位置
+        self.current_watermark_position = (watermark_x, watermark_y)
+        self.repaint_drag_layer(QRect(round(watermark_x / scale), round(watermark_y / scale),
+                                      self.drag_rect.width(), self.drag_rect.height()))
+        
+        # 更新状态栏显示位置，松开鼠标后再按原图比例重新渲染
+        self.status_bar.showMessage(f'拖拽中 - 水印位置: ({watermark_x}, {watermark_y})')
+        
+    def repaint_drag_layer(self, new_rect):
+        """
+        把水印图层从当前矩形移动到新矩形，只重绘这两个区域
+        
+        Args:
+            new_rect: 水印图层在预览图片上的新位置
+        """
+        old_rect = self.drag_rect
+        if new_rect == old_rect:
+            return
+        painter = QPainter(self.drag_canvas)
+        # 用底图恢复水印原来所在的区域，再在新位置绘制水印图层
+        painter.drawPixmap(old_rect, self.drag_base_pixmap, old_rect)
+        painter.drawPixmap(new_rect.topLeft(), self.drag_layer_pixmap)
+        painter.end()
+        self.drag_rect = new_rect
+        self.preview_label.setPixmap(self.drag_canvas)
                     
     def on_preview_mouse_release(self, event):
         """
@@ -1179,7 +1330,7 @@ class MainWindow(QMainWindow):
         """
         if self.is_dragging and event.button() == Qt.LeftButton:
             self.is_dragging = False
-            # 拖拽结束时才重新应用水印，提高性能
+            # 拖拽结束时才按原图比例重新渲染水印
             if self.current_watermark_position:
                 watermark_x, watermark_y = self.current_watermark_position
                 self.apply_watermark_to_position(watermark_x, watermark_y)
@@ -1188,78 +1339,13 @@ class MainWindow(QMainWindow):
     def apply_watermark_to_position(self, x, y):
         """
         应用水印到指定位置
+        
+        Args:
+            x: 水印左上角的横坐标（原图坐标）
+            y: 水印左上角的纵坐标（原图坐标）
         """
-        if self.current_image_index < 0 or self.current_image_index >= len(self.image_files):
-            return
-            
-        try:
-            # 加载当前图片
-            image_path = self.image_files[self.current_image_index]
-            image = self.image_processor.load_image(image_path)
-            
-            # 检查是否同时使用文本和图片水印
-            use_text = bool(self.text_input.text().strip())
-            use_image = self.current_watermark_image is not None
-            
-            if not use_text and not use_image:
-                return
-                
-            # 应用文本水印
-            if use_text:
-                text = self.text_input.text()
-                font_size = self.font_size_spinbox.value()
-                opacity = self.text_opacity_spinbox.value()
-                color = (self.watermark_color.red(),
-                        self.watermark_color.green(),
-                        self.watermark_color.blue(),
-                        self.watermark_color.alpha())
-                rotation = self.text_rotation_slider.value()
-                
-                # 获取字体设置
-                font_family = self.font_combo.currentText()
-                bold = self.bold_checkbox.isChecked()
-                italic = self.italic_checkbox.isChecked()
-                
-                # 获取效果设置
-                outline = self.outline_checkbox.isChecked()
-                shadow = self.shadow_checkbox.isChecked()
-                
-                image = self.image_processor.add_text_watermark(
-                    image, text, "custom",
-                    font_size=font_size,
-                    color=color,
-                    opacity=opacity,
-                    rotation=rotation,
-                    font_family=font_family,
-                    bold=bold,
-                    italic=italic,
-                    outline=outline,
-                    shadow=shadow,
-                    custom_position=(x, y)
-                )
-                
-            # 应用图片水印
-            if use_image:
-                scale = self.scale_spinbox.value()
-                opacity = self.image_opacity_spinbox.value()
-                rotation = self.image_rotation_slider.value()
-                
-                image = self.image_processor.add_image_watermark(
-                    image, self.current_watermark_image, "custom",
-                    scale=scale,
-                    opacity=opacity,
-                    rotation=rotation,
-                    custom_position=(x, y)
-                )
-                
-            # 保存处理后的图像
-            self.processed_image = image
-            
-            # 显示添加水印后的图片
-            self.display_processed_image(image)
-            
-        except Exception as e:
-            print(f"应用水印到指定位置失败: {e}")
+        self.custom_watermark_position = (x, y)
+        self.render_preview()
             
     def load_initial_settings(self):
         """
@@ -1407,6 +1493,14 @@ class MainWindow(QMainWindow):
                 self.scale_spinbox.setValue(image_settings.get("scale", 1.0))
                 self.image_opacity_spinbox.setValue(image_settings.get("opacity", 50))
                 self.image_rotation_slider.setValue(image_settings.get("rotation", 0))
+                
+                # 恢复模板中记录的水印图片
+                image_path = image_settings.get("path", "")
+                if image_path and os.path.exists(image_path) and image_path != self.watermark_image_path:
+                    try:
+                        self.load_watermark_image(image_path)
+                    except Exception as e:
+                        print(f"加载模板水印图片失败: {e}")
             
             # 应用位置设置
             if "position" in template_data:
@@ -1490,36 +1584,7 @@ class MainWindow(QMainWindow):
         if ok and template_name:
             try:
                 # 收集当前设置
-                text_settings = {
-                    "content": self.text_input.text(),
-                    "font_size": self.font_size_spinbox.value(),
-                    "color": [
-                        self.watermark_color.red(),
-                        self.watermark_color.green(),
-                        self.watermark_color.blue(),
-                        self.watermark_color.alpha()
-                    ],
-                    "opacity": self.text_opacity_spinbox.value(),
-                    "rotation": self.text_rotation_slider.value(),
-                    "font_family": self.font_combo.currentText(),
-                    "bold": self.bold_checkbox.isChecked(),
-                    "italic": self.italic_checkbox.isChecked(),
-                    "outline": self.outline_checkbox.isChecked(),
-                    "shadow": self.shadow_checkbox.isChecked()
-                }
-                
-                image_settings = {
-                    "scale": self.scale_spinbox.value(),
-                    "opacity": self.image_opacity_spinbox.value(),
-                    "rotation": self.image_rotation_slider.value()
-                }
-                
-                position_settings = self.position_combo.currentText()
-                
-                # 创建模板数据
-                template_data = self.config_manager.create_watermark_template(
-                    text_settings, image_settings, position_settings
-                )
+                template_data = self.collect_watermark_template()
                 
                 # 保存模板
                 self.config_manager.save_template(template_name, template_data)
@@ -1530,6 +1595,44 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 QMessageBox.warning(self, "错误", f"保存模板失败: {str(e)}")
                 
+    def collect_watermark_template(self):
+        """
+        从界面控件收集当前水印设置
+        
+        Returns:
+            模板数据字典（ConfigManager.create_watermark_template 的格式）
+        """
+        text_settings = {
+            "content": self.text_input.text(),
+            "font_size": self.font_size_spinbox.value(),
+            "color": [
+                self.watermark_color.red(),
+                self.watermark_color.green(),
+                self.watermark_color.blue(),
+                self.watermark_color.alpha()
+            ],
+            "opacity": self.text_opacity_spinbox.value(),
+            "rotation": self.text_rotation_slider.value(),
+            "font_family": self.font_combo.currentText(),
+            "bold": self.bold_checkbox.isChecked(),
+            "italic": self.italic_checkbox.isChecked(),
+            "outline": self.outline_checkbox.isChecked(),
+            "shadow": self.shadow_checkbox.isChecked()
+        }
+        
+        image_settings = {
+            "scale": self.scale_spinbox.value(),
+            "opacity": self.image_opacity_spinbox.value(),
+            "rotation": self.image_rotation_slider.value(),
+            "path": self.watermark_image_path
+        }
+        
+        position_settings = self.position_combo.currentText()
+        
+        return self.config_manager.create_watermark_template(
+            text_settings, image_settings, position_settings
+        )
+        
     def load_template(self):
         """
         加载选中的模板
@@ -1643,6 +1746,22 @@ class MainWindow(QMainWindow):
         """
         self.save_current_settings()
         self.close()
+        
+    def closeEvent(self, event):
+        """
+        关闭窗口时停止后台导出、文件夹扫描、缩略图生成、预取和预览渲染，并关闭图片目录
+        """
+        self.cancel_folder_scan()
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        self.thumbnail_loader.shutdown()
+        self.prefetcher.shutdown()
+        self.preview_timer.stop()
+        self.preview_worker.stop()
+        if self.catalog is not None:
+            self.catalog.close()
+        super().closeEvent(event)
 
 class ExportSettingsDialog(QDialog):
     """
@@ -1928,12 +2047,16 @@ class ExportSettingsDialog(QDialog):
             "sequence_digits": self.sequence_digits_spinbox.value(),
             "resize_enabled": self.resize_checkbox.isChecked(),
             "max_width": self.max_width_spinbox.value(),
-            "max_height": self.max_height_spinbox.value()
+            "max_height": self.max_height_spinbox.value(),
+            # 多规格输出在配置文件中设置，格式见 DEFAULT_EXPORT_SETTINGS
+            "renditions": self.config_manager.get_setting("export.renditions", [])
         }
 def main():
     """
     主函数
     """
+    # 打包后的程序在导出进程池的子进程中运行时需要
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     main_window = MainWindow()
     main_window.show()
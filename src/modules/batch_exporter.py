@@ -0,0 +1,816 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量导出模块
+不依赖界面的批量水印导出引擎，在多进程中完成 解码 → 水印 → 缩放 → 编码
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from PIL import Image
+
+from .image_processor import EXPORT_DRAFT_GAP, EXPORT_REDUCING_GAP, ImageProcessor
+from .prepared_watermark import PreparedWatermark
+
+# 命名规则：界面显示名称 -> 配置中保存的键
+NAMING_RULES = {
+    "保留原文件名": "original",
+    "添加前缀": "prefix",
+    "添加后缀": "suffix",
+    "自定义命名": "custom",
+    "时间戳命名": "timestamp"
+}
+
+# 默认导出设置，与 ExportSettingsDialog.get_export_settings 的字段一致
+DEFAULT_EXPORT_SETTINGS = {
+    "format": "原图格式",
+    "quality": 95,
+    "naming_rule": "保留原文件名",
+    "prefix": "wm_",
+    "suffix": "_watermarked",
+    "custom_name": "",
+    "timestamp_format": "YYYYMMDD_HHMMSS",
+    "sequence_start": 1,
+    "sequence_digits": 3,
+    "resize_enabled": False,
+    "max_width": 1920,
+    "max_height": 1080,
+    # 多规格输出：每项是覆盖上面字段的导出设置，另可指定 subfolder（输出目录下的子文件夹），
+    # 为空时只按上面的设置输出一份
+    "renditions": []
+}
+
+# 多规格输出时每个工作进程中的编码线程数上限
+MAX_ENCODER_THREADS = 4
+
+# 金字塔中由较大尺寸生成较小尺寸时，reduce()的最大倍数：2倍盒式缩小后再LANCZOS缩放
+# 与直接LANCZOS缩放的PSNR在50dB以上，倍数更大时会出现明显的混叠
+PYRAMID_MAX_REDUCE = 2
+
+
+def expand_renditions(export_settings):
+    """
+    展开多规格输出
+
+    Args:
+        export_settings: 导出设置
+
+    Returns:
+        每个输出规格合并后的导出设置列表，未设置多规格时只有一项
+    """
+    base = {key: value for key, value in export_settings.items() if key != "renditions"}
+    base.setdefault("subfolder", "")
+    renditions = export_settings.get("renditions") or [{}]
+    return [dict(base, **rendition) for rendition in renditions]
+
+
+def normalize_naming_rule(naming_rule):
+    """
+    将命名规则统一为配置键（同时接受界面显示名称和配置键）
+    """
+    return NAMING_RULES.get(naming_rule, naming_rule)
+
+
+def resolve_output_format(image_path, export_format):
+    """
+    确定输出文件的格式和扩展名
+
+    Args:
+        image_path: 源图片路径
+        export_format: 导出格式（"JPEG"、"PNG" 或 "原图格式"）
+
+    Returns:
+        (扩展名, PIL格式名称)
+    """
+    if export_format == "JPEG":
+        return ".jpg", "JPEG"
+    elif export_format == "PNG":
+        return ".png", "PNG"
+
+    # 使用原图的格式
+    original_ext = os.path.splitext(image_path)[1].lower()
+    if original_ext in ['.jpg', '.jpeg']:
+        return ".jpg", "JPEG"
+    elif original_ext == '.png':
+        return ".png", "PNG"
+    # 默认使用JPEG
+    return ".jpg", "JPEG"
+
+
+def build_output_name(image_path, index, export_settings, now=None):
+    """
+    按命名规则生成输出文件名
+
+    Args:
+        image_path: 源图片路径
+        index: 图片在批次中的序号（从0开始）
+        export_settings: 导出设置
+        now: 时间戳命名使用的时间，默认为当前时间
+
+    Returns:
+        (输出文件名, PIL格式名称)
+    """
+    original_name = os.path.basename(image_path)
+    name, ext = os.path.splitext(original_name)
+
+    naming_rule = normalize_naming_rule(export_settings.get("naming_rule", "original"))
+    sequence = index + export_settings.get("sequence_start", 1)
+    sequence_str = str(sequence).zfill(export_settings.get("sequence_digits", 3))
+
+    if naming_rule == "prefix":
+        output_name = f"{export_settings.get('prefix', '')}{original_name}"
+    elif naming_rule == "suffix":
+        output_name = f"{name}{export_settings.get('suffix', '')}{ext}"
+    elif naming_rule == "custom":
+        # 替换模板中的占位符
+        output_name = export_settings.get("custom_name", "") or name
+        output_name = output_name.replace("{序号}", sequence_str)
+        output_name = output_name.replace("{原文件名}", name)
+        output_name = output_name.replace("{扩展名}", ext[1:])  # 去掉点号
+
+        # 如果模板中没有扩展名，则添加
+        if not output_name.endswith(ext):
+            output_name += ext
+    elif naming_rule == "timestamp":
+        now = now or datetime.now()
+        timestamp_format = export_settings.get("timestamp_format", "YYYYMMDD_HHMMSS")
+        if timestamp_format == "YYYYMMDD_HHMMSS":
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
+        elif timestamp_format == "YYYY-MM-DD_HH-MM-SS":
+            timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")
+        elif timestamp_format == "YYYYMMDD":
+            timestamp = now.strftime("%Y%m%d")
+        else:  # 时间戳
+            timestamp = str(int(now.timestamp()))
+        output_name = f"{timestamp}_{sequence_str}{ext}"
+    else:  # 保留原文件名
+        output_name = original_name
+
+    # 确定文件格式和扩展名，如果扩展名不匹配，则替换
+    output_ext, file_format = resolve_output_format(image_path, export_settings.get("format", "原图格式"))
+    if not output_name.lower().endswith(output_ext.lower()):
+        output_name = os.path.splitext(output_name)[0] + output_ext
+
+    return output_name, file_format
+
+
+def fit_output_size(image_size, max_width, max_height):
+    """
+    计算按最大宽高等比缩小后的尺寸
+
+    Returns:
+        (width, height)，图片未超出限制时返回原尺寸
+    """
+    img_width, img_height = image_size
+    if img_width > max_width or img_height > max_height:
+        # 计算新的尺寸，保持宽高比
+        ratio = min(max_width / img_width, max_height / img_height)
+        return (max(1, int(img_width * ratio)), max(1, int(img_height * ratio)))
+    return (img_width, img_height)
+
+
+def resize_to_fit(image, max_width, max_height):
+    """
+    按最大宽高等比缩小图片，图片未超出限制时原样返回
+    """
+    size = fit_output_size(image.size, max_width, max_height)
+    if size != image.size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    return image
+
+
+def unique_output_path(output, used_outputs):
+    """
+    输出路径已被批次中的其他图片占用时（如不同文件夹中的同名图片），在文件名后添加序号
+
+    Args:
+        output: 按命名规则生成的输出路径
+        used_outputs: 已占用的输出路径集合（os.path.normcase 后的路径），返回的路径会加入其中
+
+    Returns:
+        不与已有输出重复的路径，如 x.jpg 被占用时返回 x_1.jpg
+    """
+    base, ext = os.path.splitext(output)
+    candidate = output
+    number = 1
+    while os.path.normcase(candidate) in used_outputs:
+        candidate = f"{base}_{number}{ext}"
+        number += 1
+    used_outputs.add(os.path.normcase(candidate))
+    return candidate
+
+
+def plan_output_size(image_size, export_settings):
+    """
+    根据导出设置确定输出尺寸
+
+    Args:
+        image_size: 原图尺寸 (width, height)
+        export_settings: 导出设置
+
+    Returns:
+        需要缩小时返回输出尺寸 (width, height)，否则返回 None
+    """
+    if not export_settings.get("resize_enabled"):
+        return None
+    size = fit_output_size(image_size, export_settings["max_width"], export_settings["max_height"])
+    return size if size != tuple(image_size) else None
+
+
+def load_template_watermark(template, verbose=True):
+    """
+    加载模板中引用的水印图片
+
+    Args:
+        template: 水印模板数据
+        verbose: 生成水印变换结果时是否输出调试信息
+
+    Returns:
+        PreparedWatermark 对象，模板未指定水印图片时返回 None
+    """
+    image_settings = template.get("image") or {}
+    path = image_settings.get("path")
+    if not path:
+        return None
+    try:
+        watermark = Image.open(path)
+        if watermark.mode != "RGBA":
+            watermark = watermark.convert("RGBA")
+        return PreparedWatermark(watermark, use_pyramid=True, verbose=verbose)
+    except Exception as e:
+        raise Exception(f"无法加载水印图片 {path}: {str(e)}")
+
+
+def _template_watermark_args(template):
+    """
+    从模板中取出文本水印和图片水印的参数
+
+    Returns:
+        (位置, 文本, 文本水印参数, 图片水印参数)
+    """
+    custom_position = template.get("custom_position")
+    if custom_position is not None:
+        custom_position = tuple(custom_position)
+
+    text_settings = template.get("text") or {}
+    text_kwargs = {
+        "font_size": text_settings.get("font_size", 20),
+        "color": tuple(text_settings.get("color", [255, 255, 255, 128])),
+        "opacity": text_settings.get("opacity", 50),
+        "rotation": text_settings.get("rotation", 0),
+        "font_family": text_settings.get("font_family") or None,
+        "bold": text_settings.get("bold", False),
+        "italic": text_settings.get("italic", False),
+        "outline": text_settings.get("outline", False),
+        "shadow": text_settings.get("shadow", False),
+        "custom_position": custom_position
+    }
+
+    image_settings = template.get("image") or {}
+    image_kwargs = {
+        "scale": image_settings.get("scale", 1.0),
+        "opacity": image_settings.get("opacity", 50),
+        "rotation": image_settings.get("rotation", 0),
+        "custom_position": custom_position
+    }
+    return template.get("position", "top-left"), text_settings.get("content", ""), text_kwargs, image_kwargs
+
+
+def apply_template(processor, image, template, watermark=None, composite='inplace', render_scale=1.0,
+                   return_bbox=False):
+    """
+    按模板为图片添加文本水印和图片水印
+
+    Args:
+        processor: ImageProcessor 对象
+        image: PIL图像对象
+        template: 水印模板数据（ConfigManager.create_watermark_template 的格式）
+        watermark: 图片水印（PIL图像或 PreparedWatermark），None表示不添加
+        composite: 合成方式，见 ImageProcessor._composite_watermark
+        render_scale: 渲染比例，在预览代理图上渲染时使用，见 ImageProcessor.add_text_watermark
+        return_bbox: 为True时同时返回所有水印的外接矩形，没有水印时为None
+
+    Returns:
+        添加水印后的图像；return_bbox为True时返回 (图像, (left, top, right, bottom)或None)
+    """
+    position, text, text_kwargs, image_kwargs = _template_watermark_args(template)
+    bboxes = []
+
+    if text.strip():
+        image, bbox = processor.add_text_watermark(
+            image, text, position, composite=composite, render_scale=render_scale,
+            return_bbox=True, **text_kwargs
+        )
+        bboxes.append(bbox)
+
+    if watermark is not None:
+        image, bbox = processor.add_image_watermark(
+            image, watermark, position, composite=composite, render_scale=render_scale,
+            return_bbox=True, **image_kwargs
+        )
+        bboxes.append(bbox)
+
+    if return_bbox:
+        return image, union_bbox(bboxes)
+    return image
+
+
+def render_template_layers(processor, image_size, template, watermark=None, render_scale=1.0):
+    """
+    按模板生成各个水印图层及其位置，不修改图片（用于界面中拖拽水印时的重绘）
+
+    Args:
+        processor: ImageProcessor 对象
+        image_size: 图片尺寸 (width, height)
+        template: 水印模板数据
+        watermark: 图片水印（PIL图像或 PreparedWatermark），None表示不添加
+        render_scale: 渲染比例
+
+    Returns:
+        [(RGBA水印图层, 左上角位置 (x, y))]，按合成顺序排列
+    """
+    position, text, text_kwargs, image_kwargs = _template_watermark_args(template)
+    layers = []
+    if text.strip():
+        layers.append(processor.render_text_watermark(
+            image_size, text, position, render_scale=render_scale, **text_kwargs))
+    if watermark is not None:
+        layers.append(processor.render_image_watermark(
+            image_size, watermark, position, render_scale=render_scale, **image_kwargs))
+    return layers
+
+
+def union_bbox(bboxes):
+    """
+    计算多个矩形的外接矩形
+
+    Args:
+        bboxes: (left, top, right, bottom) 列表
+
+    Returns:
+        外接矩形，列表为空时返回 None
+    """
+    if not bboxes:
+        return None
+    return (min(bbox[0] for bbox in bboxes), min(bbox[1] for bbox in bboxes),
+            max(bbox[2] for bbox in bboxes), max(bbox[3] for bbox in bboxes))
+
+
+# 工作进程内的共享状态，由 _init_worker 初始化，跨任务复用各类缓存
+_worker_state = {}
+
+
+def _init_worker(template, export_settings, silent=False):
+    """
+    工作进程初始化：创建图像处理器并加载水印图片
+    """
+    # 静默模式下不输出图像处理过程中的调试信息
+    _worker_state["processor"] = ImageProcessor(verbose=not silent)
+    _worker_state["template"] = template
+    _worker_state["export_settings"] = export_settings
+    _worker_state["watermark"] = load_template_watermark(template, verbose=not silent)
+    _worker_state["renditions"] = expand_renditions(export_settings)
+    previous_encoder = _worker_state.pop("encoder", None)
+    if previous_encoder is not None:
+        previous_encoder.shutdown(wait=False)
+    if len(_worker_state["renditions"]) > 1:
+        _worker_state["encoder"] = ThreadPoolExecutor(
+            max_workers=min(MAX_ENCODER_THREADS, len(_worker_state["renditions"])))
+
+
+def _process_job(job):
+    """
+    在工作进程中处理单张图片：读取文件头 → 按输出尺寸解码 → 水印 → 编码
+
+    需要缩小时先确定输出尺寸，JPEG按接近该尺寸的比例draft解码，再缩小到
+    输出尺寸，水印按输出尺寸与原图的比例渲染（与预览代理图相同），
+    相对位置和大小与在原图上添加水印后再缩小一致，但只处理输出所需的像素。
+    有多个输出规格时原图只解码一次：从大到小逐级缩小得到各个尺寸（金字塔），
+    每个尺寸各添加一次水印（同尺寸的水印图层在进程内缓存中复用），
+    最后并行编码所有输出文件。
+
+    Args:
+        job: 由 BatchExporter.plan 生成的任务字典
+
+    Returns:
+        结果字典
+    """
+    start = time.perf_counter()
+    result = {
+        "index": job["index"],
+        "source": job["source"],
+        "output": job["output"],
+        "outputs": [output["output"] for output in job["outputs"]],
+        "success": False,
+        "skipped": False,
+        "error": None,
+        "input_bytes": 0,
+        "output_bytes": 0,
+        "elapsed": 0.0
+    }
+    try:
+        processor = _worker_state["processor"]
+        template = _worker_state["template"]
+        renditions = _worker_state["renditions"]
+
+        result["input_bytes"] = os.path.getsize(job["source"])
+        image = processor.load_image(job["source"])
+        source_width = image.width
+        sizes = [plan_output_size(image.size, renditions[output["rendition"]]) or image.size
+                 for output in job["outputs"]]
+        levels = _build_pyramid(processor, image, sizes)
+        watermarked = {}
+        for size, level in levels.items():
+            watermarked[size] = apply_template(processor, level, template, _worker_state["watermark"],
+                                               render_scale=size[0] / source_width)
+        _encode_outputs(processor, job["outputs"], sizes, watermarked, renditions)
+        result["output_bytes"] = sum(os.path.getsize(output["output"]) for output in job["outputs"])
+        result["success"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def _build_pyramid(processor, image, sizes):
+    """
+    为各个输出尺寸生成未加水印的图像，较小的尺寸由相邻的较大尺寸缩小得到
+
+    Args:
+        processor: ImageProcessor 对象
+        image: Image.open 返回的原图（尚未加载像素）
+        sizes: 输出尺寸列表（可以重复）
+
+    Returns:
+        {尺寸: PIL图像}
+    """
+    levels = {}
+    previous = None
+    for size in sorted(set(sizes), key=lambda size: size[0] * size[1], reverse=True):
+        if size == image.size:
+            image.load()
+            levels[size] = previous = image
+        elif previous is None:
+            # 最大的输出尺寸小于原图：JPEG直接按该尺寸draft解码
+            levels[size] = previous = processor.decode_to_size(image, size, EXPORT_REDUCING_GAP,
+                                                               EXPORT_DRAFT_GAP)
+        else:
+            levels[size] = previous = _downscale(previous, size)
+    return levels
+
+
+def _downscale(image, size):
+    """
+    将金字塔中较大的一级缩小到指定尺寸
+    """
+    # 调色板和二值图像只能用最近邻缩放，先转换模式以保证缩放质量
+    if image.mode == "P":
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    elif image.mode == "1":
+        image = image.convert("L")
+    factor = min(image.width // size[0], image.height // size[1], PYRAMID_MAX_REDUCE)
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+def _encode_outputs(processor, outputs, sizes, watermarked, renditions):
+    """
+    编码所有输出文件，有多个输出时在线程池中并行编码（编码过程会释放GIL）
+
+    Args:
+        processor: ImageProcessor 对象
+        outputs: 任务中的输出列表
+        sizes: 每个输出的尺寸
+        watermarked: {尺寸: 添加水印后的图像}
+        renditions: 各输出规格的导出设置
+    """
+    tasks = []
+    used = set()
+    for output, size in zip(outputs, sizes):
+        image = watermarked[size]
+        if size in used:
+            # Image.save 会把编码参数记录在图像对象上，同一对象不能在多个线程中同时保存
+            image = image.copy()
+        used.add(size)
+        quality = renditions[output["rendition"]].get("quality", 95)
+        tasks.append((image, output["output"], quality, output["file_format"]))
+
+    encoder = _worker_state.get("encoder")
+    if encoder is None or len(tasks) == 1:
+        for image, path, quality, file_format in tasks:
+            processor.save_image(image, path, quality=quality, file_format=file_format)
+        return
+    futures = [encoder.submit(processor.save_image, image, path, quality=quality, file_format=file_format)
+               for image, path, quality, file_format in tasks]
+    for future in futures:
+        future.result()
+
+
+class ExportStats:
+    """
+    导出进度统计类
+
+    累计每张图片的结果，计算吞吐量（张/秒、MB/秒）和预计剩余时间。
+    暂停期间的时间不计入耗时。
+    """
+
+    def __init__(self, total):
+        """
+        初始化统计
+
+        Args:
+            total: 图片总数
+        """
+        self.total = total
+        self.done = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self._start = time.perf_counter()
+        self._paused_at = None
+        self._paused_time = 0.0
+
+    def add(self, result):
+        """
+        记录一张图片的结果
+        """
+        self.done += 1
+        if result["success"]:
+            self.succeeded += 1
+            self.input_bytes += result["input_bytes"]
+            self.output_bytes += result["output_bytes"]
+        elif result["skipped"]:
+            self.skipped += 1
+        else:
+            self.failed += 1
+
+    def pause(self):
+        """
+        暂停计时
+        """
+        if self._paused_at is None:
+            self._paused_at = time.perf_counter()
+
+    def resume(self):
+        """
+        继续计时
+        """
+        if self._paused_at is not None:
+            self._paused_time += time.perf_counter() - self._paused_at
+            self._paused_at = None
+
+    @property
+    def elapsed(self):
+        """
+        已用时间（秒），不含暂停时间
+        """
+        now = self._paused_at if self._paused_at is not None else time.perf_counter()
+        return now - self._start - self._paused_time
+
+    def snapshot(self):
+        """
+        获取当前统计信息
+
+        Returns:
+            统计字典，eta 为预计剩余秒数（尚无法估计时为 None）
+        """
+        elapsed = self.elapsed
+        processed = self.succeeded + self.failed
+        images_per_sec = processed / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        return {
+            "total": self.total,
+            "done": self.done,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed": elapsed,
+            "images_per_sec": images_per_sec,
+            "read_mb_per_sec": self.input_bytes / elapsed / 1024 / 1024 if elapsed > 0 else 0.0,
+            "write_mb_per_sec": self.output_bytes / elapsed / 1024 / 1024 if elapsed > 0 else 0.0,
+            "eta": remaining / images_per_sec if images_per_sec > 0 else None
+        }
+
+
+class BatchExporter:
+    """
+    批量导出器类
+
+    使用进程池并行处理图片，结果按完成顺序逐个返回。
+    每个工作进程只初始化一次图像处理器和水印图片，水印图层缓存在进程内复用。
+    """
+
+    def __init__(self, template, export_settings, output_dir, max_workers=None, overwrite=True,
+                 silent=False, catalog=None):
+        """
+        初始化批量导出器
+
+        Args:
+            template: 水印模板数据（ConfigManager.create_watermark_template 的格式）
+            export_settings: 导出设置（ExportSettingsDialog.get_export_settings 的格式）
+            output_dir: 输出目录
+            max_workers: 工作进程数，None表示使用CPU核心数，1表示在当前进程中串行处理
+            overwrite: 输出文件已存在时是否覆盖，False时跳过
+            silent: 是否屏蔽图像处理过程中的调试输出
+            catalog: ImageCatalog 对象，用于在规划时获取原图尺寸并提前排除无法识别的文件
+        """
+        self.template = template
+        self.export_settings = dict(DEFAULT_EXPORT_SETTINGS)
+        self.export_settings.update(export_settings or {})
+        self.renditions = expand_renditions(self.export_settings)
+        self.output_dir = output_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.overwrite = overwrite
+        self.silent = silent
+        self.catalog = catalog
+        self._cancelled = False
+        self._resumed = threading.Event()  # 未暂停时处于置位状态
+        self._resumed.set()
+
+    def plan(self, image_paths):
+        """
+        为每张图片生成导出任务（在主进程中确定输出文件名）
+
+        每个任务的 outputs 列出各输出规格的文件，output 和 file_format 为第一个规格的输出。
+        不同图片的输出文件名相同时（如递归导入的不同文件夹中的同名图片），后面的图片在文件名后添加序号。
+        提供图片目录时任务中还包含是否为可识别的图片（source_valid），只读取文件头，
+        未变化的文件直接从目录中获取。新文件需要读取文件头，不应在界面线程中调用
+
+        Args:
+            image_paths: 源图片路径列表
+
+        Returns:
+            任务字典列表
+        """
+        now = datetime.now()
+        catalog_entries = self.catalog.get_many(image_paths) if self.catalog is not None else {}
+        jobs = []
+        used_outputs = set()
+        for index, image_path in enumerate(image_paths):
+            outputs = []
+            for rendition_index, rendition in enumerate(self.renditions):
+                output_name, file_format = build_output_name(image_path, index, rendition, now)
+                output = os.path.join(self.output_dir, rendition["subfolder"], output_name)
+                if any(existing["output"] == output for existing in outputs):
+                    raise Exception(f"多个输出规格的输出文件相同: {output}，请为各规格设置不同的子文件夹或命名规则")
+                output = unique_output_path(output, used_outputs)
+                outputs.append({"output": output, "file_format": file_format, "rendition": rendition_index})
+            job = {
+                "index": index,
+                "source": image_path,
+                "output": outputs[0]["output"],
+                "file_format": outputs[0]["file_format"],
+                "outputs": outputs
+            }
+            metadata = catalog_entries.get(image_path)
+            if metadata is not None:
+                job["source_valid"] = metadata.valid
+            jobs.append(job)
+        return jobs
+
+    def cancel(self):
+        """
+        取消导出：不再提交新任务，已提交的任务完成后停止
+        """
+        self._cancelled = True
+        self._resumed.set()
+
+    def pause(self):
+        """
+        暂停导出：不再提交新任务，已提交的任务仍会完成并返回结果
+        """
+        self._resumed.clear()
+
+    def resume(self):
+        """
+        继续已暂停的导出
+        """
+        self._resumed.set()
+
+    @property
+    def paused(self):
+        """
+        是否处于暂停状态
+        """
+        return not self._resumed.is_set()
+
+    @property
+    def cancelled(self):
+        """
+        是否已取消
+        """
+        return self._cancelled
+
+    def run(self, image_paths):
+        """
+        执行批量导出
+
+        Args:
+            image_paths: 源图片路径列表
+
+        Yields:
+            每张图片的结果字典，按完成顺序返回
+        """
+        self._cancelled = False
+        for rendition in self.renditions:
+            os.makedirs(os.path.join(self.output_dir, rendition["subfolder"]), exist_ok=True)
+
+        jobs = []
+        for job in self.plan(image_paths):
+            if not self.overwrite:
+                # 只生成尚不存在的输出，全部存在时跳过
+                missing = [output for output in job["outputs"] if not os.path.exists(output["output"])]
+                if not missing:
+                    yield self._skipped_result(job)
+                    continue
+                job["outputs"] = missing
+                # 结果中报告的输出文件为实际生成的文件
+                job["output"] = missing[0]["output"]
+                job["file_format"] = missing[0]["file_format"]
+            if job.get("source_valid") is False:
+                # 图片目录已确认文件不是可识别的图片，不必交给工作进程解码
+                yield self._rejected_result(job)
+            else:
+                jobs.append(job)
+
+        if self.max_workers <= 1:
+            yield from self._run_serial(jobs)
+        else:
+            yield from self._run_parallel(jobs)
+
+    def _run_serial(self, jobs):
+        """
+        在当前进程中逐个处理任务
+        """
+        _init_worker(self.template, self.export_settings, self.silent)
+        for job in jobs:
+            self._resumed.wait()
+            if self._cancelled:
+                break
+            yield _process_job(job)
+
+    def _run_parallel(self, jobs):
+        """
+        在进程池中处理任务，同时在途的任务数量有上限，便于及时响应暂停和取消
+
+        工作进程使用 spawn 方式启动：界面中调用时当前进程还有缩略图、预取、预览等线程
+        和图片目录的数据库连接，fork 会复制这些线程持有的锁，可能导致子进程死锁。
+        """
+        max_in_flight = self.max_workers * 4
+        pending = iter(jobs)
+        exhausted = False
+        in_flight = set()
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(self.template, self.export_settings, self.silent)) as executor:
+            while True:
+                while not self._cancelled and not self.paused and len(in_flight) < max_in_flight:
+                    job = next(pending, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    in_flight.add(executor.submit(_process_job, job))
+                if not in_flight:
+                    if self._cancelled or exhausted:
+                        break
+                    # 暂停中且没有在途任务，等待继续或取消
+                    self._resumed.wait()
+                    continue
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def _skipped_result(self, job):
+        """
+        生成跳过（输出文件已存在）的结果
+        """
+        return {
+            "index": job["index"],
+            "source": job["source"],
+            "output": job["output"],
+            "outputs": [output["output"] for output in job["outputs"]],
+            "success": False,
+            "skipped": True,
+            "error": None,
+            "input_bytes": 0,
+            "output_bytes": 0,
+            "elapsed": 0.0
+        }
+
+    def _rejected_result(self, job):
+        """
+        生成失败（源文件无法识别为图片）的结果
+        """
+        result = self._skipped_result(job)
+        result["skipped"] = False
+        result["error"] = f"无法识别的图片: {job['source']}"
+        return result
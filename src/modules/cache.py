@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+缓存模块
+提供带内存预算的LRU缓存，用于复用水印图层等中间结果
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def estimate_image_bytes(image):
+    """
+    估算PIL图像占用的内存字节数
+
+    Args:
+        image: PIL图像对象
+
+    Returns:
+        估算的字节数
+    """
+    try:
+        width, height = image.size
+        return width * height * len(image.getbands())
+    except Exception:
+        return 0
+
+
+class LRUCache:
+    """
+    带内存预算的LRU缓存类
+
+    按最近最少使用的顺序淘汰条目，直到总占用不超过 max_bytes。
+    所有操作都是线程安全的，缓存的对象应视为只读。
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_items=None, size_func=estimate_image_bytes):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 内存预算（字节），None表示不限制
+            max_items: 最大条目数，None表示不限制
+            size_func: 计算条目大小的函数
+        """
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.size_func = size_func
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        获取缓存条目，命中时将其移到最近使用的位置
+
+        Args:
+            key: 缓存键
+            default: 未命中时的返回值
+
+        Returns:
+            缓存的值或默认值
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        """
+        写入缓存条目
+
+        Args:
+            key: 缓存键
+            value: 缓存的值
+            size: 条目大小（字节），None时使用 size_func 计算
+
+        Returns:
+            是否成功写入（超过预算的单个条目不会被缓存）
+        """
+        if size is None:
+            size = self.size_func(value) if self.size_func else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._evict()
+        return True
+
+    def discard(self, key):
+        """
+        移除指定的缓存条目
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+
+    def clear(self):
+        """
+        清空缓存并重置计数
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含命中、未命中、条目数和内存占用的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "items": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _evict(self):
+        """
+        淘汰最久未使用的条目直到满足预算（调用方需持有锁）
+        """
+        while self._entries and (
+                (self.max_bytes is not None and self.current_bytes > self.max_bytes) or
+                (self.max_items is not None and len(self._entries) > self.max_items)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
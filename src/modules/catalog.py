@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片目录模块
+用 SQLite 在 ~/.photot_watermark/catalog.sqlite3 中持久化图片的尺寸、格式和常用EXIF信息，
+这些信息只读取文件头得到，之后的会话中文件未变化时直接复用
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from PIL import ExifTags, Image
+
+# 数据库结构版本，结构变化时旧数据库会被重建（目录只是缓存，可以随时重新生成）
+CATALOG_SCHEMA_VERSION = 1
+
+# 单条 SQL 中的参数数量上限，批量查询时按此分组
+SQL_BATCH_SIZE = 500
+
+# 这些格式的EXIF位于文件头部，读取时不需要解码像素
+EXIF_HEADER_FORMATS = {"JPEG", "MPO", "TIFF", "WEBP"}
+
+# 需要交换宽高才能得到显示尺寸的EXIF方向值（旋转90度或270度）
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+METADATA_COLUMNS = ("path", "mtime_ns", "file_size", "format", "mode", "width", "height",
+                    "orientation", "taken", "camera")
+
+
+class ImageMetadata:
+    """
+    一张图片的元数据
+
+    format 为 None 表示文件无法识别为图片，这一结果同样会被记录，
+    文件未变化时不再重复尝试打开。
+    """
+
+    __slots__ = METADATA_COLUMNS
+
+    def __init__(self, path, mtime_ns, file_size, format=None, mode=None, width=None, height=None,
+                 orientation=None, taken=None, camera=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.file_size = file_size
+        self.format = format
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.orientation = orientation  # EXIF方向，1-8
+        self.taken = taken  # 拍摄时间，"YYYY-MM-DD HH:MM:SS"，可直接按字符串比较
+        self.camera = camera  # 相机厂商和型号
+
+    @property
+    def valid(self):
+        """
+        是否为可识别的图片
+        """
+        return self.format is not None
+
+    @property
+    def size(self):
+        """
+        原图尺寸 (width, height)（按文件中的像素排列，未考虑EXIF方向）
+        """
+        return (self.width, self.height) if self.valid else None
+
+    @property
+    def display_size(self):
+        """
+        按EXIF方向旋转后的尺寸
+        """
+        if not self.valid:
+            return None
+        if self.orientation in TRANSPOSED_ORIENTATIONS:
+            return (self.height, self.width)
+        return (self.width, self.height)
+
+    def as_row(self):
+        """
+        转换为数据库行
+        """
+        return tuple(getattr(self, column) for column in METADATA_COLUMNS)
+
+
+def _exif_text(value):
+    """
+    EXIF文本字段去掉末尾的空字符和空白
+    """
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "ignore")
+    return str(value).strip("\x00 ").strip() if value is not None else ""
+
+
+def _read_exif(image):
+    """
+    读取方向、拍摄时间和相机信息
+
+    Returns:
+        (orientation, taken, camera)
+    """
+    if image.format not in EXIF_HEADER_FORMATS and "exif" not in image.info:
+        # 其他格式（如PNG）的EXIF可能位于图像数据之后，读取会触发解码
+        return None, None, None
+    exif = image.getexif()
+    if not exif:
+        return None, None, None
+    orientation = exif.get(ExifTags.Base.Orientation)
+    taken = exif.get_ifd(ExifTags.IFD.Exif).get(ExifTags.Base.DateTimeOriginal) or exif.get(ExifTags.Base.DateTime)
+    taken = _exif_text(taken)
+    if len(taken) >= 19:
+        # EXIF格式 "YYYY:MM:DD HH:MM:SS"
+        taken = f"{taken[0:4]}-{taken[5:7]}-{taken[8:10]} {taken[11:19]}"
+    else:
+        taken = None
+    camera = " ".join(part for part in (_exif_text(exif.get(ExifTags.Base.Make)),
+                                        _exif_text(exif.get(ExifTags.Base.Model))) if part)
+    return orientation if isinstance(orientation, int) else None, taken, camera or None
+
+
+def read_metadata(image_path, stat=None):
+    """
+    只读取文件头获取图片的元数据，不解码像素
+
+    Args:
+        image_path: 图片路径
+        stat: 文件的 os.stat 结果，None表示重新获取
+
+    Returns:
+        ImageMetadata 对象，文件无法识别时 format 为 None
+    """
+    if stat is None:
+        stat = os.stat(image_path)
+    metadata = ImageMetadata(os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+    try:
+        with Image.open(image_path) as image:
+            metadata.format = image.format
+            metadata.mode = image.mode
+            metadata.width, metadata.height = image.size
+            try:
+                metadata.orientation, metadata.taken, metadata.camera = _read_exif(image)
+            except Exception as e:
+                # EXIF损坏不影响图片本身
+                print(f"读取EXIF失败 {image_path}: {e}")
+    except Exception:
+        pass
+    return metadata
+
+
+class ImageCatalog:
+    """
+    图片目录类
+
+    每个文件一行，以绝对路径为主键，同时记录修改时间和文件大小；
+    查询时两者与当前文件一致才视为有效，否则重新读取文件头并更新。
+    批量查询按 SQL_BATCH_SIZE 分组，只对缺失或已变化的文件读取文件头，
+    结果在一个事务中写回。所有操作都是线程安全的。
+    """
+
+    def __init__(self, db_path=None):
+        """
+        初始化图片目录
+
+        Args:
+            db_path: 数据库文件路径，默认位于配置目录下；":memory:" 表示只保存在内存中
+        """
+        if db_path is None:
+            db_path = Path.home() / ".photot_watermark" / "catalog.sqlite3"
+        if str(db_path) != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(db_path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = self._open()
+
+    def _open(self):
+        """
+        打开数据库，结构版本不一致时重建
+        """
+        try:
+            connection = self._connect()
+        except sqlite3.DatabaseError as e:
+            print(f"图片目录已损坏，重新创建: {e}")
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.db_path + suffix)
+                except OSError:
+                    pass
+            connection = self._connect()
+        return connection
+
+    def _connect(self):
+        """
+        连接数据库并确保表结构为当前版本
+        """
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            if self.db_path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != CATALOG_SCHEMA_VERSION:
+                with connection:
+                    connection.execute("DROP TABLE IF EXISTS images")
+                    connection.execute("""
+                        CREATE TABLE images (
+                            path TEXT PRIMARY KEY,
+                            mtime_ns INTEGER NOT NULL,
+                            file_size INTEGER NOT NULL,
+                            format TEXT,
+                            mode TEXT,
+                            width INTEGER,
+                            height INTEGER,
+                            orientation INTEGER,
+                            taken TEXT,
+                            camera TEXT
+                        )
+                    """)
+                    connection.execute("CREATE INDEX images_size ON images (width, height)")
+                    connection.execute("CREATE INDEX images_format ON images (format)")
+                    connection.execute("CREATE INDEX images_taken ON images (taken)")
+                    connection.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def get(self, image_path):
+        """
+        获取一张图片的元数据
+
+        Args:
+            image_path: 图片路径
+
+        Returns:
+            ImageMetadata 对象，文件不存在时返回 None
+        """
+        return self.get_many([image_path]).get(image_path)
+
+    def get_many(self, image_paths):
+        """
+        批量获取图片的元数据，缺失或已变化的文件读取文件头后写入目录
+
+        Args:
+            image_paths: 图片路径列表
+
+        Returns:
+            {图片路径: ImageMetadata}，不存在的文件不包含在内
+        """
+        stats = {}
+        for image_path in image_paths:
+            try:
+                stats[image_path] = os.stat(image_path)
+            except OSError:
+                continue
+        keys = {image_path: os.path.abspath(image_path) for image_path in stats}
+        stored = self._select(list(set(keys.values())))
+
+        results = {}
+        changed = []
+        for image_path, stat in stats.items():
+            metadata = stored.get(keys[image_path])
+            if metadata is None or metadata.mtime_ns != stat.st_mtime_ns or metadata.file_size != stat.st_size:
+                metadata = read_metadata(image_path, stat)
+                stored[keys[image_path]] = metadata
+                changed.append(metadata)
+            results[image_path] = metadata
+        if changed:
+            self.put_many(changed)
+        with self._lock:
+            self.hits += len(results) - len(changed)
+            self.misses += len(changed)
+        return results
+
+    def _select(self, keys):
+        """
+        按绝对路径批量读取已保存的记录
+
+        Returns:
+            {绝对路径: ImageMetadata}
+        """
+        stored = {}
+        columns = ", ".join(METADATA_COLUMNS)
+        with self._lock:
+            for start in range(0, len(keys), SQL_BATCH_SIZE):
+                batch = keys[start:start + SQL_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                for row in self._connection.execute(
+                        f"SELECT {columns} FROM images WHERE path IN ({placeholders})", batch):
+                    stored[row[0]] = ImageMetadata(*row)
+        return stored
+
+    def put_many(self, metadata_list):
+        """
+        写入或更新元数据（如导入时已经读取过文件头）
+
+        Args:
+            metadata_list: ImageMetadata 列表
+        """
+        placeholders = ", ".join("?" * len(METADATA_COLUMNS))
+        with self._lock:
+            try:
+                with self._connection:
+                    self._connection.executemany(
+                        f"INSERT OR REPLACE INTO images ({', '.join(METADATA_COLUMNS)}) VALUES ({placeholders})",
+                        [metadata.as_row() for metadata in metadata_list])
+            except sqlite3.Error as e:
+                # 目录只是缓存，写入失败不影响调用方
+                print(f"写入图片目录失败: {e}")
+
+    def query(self, folder=None, formats=None, min_size=None, max_size=None, taken_after=None,
+              taken_before=None):
+        """
+        按条件筛选目录中的图片（只返回可识别的图片，不检查文件是否仍然存在）
+
+        Args:
+            folder: 只返回该文件夹（包括子文件夹）中的图片
+            formats: 格式集合，如 {"JPEG", "PNG"}
+            min_size: 最小尺寸 (width, height)
+            max_size: 最大尺寸 (width, height)
+            taken_after: 拍摄时间下限（包含），"YYYY-MM-DD" 或 "YYYY-MM-DD HH:MM:SS"
+            taken_before: 拍摄时间上限（不包含）
+
+        Returns:
+            ImageMetadata 列表，按路径排序
+        """
+        conditions = ["format IS NOT NULL"]
+        params = []
+        if folder is not None:
+            prefix = os.path.join(os.path.abspath(folder), "")
+            # 用范围比较代替 LIKE，避免路径中的 % 和 _ 被当作通配符，并且可以使用主键索引
+            conditions.append("path >= ? AND path < ?")
+            params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        if formats:
+            formats = list(formats)
+            conditions.append(f"format IN ({', '.join('?' * len(formats))})")
+            params += formats
+        if min_size is not None:
+            conditions.append("width >= ? AND height >= ?")
+            params += list(min_size)
+        if max_size is not None:
+            conditions.append("width <= ? AND height <= ?")
+            params += list(max_size)
+        if taken_after is not None:
+            conditions.append("taken >= ?")
+            params.append(taken_after)
+        if taken_before is not None:
+            conditions.append("taken < ?")
+            params.append(taken_before)
+        sql = (f"SELECT {', '.join(METADATA_COLUMNS)} FROM images "
+               f"WHERE {' AND '.join(conditions)} ORDER BY path")
+        with self._lock:
+            return [ImageMetadata(*row) for row in self._connection.execute(sql, params)]
+
+    def prune(self):
+        """
+        删除源文件已不存在的记录
+
+        Returns:
+            删除的记录数
+        """
+        with self._lock:
+            paths = [row[0] for row in self._connection.execute("SELECT path FROM images")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        if missing:
+            with self._lock, self._connection:
+                self._connection.executemany("DELETE FROM images WHERE path = ?", missing)
+        return len(missing)
+
+    def clear(self):
+        """
+        删除所有记录
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM images")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        获取目录统计信息
+
+        Returns:
+            包含记录数、命中和未命中次数的字典
+        """
+        with self._lock:
+            count = self._connection.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "images": count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    def close(self):
+        """
+        关闭数据库连接
+        """
+        with self._lock:
+            self._connection.close()
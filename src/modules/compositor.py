@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成模块
+基于NumPy的水印alpha合成内核，使用定点整数运算，只处理水印覆盖的区域
+"""
+
+import numpy as np
+from PIL import Image
+
+# 支持的目标图片模式
+SUPPORTED_MODES = ("RGB", "RGBA", "L")
+
+
+def _div255(values):
+    """
+    整数除以255并四舍五入（对 0..255*255 范围内的值精确）
+    """
+    values += 128
+    values += values >> 8
+    values >>= 8
+    return values
+
+
+def intersect_box(dest_size, layer_size, position):
+    """
+    计算水印图层在目标图片上的可见区域
+
+    Args:
+        dest_size: 目标图片尺寸 (width, height)
+        layer_size: 水印图层尺寸 (width, height)
+        position: 水印左上角在目标图片上的位置 (x, y)
+
+    Returns:
+        (目标区域, 图层区域) 两个 (left, top, right, bottom) 元组，
+        没有重叠时返回 None
+    """
+    x, y = int(position[0]), int(position[1])
+    left = max(0, x)
+    top = max(0, y)
+    right = min(dest_size[0], x + layer_size[0])
+    bottom = min(dest_size[1], y + layer_size[1])
+    if left >= right or top >= bottom:
+        return None
+    return (left, top, right, bottom), (left - x, top - y, right - x, bottom - y)
+
+
+def premultiply(layer, opacity=1.0):
+    """
+    将RGBA水印图层转换为预乘alpha的定点数组，同时应用整体不透明度
+
+    Args:
+        layer: RGBA模式的PIL图像或形状为 (h, w, 4) 的uint8数组
+        opacity: 整体不透明度 (0.0-1.0)
+
+    Returns:
+        (premultiplied, alpha)：形状为 (h, w, 3) 的uint16预乘颜色（值为 颜色*alpha，
+        范围 0..255*255）和形状为 (h, w) 的uint16 alpha (0..255)
+    """
+    pixels = np.asarray(layer)
+    alpha = pixels[..., 3].astype(np.uint16)
+    if opacity < 1.0:
+        opacity_q = int(round(max(0.0, opacity) * 255))
+        alpha *= opacity_q
+        alpha = _div255(alpha)
+    premultiplied = pixels[..., :3].astype(np.uint16)
+    premultiplied *= alpha[..., None]
+    return premultiplied, alpha
+
+
+def blend_into(dest, layer, position, opacity=1.0):
+    """
+    将RGBA水印图层直接合成到目标图片上（修改目标图片）
+
+    只取出目标图片中与水印相交的区域，在该区域的NumPy数组上完成
+    预乘alpha混合后写回。混合语义与 Image.paste(layer, position, layer)
+    一致：每个通道 out = src * a + dst * (1 - a)，其中 a 为乘以整体
+    不透明度后的水印alpha。
+
+    Args:
+        dest: 目标PIL图像，模式为 RGB、RGBA 或 L
+        layer: RGBA模式的水印图层
+        position: 水印左上角在目标图片上的位置 (x, y)
+        opacity: 整体不透明度 (0.0-1.0)
+
+    Returns:
+        目标图像
+    """
+    if dest.mode not in SUPPORTED_MODES:
+        raise ValueError(f"不支持的图片模式: {dest.mode}")
+    if layer.mode != "RGBA":
+        layer = layer.convert("RGBA")
+
+    boxes = intersect_box(dest.size, layer.size, position)
+    if boxes is None:
+        return dest
+    dest_box, layer_box = boxes
+    if layer_box != (0, 0) + layer.size:
+        layer = layer.crop(layer_box)
+
+    premultiplied, alpha = premultiply(layer, opacity)
+    inverse = 255 - alpha
+
+    region = np.asarray(dest.crop(dest_box)).astype(np.uint16)
+    if dest.mode == "L":
+        # 与PIL的RGB转L一致：L = (R*19595 + G*38470 + B*7471 + 0x8000) >> 16
+        luma = (premultiplied[..., 0].astype(np.uint32) * 19595 +
+                premultiplied[..., 1].astype(np.uint32) * 38470 +
+                premultiplied[..., 2].astype(np.uint32) * 7471 + 0x8000) >> 16
+        region *= inverse
+        region += luma.astype(np.uint16)
+    else:
+        region[..., :3] *= inverse[..., None]
+        region[..., :3] += premultiplied
+        if dest.mode == "RGBA":
+            # alpha通道同样按遮罩插值到水印alpha
+            region[..., 3] *= inverse
+            region[..., 3] += alpha * alpha
+
+    region = _div255(region).astype(np.uint8)
+    dest.paste(Image.fromarray(region, dest.mode), dest_box[:2])
+    return dest
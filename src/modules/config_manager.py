@@ -49,7 +49,11 @@ class ConfigManager:
                 "last_import_dir": "",
                 "auto_save_template": True,
                 "auto_load_last_template": True,
-                "last_template": ""
+                "last_template": "",
+                "thumbnail_cache_mb": 256,
+                "image_cache_mb": 256,
+                "validate_imports": True,
+                "use_catalog": True
             },
             "watermark": {
                 "text": {
@@ -76,6 +80,7 @@ class ConfigManager:
                 "resize_enabled": False,
                 "max_width": 1920,
                 "max_height": 1080,
+                "renditions": [],
                 "last_export_dir": ""
             }
         }
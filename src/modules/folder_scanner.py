@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文件夹扫描模块
+用 os.scandir 在线程池中并行扫描各个子文件夹，分批返回找到的图片，可选读取文件头验证格式
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+# 支持的图片扩展名
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
+
+# 默认扫描线程数：扫描主要等待文件系统（尤其是网络存储），线程数可以多于CPU核心数
+DEFAULT_SCAN_WORKERS = 8
+
+# 单个文件夹中每找到这么多张图片就先返回一批，文件很多的文件夹也能尽快显示结果
+SCAN_CHUNK_SIZE = 500
+
+
+def probe_image(file_path):
+    """
+    只读取文件头识别图片格式和尺寸，不解码像素
+
+    Args:
+        file_path: 图片路径
+
+    Returns:
+        (格式, (width, height))，无法识别时返回 None
+    """
+    try:
+        with Image.open(file_path) as image:
+            return image.format, image.size
+    except Exception:
+        return None
+
+
+class ScannedImage:
+    """
+    扫描得到的一张图片
+
+    未验证时只有路径；验证后还包含实际格式、尺寸以及文件的修改时间和大小
+    """
+
+    __slots__ = ("path", "format", "size", "mtime_ns", "file_size")
+
+    def __init__(self, path, format=None, size=None, mtime_ns=None, file_size=None):
+        self.path = path
+        self.format = format
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.file_size = file_size
+
+
+class FolderScanner:
+    """
+    文件夹扫描类
+
+    每个子文件夹是线程池中的一个任务，发现子文件夹时立即提交新任务，
+    找到的图片按批返回，调用方不必等整个目录树扫描完成。同一文件夹内的
+    顺序与 os.scandir 一致，文件夹之间的顺序取决于完成顺序。启用验证时在
+    扫描线程中读取文件头，扩展名与内容不符或已损坏的文件会被排除；提供
+    ImageCatalog 时按批查询目录，未变化的文件不再打开。计数器可在其他
+    线程中读取，用于显示进度。
+    """
+
+    def __init__(self, root, recursive=True, validate=False, extensions=IMAGE_EXTENSIONS,
+                 max_workers=DEFAULT_SCAN_WORKERS, catalog=None):
+        """
+        初始化文件夹扫描器
+
+        Args:
+            root: 要扫描的文件夹
+            recursive: 是否扫描子文件夹
+            validate: 是否读取文件头验证图片
+            extensions: 图片扩展名集合（小写，包含点）
+            max_workers: 扫描线程数
+            catalog: ImageCatalog 对象，验证时用于复用和保存文件头信息，None表示每次都读取文件头
+        """
+        self.root = root
+        self.recursive = recursive
+        self.validate = validate
+        self.extensions = extensions
+        self.max_workers = max_workers
+        self.catalog = catalog
+        self.scanned = 0  # 已检查的文件数
+        self.found = 0  # 找到的图片数
+        self.rejected = 0  # 验证失败的文件数
+        self.folders = 0  # 已扫描的文件夹数
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        取消扫描，正在扫描的文件夹会尽快结束
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """
+        是否已取消
+        """
+        return self._cancelled.is_set()
+
+    def scan(self):
+        """
+        扫描文件夹（生成器）
+
+        Yields:
+            ScannedImage 列表，每批最多 SCAN_CHUNK_SIZE 张
+        """
+        results = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        active = 1  # 尚未结束的文件夹任务数，每个任务结束时放入一个 None
+        try:
+            executor.submit(self._scan_dir, self.root, executor, results)
+            while active:
+                images = results.get()
+                if images is None:
+                    active -= 1
+                elif isinstance(images, int):
+                    active += images
+                elif not self.cancelled:
+                    yield images
+        finally:
+            if active:
+                # 调用方提前结束了迭代，停止剩余的扫描任务
+                self.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _scan_dir(self, folder, executor, results):
+        """
+        扫描单个文件夹（在线程池中执行），子文件夹作为新任务提交
+
+        Args:
+            folder: 文件夹路径
+            executor: 线程池
+            results: 结果队列，放入图片批次、新提交的任务数，结束时放入 None
+        """
+        candidates = []  # 扩展名匹配、尚未验证的文件
+        scanned = 0
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if self.cancelled:
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                # 先登记任务数再提交，保证计数不会提前归零
+                                results.put(1)
+                                executor.submit(self._scan_dir, entry.path, executor, results)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    scanned += 1
+                    if os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                        continue
+                    candidates.append(entry.path)
+                    if len(candidates) >= SCAN_CHUNK_SIZE:
+                        self._report(results, candidates, scanned)
+                        candidates, scanned = [], 0
+        except OSError as e:
+            print(f"扫描文件夹失败: {e}")
+        except RuntimeError:
+            # 取消后线程池已关闭，无法再提交子文件夹
+            pass
+        finally:
+            self._report(results, candidates, scanned, folder_done=True)
+            results.put(None)
+
+    def _check(self, paths):
+        """
+        为一批扩展名匹配的文件创建记录，启用验证时读取文件头（或查询图片目录）
+
+        Returns:
+            (ScannedImage 列表, 验证失败的文件数)
+        """
+        if not self.validate or self.cancelled:
+            return [ScannedImage(path) for path in paths], 0
+        images = []
+        if self.catalog is not None:
+            found = self.catalog.get_many(paths)
+            for path in paths:
+                metadata = found.get(path)
+                if metadata is not None and metadata.valid:
+                    images.append(ScannedImage(path, metadata.format, metadata.size,
+                                               metadata.mtime_ns, metadata.file_size))
+                else:
+                    print(f"跳过无法识别的图片: {path}")
+            return images, len(paths) - len(images)
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            probe = probe_image(path)
+            if probe is None:
+                print(f"跳过无法识别的图片: {path}")
+                continue
+            images.append(ScannedImage(path, probe[0], probe[1], stat.st_mtime_ns, stat.st_size))
+        return images, len(paths) - len(images)
+
+    def _report(self, results, candidates, scanned, folder_done=False):
+        """
+        验证一批文件，更新计数并放入结果
+        """
+        images, rejected = self._check(candidates) if candidates else ([], 0)
+        with self._lock:
+            self.scanned += scanned
+            self.found += len(images)
+            self.rejected += rejected
+            if folder_done:
+                self.folders += 1
+        if images:
+            results.put(images)
+
+    def stats(self):
+        """
+        获取扫描统计信息
+        """
+        with self._lock:
+            return {
+                "folders": self.folders,
+                "scanned": self.scanned,
+                "found": self.found,
+                "rejected": self.rejected
+            }
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+字体索引模块
+扫描一次系统字体目录并持久化索引，提供字体文件查找和字体对象缓存
+"""
+
+import json
+import os
+import platform
+import tempfile
+import threading
+from pathlib import Path
+
+from PIL import ImageFont
+
+from .cache import LRUCache
+
+# 索引文件格式版本，格式变化时递增以使旧索引失效
+INDEX_VERSION = 2
+
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf')
+
+# 中文字体名称映射
+CHINESE_FONT_MAPPING = {
+    "楷体": ["simkai.ttf", "kaiu.ttf", "kai.ttf"],
+    "宋体": ["simsun.ttc", "simsun.ttf"],
+    "黑体": ["simhei.ttf", "msyh.ttc"],
+    "微软雅黑": ["msyh.ttc", "msyh.ttf"],
+    "仿宋": ["simfang.ttf"],
+    "隶书": ["simli.ttf"],
+    "幼圆": ["simyou.ttf"],
+    "华文宋体": ["stsong.ttf"],
+    "华文黑体": ["stheit.ttf"],
+    "华文楷体": ["stkaiti.ttf"]
+}
+
+# 中文字体在文件名中的常见别名
+CHINESE_FONT_ALIASES = {
+    "楷体": ("kai", "楷"),
+    "宋体": ("song", "宋", "sun"),
+    "黑体": ("hei", "黑"),
+    "微软雅黑": ("yahei", "雅黑")
+}
+
+
+def get_system_font_dirs():
+    """
+    获取当前系统的字体目录
+
+    Returns:
+        字体目录路径列表
+    """
+    system = platform.system()
+    if system == "Windows":
+        return [
+            os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+            os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft', 'Windows', 'Fonts')
+        ]
+    elif system == "Darwin":  # macOS
+        return [
+            '/Library/Fonts',
+            '/System/Library/Fonts',
+            os.path.expanduser('~/Library/Fonts')
+        ]
+    else:  # Linux
+        return [
+            '/usr/share/fonts',
+            '/usr/local/share/fonts',
+            os.path.expanduser('~/.fonts')
+        ]
+
+
+def _style_key(bold, italic):
+    """
+    将粗体/斜体组合转换为样式键
+    """
+    if bold and italic:
+        return "bolditalic"
+    if bold:
+        return "bold"
+    if italic:
+        return "italic"
+    return "regular"
+
+
+def _parse_style(style_name):
+    """
+    根据字体自带的样式名称判断样式键
+    """
+    style_lower = (style_name or "").lower()
+    bold = any(word in style_lower for word in ("bold", "black", "heavy"))
+    italic = any(word in style_lower for word in ("italic", "oblique"))
+    return _style_key(bold, italic)
+
+
+class FontIndex:
+    """
+    字体索引类
+
+    首次使用时扫描字体目录，把字体族/样式到文件路径的映射写入
+    ~/.photot_watermark/font_index.json。之后只比较各目录的修改时间，
+    目录未变化时直接使用索引文件，查找结果在内存中按参数缓存。
+
+    不同目录中有同名字体文件（或同一字体族和样式的多个文件）时，font_dirs 中
+    靠前的目录优先；同一目录树内先取较浅的目录，同一层按名称排序。
+    """
+
+    def __init__(self, cache_file=None, font_dirs=None, max_loaded_fonts=64, verbose=True):
+        """
+        初始化字体索引
+
+        Args:
+            cache_file: 索引文件路径，默认位于配置目录下
+            font_dirs: 要扫描的字体目录，默认使用系统字体目录
+            max_loaded_fonts: 缓存的已加载字体对象数量上限
+            verbose: 重建索引时是否输出信息
+        """
+        self.verbose = verbose
+        if cache_file is None:
+            cache_file = Path.home() / ".photot_watermark" / "font_index.json"
+        self.cache_file = Path(cache_file)
+        self.font_dirs = font_dirs if font_dirs is not None else get_system_font_dirs()
+        self.files = {}        # 小写文件名 -> 路径
+        self.families = {}     # 小写字体族名 -> {样式键: 路径}
+        self._lookups = {}     # (字体名, 粗体, 斜体) -> 路径列表
+        self._loaded = False
+        self._lock = threading.RLock()
+        # 已加载的字体对象，打开大型 .ttc 文件代价较高
+        self._font_cache = LRUCache(max_bytes=None, max_items=max_loaded_fonts, size_func=None)
+
+    def find_font_files(self, font_family, bold=False, italic=False):
+        """
+        查找字体文件
+
+        Args:
+            font_family: 字体名称
+            bold: 是否粗体
+            italic: 是否斜体
+
+        Returns:
+            字体文件路径列表，优先匹配的排在前面
+        """
+        key = (font_family, bool(bold), bool(italic))
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._lookups:
+                self._lookups[key] = self._match(font_family, bold, italic)
+            return list(self._lookups[key])
+
+    def load_font(self, font, font_size):
+        """
+        加载字体对象，按 (路径, 大小) 缓存
+
+        Args:
+            font: 字体文件路径或字体文件名
+            font_size: 字体大小
+
+        Returns:
+            PIL字体对象
+
+        Raises:
+            OSError: 字体无法加载时抛出（失败结果同样会被缓存）
+        """
+        key = (font, font_size)
+        cached = self._font_cache.get(key)
+        if cached is None:
+            try:
+                cached = ImageFont.truetype(font, font_size)
+            except OSError as e:
+                cached = e
+            self._font_cache.put(key, cached, size=0)
+        if isinstance(cached, Exception):
+            raise OSError(f"无法加载字体 {font}: {cached}")
+        return cached
+
+    def rebuild(self):
+        """
+        重新扫描字体目录并写入索引文件
+        """
+        with self._lock:
+            self._scan()
+            self._save()
+            self._lookups.clear()
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        """
+        确保索引可用：优先读取索引文件，目录变化时重新扫描（调用方需持有锁）
+        """
+        if self._loaded:
+            return
+        if not self._load():
+            self._scan()
+            self._save()
+        self._loaded = True
+
+    def _dir_mtimes(self):
+        """
+        获取字体目录及其所有子目录的修改时间
+        """
+        mtimes = {}
+        for font_dir in self.font_dirs:
+            if not font_dir or not os.path.isdir(font_dir):
+                continue
+            for root, dirs, _ in os.walk(font_dir):
+                try:
+                    mtimes[root] = os.stat(root).st_mtime
+                except OSError:
+                    continue
+        return mtimes
+
+    def _load(self):
+        """
+        读取索引文件，目录修改时间不一致时视为失效
+
+        Returns:
+            是否成功加载
+        """
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return False
+            if data.get("font_dirs") != list(self.font_dirs):
+                return False
+            if data.get("dir_mtimes") != self._dir_mtimes():
+                return False
+            self.files = data.get("files", {})
+            self.families = data.get("families", {})
+            return True
+        except Exception:
+            return False
+
+    def _scan(self):
+        """
+        扫描字体目录，读取每个字体文件的字体族和样式名称
+
+        按优先级顺序遍历，每个文件名和每个字体族样式只保留最先找到的文件
+        """
+        files = {}
+        families = {}
+        for font_dir in self.font_dirs:
+            if not font_dir or not os.path.isdir(font_dir):
+                continue
+            for root, dirs, names in os.walk(font_dir):
+                # os.walk 的顺序取决于文件系统，排序后结果确定
+                dirs.sort()
+                for name in sorted(names):
+                    if not name.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(root, name)
+                    files.setdefault(name.lower(), path)
+                    try:
+                        family, style = ImageFont.truetype(path, 12).getname()
+                    except Exception:
+                        continue
+                    if family:
+                        styles = families.setdefault(family.lower(), {})
+                        styles.setdefault(_parse_style(style), path)
+        self.files = files
+        self.families = families
+        if self.verbose:
+            print(f"字体索引已重建: {len(files)} 个字体文件, {len(families)} 个字体族")
+
+    def _save(self):
+        """
+        写入索引文件
+        """
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            data = {
+                "version": INDEX_VERSION,
+                "font_dirs": list(self.font_dirs),
+                "dir_mtimes": self._dir_mtimes(),
+                "files": self.files,
+                "families": self.families
+            }
+            # 多个导出进程可能同时重建索引，各自写入独立的临时文件后再替换
+            fd, tmp_file = tempfile.mkstemp(dir=self.cache_file.parent, prefix=self.cache_file.name,
+                                            suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_file, self.cache_file)
+            except Exception:
+                os.remove(tmp_file)
+                raise
+        except Exception as e:
+            print(f"保存字体索引失败: {e}")
+
+    def _match(self, font_family, bold, italic):
+        """
+        在索引中匹配字体文件（调用方需持有锁）
+        """
+        font_files = []
+
+        # 首先检查中文字体映射
+        for font_name in CHINESE_FONT_MAPPING.get(font_family, []):
+            path = self.files.get(font_name.lower())
+            if path and path not in font_files:
+                font_files.append(path)
+        if font_files:
+            return font_files
+
+        # 其次按字体自带的字体族名称匹配
+        styles = self.families.get(font_family.lower())
+        if styles:
+            wanted = _style_key(bold, italic)
+            for key in (wanted, "regular", "bold", "italic", "bolditalic"):
+                path = styles.get(key)
+                if path and path not in font_files:
+                    font_files.append(path)
+            return font_files
+
+        # 最后按文件名匹配
+        family_lower = font_family.lower()
+        aliases = CHINESE_FONT_ALIASES.get(font_family, ())
+        for file_lower, path in self.files.items():
+            if family_lower in file_lower:
+                # 检查样式匹配
+                if bold and ("bold" in file_lower or "粗体" in file_lower or "黑" in file_lower):
+                    font_files.insert(0, path)  # 粗体优先
+                elif italic and ("italic" in file_lower or "斜体" in file_lower):
+                    font_files.insert(0, path)  # 斜体优先
+                else:
+                    font_files.append(path)
+            elif any(alias in file_lower for alias in aliases):
+                font_files.append(path)
+        return font_files
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_font_index(verbose=True):
+    """
+    获取进程内共享的字体索引实例
+
+    Args:
+        verbose: 首次创建实例时使用，见 FontIndex
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = FontIndex(verbose=verbose)
+        return _default_index
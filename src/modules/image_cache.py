@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会话图片缓存模块
+在内存中缓存按预览尺寸解码的代理图，切换图片和拖拽水印时不再重复读取文件
+"""
+
+import os
+import threading
+
+from PIL import Image
+
+from .cache import LRUCache
+
+# 默认的内存预算
+DEFAULT_IMAGE_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ImageCache:
+    """
+    会话图片缓存类
+
+    缓存键包含文件的绝对路径、修改时间和大小，文件变化后旧条目不再命中，
+    随后按LRU顺序被淘汰。同时记录每个文件的原图尺寸，查询尺寸时不需要解码。
+    所有操作都是线程安全的，多个线程同时请求同一张未缓存的图片时只解码一次。缓存的图像是共享的，
+    调用方不应修改。
+    """
+
+    def __init__(self, image_processor, max_bytes=DEFAULT_IMAGE_CACHE_BYTES, catalog=None):
+        """
+        初始化图片缓存
+
+        Args:
+            image_processor: ImageProcessor 对象，用于按尺寸解码
+            max_bytes: 内存预算（字节）
+            catalog: ImageCatalog 对象，查询尺寸时优先使用其中记录的尺寸
+        """
+        self.image_processor = image_processor
+        self.catalog = catalog
+        self._images = LRUCache(max_bytes=max_bytes)
+        # 原图尺寸只占很少内存，按文件标识单独保存，只限制条目数
+        self._sizes = LRUCache(max_bytes=None, max_items=100000, size_func=None)
+        self._loading = {}  # 正在解码的缓存键 -> threading.Event
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _identity(image_path):
+        """
+        文件标识：(绝对路径, 修改时间, 文件大小)
+        """
+        stat = os.stat(image_path)
+        return (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+
+    def get_size(self, image_path):
+        """
+        获取原图尺寸，未记录时只读取文件头
+
+        Args:
+            image_path: 图片路径
+
+        Returns:
+            (width, height)
+        """
+        return self._get_size(image_path, self._identity(image_path))
+
+    def remember_size(self, image_path, size, mtime_ns, file_size):
+        """
+        记录已知的原图尺寸（如导入时读取文件头得到的尺寸），之后查询尺寸时不必再打开文件
+
+        Args:
+            image_path: 图片路径
+            size: 原图尺寸 (width, height)
+            mtime_ns: 读取尺寸时文件的修改时间（纳秒）
+            file_size: 读取尺寸时文件的大小
+        """
+        self._sizes.put((os.path.abspath(image_path), mtime_ns, file_size), size)
+
+    def get_proxy(self, image_path, max_size):
+        """
+        获取按目标尺寸解码的代理图
+
+        Args:
+            image_path: 图片路径
+            max_size: 代理图最大尺寸 (width, height)
+
+        Returns:
+            (代理图, 原图尺寸)
+        """
+        identity = self._identity(image_path)
+        proxy = self._get_or_load(("proxy", tuple(max_size)) + identity,
+                                  lambda: self.image_processor.load_image_at_size(image_path, max_size))
+        return proxy, self._get_size(image_path, identity)
+
+    def _get_or_load(self, key, load):
+        """
+        读取缓存条目，未命中时解码；其他线程正在解码同一条目时等待其结果
+
+        Args:
+            key: 缓存键
+            load: 解码函数
+
+        Returns:
+            缓存的图像
+        """
+        while True:
+            image = self._images.get(key)
+            if image is not None:
+                return image
+            with self._lock:
+                event = self._loading.get(key)
+                if event is None:
+                    # 查询之后其他线程可能刚好完成解码
+                    if key in self._images:
+                        continue
+                    event = self._loading[key] = threading.Event()
+                    break
+            # 等待其他线程解码完成后重新查询，对方失败时由本线程解码
+            event.wait()
+        try:
+            image = load()
+            self._images.put(key, image)
+            return image
+        finally:
+            with self._lock:
+                del self._loading[key]
+            event.set()
+
+    def _get_size(self, image_path, identity):
+        """
+        按文件标识查询原图尺寸，未记录时查询图片目录或读取文件头
+        """
+        size = self._sizes.get(identity)
+        if size is None:
+            metadata = self.catalog.get(image_path) if self.catalog is not None else None
+            if metadata is not None and metadata.valid:
+                size = metadata.size
+            else:
+                with Image.open(image_path) as source:
+                    size = source.size
+            self._sizes.put(identity, size)
+        return size
+
+    def has_proxy(self, image_path, max_size):
+        """
+        代理图是否已缓存（不计入命中统计）
+        """
+        try:
+            identity = self._identity(image_path)
+        except OSError:
+            return False
+        return ("proxy", tuple(max_size)) + identity in self._images
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        self._images.clear()
+        self._sizes.clear()
+
+    def stats(self):
+        """
+        获取缓存统计信息
+        """
+        return self._images.stats()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片列表模型模块
+为导入的图片提供 QAbstractListModel，只为视图实际绘制的行生成缩略图，支持十万张级别的列表
+"""
+
+import os
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QIcon, QPixmap
+
+from .cache import LRUCache
+
+# 内存中保留的缩略图图标数量，超出后淘汰最久未显示的图标（需要时从磁盘缓存重新读取）
+DEFAULT_ICON_CACHE_ITEMS = 2000
+
+# 缩略图状态
+THUMBNAIL_NONE = 0  # 尚未请求
+THUMBNAIL_PENDING = 1  # 已提交给缩略图加载器
+THUMBNAIL_READY = 2  # 已生成
+THUMBNAIL_FAILED = 3  # 生成失败，不再重试
+
+
+class ImageRecord:
+    """
+    图片列表中的一条记录
+    """
+
+    __slots__ = ("path", "thumbnail_state")
+
+    def __init__(self, path):
+        self.path = path
+        self.thumbnail_state = THUMBNAIL_NONE
+
+
+class ImageListModel(QAbstractListModel):
+    """
+    图片列表模型类
+
+    记录按导入顺序保存，另有 路径 -> 行号 的字典用于O(1)去重和查找。
+    视图只对可见行调用 data()，缩略图在首次被请求显示时才提交给
+    ThumbnailLoader，生成后通过 set_thumbnails 填充。图标保存在有条目上限的
+    LRU缓存中，列表再长内存占用也保持不变。
+    """
+
+    def __init__(self, thumbnail_loader, placeholder_icon, icon_cache_items=DEFAULT_ICON_CACHE_ITEMS,
+                 parent=None):
+        """
+        初始化图片列表模型
+
+        Args:
+            thumbnail_loader: ThumbnailLoader 对象
+            placeholder_icon: 缩略图生成前显示的图标
+            icon_cache_items: 内存中保留的图标数量
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.thumbnail_loader = thumbnail_loader
+        self.placeholder_icon = placeholder_icon
+        self._records = []
+        self._rows = {}  # 图片路径 -> 行号
+        self._icons = LRUCache(max_bytes=None, max_items=icon_cache_items, size_func=None)
+
+    def rowCount(self, parent=QModelIndex()):
+        """
+        行数（列表模型没有子项）
+        """
+        return 0 if parent.isValid() else len(self._records)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        返回指定行的显示数据，缩略图在首次需要时才请求生成
+        """
+        if not index.isValid() or index.row() >= len(self._records):
+            return None
+        record = self._records[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(record.path)
+        if role == Qt.ToolTipRole:
+            return record.path
+        if role == Qt.DecorationRole:
+            return self._icon_for(record)
+        return None
+
+    def _icon_for(self, record):
+        """
+        获取记录的缩略图图标，尚未生成（或已被淘汰）时提交生成请求并返回占位图标
+        """
+        if record.thumbnail_state == THUMBNAIL_READY:
+            icon = self._icons.get(record.path)
+            if icon is not None:
+                return icon
+            record.thumbnail_state = THUMBNAIL_NONE
+        if record.thumbnail_state == THUMBNAIL_NONE:
+            record.thumbnail_state = THUMBNAIL_PENDING
+            self.thumbnail_loader.request([record.path])
+        return self.placeholder_icon
+
+    def add_paths(self, paths):
+        """
+        追加图片，已存在的路径（包括同一批中重复的路径）会被忽略
+
+        Args:
+            paths: 图片路径列表
+
+        Returns:
+            实际添加的图片路径列表
+        """
+        new_paths = []
+        seen = set()
+        for path in paths:
+            if path not in self._rows and path not in seen:
+                seen.add(path)
+                new_paths.append(path)
+        if not new_paths:
+            return new_paths
+
+        first = len(self._records)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_paths) - 1)
+        for row, path in enumerate(new_paths, first):
+            self._records.append(ImageRecord(path))
+            self._rows[path] = row
+        self.endInsertRows()
+        return new_paths
+
+    def remove_row(self, row):
+        """
+        删除一行
+
+        Args:
+            row: 行号
+
+        Returns:
+            被删除的图片路径
+        """
+        self.beginRemoveRows(QModelIndex(), row, row)
+        record = self._records.pop(row)
+        del self._rows[record.path]
+        # 后面各行的行号减一
+        for following in range(row, len(self._records)):
+            self._rows[self._records[following].path] = following
+        self._icons.discard(record.path)
+        self.endRemoveRows()
+        return record.path
+
+    def clear(self):
+        """
+        清空列表
+        """
+        self.beginResetModel()
+        self._records = []
+        self._rows = {}
+        self._icons.clear()
+        self.endResetModel()
+
+    def set_thumbnails(self, thumbnails):
+        """
+        填充后台生成的缩略图
+
+        Args:
+            thumbnails: [(图片路径, QImage或None)]，None表示生成失败
+        """
+        for path, qimage in thumbnails:
+            row = self._rows.get(path)
+            if row is None:
+                continue
+            record = self._records[row]
+            if qimage is None:
+                record.thumbnail_state = THUMBNAIL_FAILED
+                continue
+            self._icons.put(path, QIcon(QPixmap.fromImage(qimage)))
+            record.thumbnail_state = THUMBNAIL_READY
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def path(self, row):
+        """
+        获取指定行的图片路径
+        """
+        return self._records[row].path
+
+    def row_of(self, path):
+        """
+        获取图片路径所在的行号，不存在时返回 -1
+        """
+        return self._rows.get(path, -1)
+
+    def paths(self, first=0, last=None):
+        """
+        获取图片路径列表
+
+        Args:
+            first: 起始行
+            last: 结束行（包含），None表示最后一行
+
+        Returns:
+            图片路径列表
+        """
+        stop = len(self._records) if last is None else last + 1
+        return [record.path for record in self._records[first:stop]]
+
+    def __contains__(self, path):
+        return path in self._rows
+
+    def __len__(self):
+        return len(self._records)
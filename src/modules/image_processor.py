@@ -7,18 +7,78 @@
 """
 
 from PIL import Image, ImageDraw, ImageFont
+import numpy as np
 import os
 
+from .cache import LRUCache
+from .compositor import blend_into
+from .font_index import get_font_index
+from .prepared_watermark import PreparedWatermark, prepare_watermark_layer
+
+# 文本水印图层缓存的默认内存预算
+DEFAULT_LAYER_CACHE_BYTES = 128 * 1024 * 1024
+
+# 合成斜体的剪切因子
+ITALIC_SHEAR_FACTOR = 0.2
+
+# 可以直接在原模式下合成水印的图片模式
+NATIVE_COMPOSITE_MODES = ("RGB", "RGBA", "L")
+
+# 文本效果参数
+OUTLINE_RADIUS = 3  # 描边半径
+OUTLINE_COLOR = (0, 0, 0, 255)  # 纯黑色描边，完全不透明
+SHADOW_OFFSET = 5  # 阴影偏移量
+SHADOW_COLOR = (0, 0, 0, 200)  # 较深的黑色阴影
+BOLD_OFFSETS = [(-2, 0), (-1, 0), (1, 0), (0, -2), (0, -1), (0, 1)]  # 粗体平移量
+TEXT_PADDING = 2  # 墨迹四周保留的抗锯齿边距
+
+# 预设位置距图片边缘的距离
+POSITION_MARGIN = 20
+
+# 预览和缩略图解码时，快速缩小（draft/reduce）后至少保留目标尺寸的倍数
+PREVIEW_REDUCING_GAP = 2.0
+THUMBNAIL_REDUCING_GAP = 1.0
+# 导出缩小时JPEG按不小于输出尺寸的比例draft解码（DCT缩放质量很高，与完整解码后缩放的PSNR在50dB以上），
+# reduce()仍保留2倍余量
+EXPORT_DRAFT_GAP = 1.0
+EXPORT_REDUCING_GAP = 2.0
+
 class ImageProcessor:
     """
     图像处理器类
     """
     
-    def __init__(self):
+    def __init__(self, layer_cache_bytes=DEFAULT_LAYER_CACHE_BYTES, verbose=True):
         """
         初始化图像处理器
+        
+        Args:
+            layer_cache_bytes: 水印图层缓存的内存预算（字节）
+            verbose: 是否输出处理过程中的调试信息
+        """
+        self.verbose = verbose
+        # 缓存渲染完成的RGBA水印图层，批量导出时同尺寸图片可直接复用
+        self.layer_cache = LRUCache(max_bytes=layer_cache_bytes)
+        # 字体索引和已加载字体对象在进程内共享
+        self.font_index = get_font_index(verbose=verbose)
+        # 文本测量结果缓存
+        self.metrics_cache = LRUCache(max_bytes=None, max_items=4096, size_func=None)
+    
+    def log(self, message):
+        """
+        输出调试信息，verbose 为 False 时不输出
+        """
+        if self.verbose:
+            print(message)
+    
+    def get_layer_cache_stats(self):
+        """
+        获取水印图层缓存的统计信息
+        
+        Returns:
+            包含命中、未命中次数等信息的字典
         """
-        pass
+        return self.layer_cache.stats()
     
     def load_image(self, file_path):
         """
@@ -31,6 +91,88 @@ class ImageProcessor:
         except Exception as e:
             raise Exception(f"无法加载图片 {file_path}: {str(e)}")
     
+    def load_image_at_size(self, file_path, max_size, reducing_gap=PREVIEW_REDUCING_GAP):
+        """
+        按目标尺寸解码图片，用于预览和缩略图
+        
+        JPEG使用draft模式在DCT阶段直接按1/2、1/4或1/8解码，其他格式先用
+        reduce()按整数倍缩小，最后再用LANCZOS缩放到目标尺寸。
+        
+        Args:
+            file_path: 图片路径
+            max_size: 最大尺寸 (width, height)，保持宽高比，不放大
+            reducing_gap: 快速缩小后至少保留目标尺寸的倍数，越大质量越好、速度越慢
+        
+        Returns:
+            缩放后的PIL图像（已加载，文件已关闭）
+        """
+        try:
+            with Image.open(file_path) as image:
+                return self.decode_to_size(image, self._fit_size(image.size, max_size), reducing_gap)
+        except Exception as e:
+            raise Exception(f"无法加载图片 {file_path}: {str(e)}")
+    
+    def decode_to_size(self, image, target, reducing_gap=PREVIEW_REDUCING_GAP, draft_gap=None):
+        """
+        将刚打开（尚未加载像素）的图片解码并缩小到指定尺寸
+        
+        Args:
+            image: Image.open 返回的图像对象
+            target: 目标尺寸 (width, height)，不大于原图尺寸
+            reducing_gap: 快速缩小后至少保留目标尺寸的倍数
+            draft_gap: JPEG draft解码时保留的倍数，None表示与 reducing_gap 相同
+        
+        Returns:
+            缩放后的PIL图像（已加载）
+        """
+        if target == image.size:
+            image.load()
+            return image.copy()
+        
+        gap_size = (int(target[0] * reducing_gap), int(target[1] * reducing_gap))
+        if image.format == "JPEG":
+            if draft_gap is None:
+                draft_gap = reducing_gap
+            # draft保证解码尺寸不小于请求的尺寸
+            image.draft(None, (int(target[0] * draft_gap), int(target[1] * draft_gap)))
+        image.load()
+        
+        reduced = image
+        # 调色板和二值图像只能用最近邻缩放，先转换模式以保证缩放质量
+        if image.mode == "P":
+            reduced = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        elif image.mode == "1":
+            reduced = image.convert("L")
+        factor = min(image.width // max(1, gap_size[0]), image.height // max(1, gap_size[1]))
+        if factor >= 2:
+            reduced = reduced.reduce(factor)
+        return reduced.resize(target, Image.Resampling.LANCZOS)
+    
+    def _fit_size(self, size, max_size):
+        """
+        计算等比缩小到最大尺寸以内的尺寸（不放大）
+        """
+        width, height = size
+        ratio = min(max_size[0] / width, max_size[1] / height, 1.0)
+        return (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    
+    def create_thumbnail(self, file_path, size=(64, 64)):
+        """
+        生成缩略图
+        
+        Args:
+            file_path: 图片路径
+            size: 缩略图最大尺寸 (width, height)
+        
+        Returns:
+            RGB或RGBA模式的缩略图
+        """
+        image = self.load_image_at_size(file_path, size, reducing_gap=THUMBNAIL_REDUCING_GAP)
+        if image.mode in ("RGB", "RGBA"):
+            return image
+        has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+        return image.convert("RGBA" if has_alpha else "RGB")
+    
     def save_image(self, image, file_path, quality=95, file_format=None):
         """
         保存图片
@@ -81,271 +223,342 @@ class ImageProcessor:
                 - outline: 描边效果
                 - shadow: 阴影效果
                 - custom_position: 自定义位置 (x, y) 元组
+                - use_layer_cache: 是否复用缓存的水印图层，默认True
+                - composite: 合成方式，见 _composite_watermark
+                - composite_kernel: 混合内核，'pillow' 或 'numpy'
+                - render_scale: 渲染比例，在按比例缩小的代理图上预览时传入
+                  代理图与原图的尺寸比，字号、效果像素、边距和自定义位置按比例换算
+                - return_bbox: 为True时同时返回水印在图片上的边界框
         
         Returns:
-            添加水印后的图像
+            添加水印后的图像；return_bbox为True时返回 (图像, (left, top, right, bottom))
         """
         try:
-            print(f"开始添加文本水印: {text}")
-            print(f"位置参数: {position}")
-            print(f"其他参数: {kwargs}")
-            
-            # 获取参数
-            font_path = kwargs.get('font_path', None)
-            font_family = kwargs.get('font_family', None)
-            base_font_size = kwargs.get('font_size', 48)  # 基础字体大小
-            bold = kwargs.get('bold', False)
-            italic = kwargs.get('italic', False)
-            color = kwargs.get('color', (255, 255, 255, 200))  # 默认改为白色半透明，提高可见性
-            opacity = kwargs.get('opacity', 80)  # 默认透明度改为80，确保在各种背景上都可见
-            rotation = kwargs.get('rotation', 0)
-            outline = kwargs.get('outline', False)
-            shadow = kwargs.get('shadow', False)
-            
-            # 根据图片尺寸和用户设置的相对大小(0-100)计算实际字体大小
-            img_width, img_height = image.size
-            # 用户设置的base_font_size是0-100的相对值
-            # 计算基础字体大小范围：最小为图片宽度的1/50，最大为图片宽度的1/10
-            min_font_size = int(min(img_width, img_height) / 50)
-            max_font_size = int(min(img_width, img_height) / 10)
-            
-            # 将0-100的相对值映射到实际字体大小范围
-            if base_font_size <= 0:
-                font_size = min_font_size
-            elif base_font_size >= 100:
-                font_size = max_font_size
-            else:
-                # 线性插值计算实际字体大小
-                font_size = int(min_font_size + (max_font_size - min_font_size) * base_font_size / 100)
-            
-            print(f"实际字体大小: {font_size} (相对大小: {base_font_size}, 图片尺寸: {img_width}x{img_height})")
-            
-            print(f"处理前颜色: {color}, 透明度: {opacity}")
-            
-            # 直接使用用户选择的颜色值，仅调整透明度
-            # 透明度逻辑：opacity值越大越透明（即不透明度越小）
-            if len(color) == 3:
-                r, g, b = color
-                # 透明度逻辑：opacity值越大越透明，所以alpha值应该越小
-                a = int(255 * (100 - opacity) / 100)  # 100-opacity转换为不透明度
-                color = (r, g, b, a)  # 保持RGB顺序
-            elif len(color) == 4:
-                r, g, b, original_a = color
-                # 透明度逻辑：opacity值越大越透明，所以alpha值应该越小
-                a = int(original_a * (100 - opacity) / 100)
-                color = (r, g, b, a)  # 保持RGBA顺序
-            
-            print(f"处理后颜色: {color}")
-            
-            # 加载字体，确保使用指定的字体大小，并支持中文字体
-            try:
-                if font_path and os.path.exists(font_path):
-                    font = ImageFont.truetype(font_path, font_size)
-                    print(f"使用字体文件: {font_path}, 字体大小: {font_size}")
-                elif font_family:
-                    # 首先尝试使用字体文件查找，考虑粗体和斜体
-                    font_files = self._find_font_file(font_family, bold, italic)
-                    if font_files:
-                        font = ImageFont.truetype(font_files[0], font_size)
-                        print(f"使用字体文件: {font_files[0]}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
-                    else:
-                        # 如果找不到字体文件，尝试直接使用字体名称
-                        try:
-                            font = ImageFont.truetype(font_family, font_size)
-                            print(f"使用系统字体: {font_family}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
-                        except:
-                            # 最后尝试使用常见的中文字体
-                            chinese_fonts = [
-                                "msyh.ttc",      # 微软雅黑
-                                "simhei.ttf",    # 黑体
-                                "simsun.ttc",    # 宋体
-                                "simkai.ttf",    # 楷体
-                                "arial.ttf",     # Arial
-                                "arialuni.ttf"   # Arial Unicode
-                            ]
-                            
-                            font = None
-                            for font_name in chinese_fonts:
-                                try:
-                                    font = ImageFont.truetype(font_name, font_size)
-                                    print(f"使用中文字体: {font_name}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
-                                    break
-                                except:
-                                    continue
-                            
-                            # 如果没有找到合适的中文字体，使用默认字体
-                            if font is None:
-                                font = ImageFont.load_default()
-                                print(f"未找到合适的字体，使用默认字体，字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
+            self.log(f"开始添加文本水印: {text}")
+            self.log(f"位置参数: {position}")
+            self.log(f"其他参数: {kwargs}")
+            
+            watermark_image, (x, y) = self.render_text_watermark(image.size, text, position, **kwargs)
+            self.log(f"背景图像大小: {image.size}")
+            
+            # 合成水印，默认只在水印所在区域内按原图模式混合
+            composite = kwargs.get('composite', 'roi')
+            composite_kernel = kwargs.get('composite_kernel', 'pillow')
+            result = self._composite_watermark(image, watermark_image, (x, y), composite,
+                                               kernel=composite_kernel)
+            self.log("文本水印添加完成")
+            
+            if kwargs.get('return_bbox', False):
+                return result, (x, y, x + watermark_image.width, y + watermark_image.height)
+            return result
+        except Exception as e:
+            self.log(f"添加文本水印失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            raise Exception(f"添加文本水印失败: {str(e)}")
+    
+    def render_text_watermark(self, image_size, text, position, **kwargs):
+        """
+        生成文本水印图层并计算其位置，不修改图片
+        
+        Args:
+            image_size: 背景图片尺寸 (width, height)
+            text: 水印文本
+            position: 水印位置 (x, y) 或 预设位置字符串
+            kwargs: 与 add_text_watermark 相同
+        
+        Returns:
+            (RGBA模式的水印图层, 左上角位置 (x, y))
+        """
+        # 获取参数
+        font_path = kwargs.get('font_path', None)
+        font_family = kwargs.get('font_family', None)
+        base_font_size = kwargs.get('font_size', 48)  # 基础字体大小
+        bold = kwargs.get('bold', False)
+        italic = kwargs.get('italic', False)
+        color = kwargs.get('color', (255, 255, 255, 200))  # 默认改为白色半透明，提高可见性
+        opacity = kwargs.get('opacity', 80)  # 默认透明度改为80，确保在各种背景上都可见
+        rotation = kwargs.get('rotation', 0)
+        outline = kwargs.get('outline', False)
+        shadow = kwargs.get('shadow', False)
+        render_scale = kwargs.get('render_scale', 1.0)
+        
+        # 根据图片尺寸和用户设置的相对大小(0-100)计算实际字体大小
+        img_width, img_height = image_size
+        # 代理图按原图尺寸计算字号，再按比例缩小
+        full_width, full_height = img_width / render_scale, img_height / render_scale
+        # 用户设置的base_font_size是0-100的相对值
+        # 计算基础字体大小范围：最小为图片宽度的1/50，最大为图片宽度的1/10
+        min_font_size = int(min(full_width, full_height) / 50)
+        max_font_size = int(min(full_width, full_height) / 10)
+        
+        # 将0-100的相对值映射到实际字体大小范围
+        if base_font_size <= 0:
+            font_size = min_font_size
+        elif base_font_size >= 100:
+            font_size = max_font_size
+        else:
+            # 线性插值计算实际字体大小
+            font_size = int(min_font_size + (max_font_size - min_font_size) * base_font_size / 100)
+        if render_scale != 1.0:
+            font_size = max(1, round(font_size * render_scale))
+        
+        self.log(f"实际字体大小: {font_size} (相对大小: {base_font_size}, 图片尺寸: {img_width}x{img_height})")
+        
+        self.log(f"处理前颜色: {color}, 透明度: {opacity}")
+        
+        # 直接使用用户选择的颜色值，仅调整透明度
+        # 透明度逻辑：opacity值越大越透明（即不透明度越小）
+        if len(color) == 3:
+            r, g, b = color
+            # 透明度逻辑：opacity值越大越透明，所以alpha值应该越小
+            a = int(255 * (100 - opacity) / 100)  # 100-opacity转换为不透明度
+            color = (r, g, b, a)  # 保持RGB顺序
+        elif len(color) == 4:
+            r, g, b, original_a = color
+            # 透明度逻辑：opacity值越大越透明，所以alpha值应该越小
+            a = int(original_a * (100 - opacity) / 100)
+            color = (r, g, b, a)  # 保持RGBA顺序
+        
+        self.log(f"处理后颜色: {color}")
+        
+        font = self._load_font(font_path, font_family, font_size, bold, italic)
+        
+        # 同一批次中相同尺寸的图片会生成完全相同的水印图层，优先从缓存中复用
+        use_layer_cache = kwargs.get('use_layer_cache', True)
+        effects = self._scaled_effects(render_scale)
+        cache_key = (text, self._font_cache_id(font), font_size, bold, italic,
+                     outline, shadow, tuple(color), opacity, rotation, effects)
+        watermark_image = self.layer_cache.get(cache_key) if use_layer_cache else None
+        if watermark_image is None:
+            watermark_image = self._render_text_layer(
+                text, font, font_size, color,
+                bold=bold, italic=italic, outline=outline, shadow=shadow, rotation=rotation,
+                effects=effects
+            )
+            if use_layer_cache:
+                self.layer_cache.put(cache_key, watermark_image)
+        else:
+            self.log(f"复用缓存的水印图层: {watermark_image.size}")
+        
+        # 解析位置
+        custom_position = kwargs.get('custom_position', None)
+        x, y = self._parse_position(position, image_size, watermark_image.size, custom_position,
+                                    render_scale)
+        self.log(f"水印最终位置: ({x}, {y})")
+        self.log(f"水印图像大小: {watermark_image.size}")
+        
+        return watermark_image, (x, y)
+    
+    def _composite_watermark(self, image, watermark_image, position, composite='roi', opacity=1.0,
+                             kernel='pillow'):
+        """
+        将水印图层合成到图片上
+        
+        Args:
+            image: PIL图像对象（背景图）
+            watermark_image: RGBA模式的水印图层
+            position: 水印左上角位置 (x, y)
+            composite: 合成方式
+                - 'roi': 复制原图后只在水印区域内按原图模式做alpha混合（默认）
+                - 'inplace': 与'roi'相同，但直接修改传入的图片，不复制整幅图像，
+                  适用于刚解码、之后不再使用原图的场景（如批量导出）
+                - 'full': 整幅图像转换为RGBA后粘贴再转换回原模式（旧流程）
+            opacity: 合成时额外应用的整体不透明度 (0.0-1.0)，仅NumPy内核支持
+            kernel: 'roi'/'inplace' 使用的混合内核
+                - 'pillow': Image.paste 遮罩混合（默认，C实现，实测最快）
+                - 'numpy': compositor 模块的定点预乘alpha内核，可同时应用整体不透明度
+        
+        Returns:
+            合成后的图像
+        """
+        x, y = int(position[0]), int(position[1])
+        
+        # RGB/L/RGBA 可以直接在原模式下混合，结果与转换为RGBA再转换回来一致
+        # （仅有取整误差），合成内核只读写水印与图片相交的矩形区域
+        if composite in ('roi', 'inplace') and image.mode in NATIVE_COMPOSITE_MODES:
+            result = image if composite == 'inplace' else image.copy()
+            if kernel == 'numpy':
+                return blend_into(result, watermark_image, (x, y), opacity)
+            result.paste(watermark_image, (x, y), watermark_image)
+            return result
+        
+        # 创建结果图像
+        result = image.copy()
+        
+        # 如果原图不是RGBA模式，需要转换为RGBA以支持透明度
+        if result.mode != "RGBA":
+            result = result.convert("RGBA")
+        
+        # 粘贴水印
+        result.paste(watermark_image, (x, y), watermark_image)
+        
+        # 如果原图不是RGBA模式，转换回原图模式以保持质量
+        if image.mode != "RGBA" and result.mode == "RGBA":
+            if image.mode == "RGB":
+                result = result.convert("RGB")
+            elif image.mode == "L":
+                result = result.convert("L")
+            # 其他模式保持RGBA
+        
+        return result
+    
+    def _load_font(self, font_path, font_family, font_size, bold=False, italic=False):
+        """
+        加载字体，确保使用指定的字体大小，并支持中文字体
+        
+        Args:
+            font_path: 字体文件路径
+            font_family: 字体名称
+            font_size: 实际字体大小（像素）
+            bold: 粗体
+            italic: 斜体
+        
+        Returns:
+            PIL字体对象
+        """
+        try:
+            if font_path and os.path.exists(font_path):
+                font = self.font_index.load_font(font_path, font_size)
+                self.log(f"使用字体文件: {font_path}, 字体大小: {font_size}")
+            elif font_family:
+                # 首先尝试使用字体文件查找，考虑粗体和斜体
+                font_files = self._find_font_file(font_family, bold, italic)
+                if font_files:
+                    font = self.font_index.load_font(font_files[0], font_size)
+                    self.log(f"使用字体文件: {font_files[0]}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
                 else:
-                    # 尝试使用支持中文的系统字体
-                    chinese_fonts = [
-                        "msyh.ttc",      # 微软雅黑
-                        "simhei.ttf",    # 黑体
-                        "simsun.ttc",    # 宋体
-                        "simkai.ttf",    # 楷体
-                        "arial.ttf",     # Arial
-                        "arialuni.ttf"   # Arial Unicode
-                    ]
-                    
-                    font = None
-                    for font_name in chinese_fonts:
-                        try:
-                            font = ImageFont.truetype(font_name, font_size)
-                            print(f"使用中文字体: {font_name}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
-                            break
-                        except:
-                            continue
-                    
-                    # 如果没有找到合适的中文字体，使用默认字体
-                    if font is None:
-                        font = ImageFont.load_default()
-                        print(f"未找到合适的字体，使用默认字体，字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
-                
-                # 如果粗体或斜体效果不明显，通过多次绘制来增强效果
-                if bold or italic:
-                    print(f"应用增强效果 - 粗体: {bold}, 斜体: {italic}")
-            except Exception as e:
-                # 备用方案：使用默认字体
-                font = ImageFont.load_default()
-                print(f"加载字体失败，使用默认字体: {e}")
-            
-            # 计算文本大小 - 使用更大的测试图像
-            dummy_image = Image.new("RGBA", (2000, 500), (0, 0, 0, 0))
-            dummy_draw = ImageDraw.Draw(dummy_image)
-            
-            try:
-                # 新版本PIL
-                bbox = dummy_draw.textbbox((0, 0), text, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-                print(f"新版本PIL计算文本大小: {text_width} x {text_height}")
-            except:
-                # 兼容旧版本PIL
-                text_width, text_height = dummy_draw.textsize(text, font=font)
-                print(f"旧版本PIL计算文本大小: {text_width} x {text_height}")
-            
-            # 如果计算出来的文本大小明显小于字体大小，说明字体可能没有正确应用
-            # 这种情况下我们使用字体大小来估算文本尺寸
-            if text_width < font_size or text_height < font_size // 2:
-                # 使用字体大小估算文本尺寸
-                text_width = len(text) * font_size * 0.7  # 估算宽度
-                text_height = font_size  # 高度等于字体大小
-                print(f"重新估算文本大小: {text_width} x {text_height}")
-            
-            # 确保文本大小不为0
-            if text_width == 0 or text_height == 0:
-                # 使用字体大小估算文本尺寸
-                text_width = len(text) * font_size * 0.7
-                text_height = font_size
-                print(f"文本大小为0，使用估算大小: {text_width} x {text_height}")
-            
-            # 创建水印图像 - 增加额外的边距
-            margin = max(30, int(text_width // 4), int(text_height // 4))  # 动态边距
-            watermark_width = int(text_width + margin * 2)
-            watermark_height = int(text_height + margin * 2)
-            watermark_image = Image.new("RGBA", (watermark_width, watermark_height), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(watermark_image)
-            
-            print(f"创建水印图像大小: {watermark_width} x {watermark_height}")
-            
-            draw_x = (watermark_width - text_width) // 2
-            draw_y = (watermark_height - text_height) // 2
-            print(f"文本绘制位置: ({draw_x}, {draw_y})")
-            
-            # 添加描边效果以增强可见性
-            if outline:
-                outline_color = (0, 0, 0, 255)  # 纯黑色描边，完全不透明
-                # 增强描边效果：在更大范围内绘制
-                offsets = []
-                for dx in range(-3, 4):
-                    for dy in range(-3, 4):
-                        if dx != 0 or dy != 0:  # 不在中心位置
-                            offsets.append((dx, dy))
-                for dx, dy in offsets:
-                    draw.text((draw_x + dx, draw_y + dy), text, font=font, fill=outline_color)
-            
-            # 添加阴影效果
-            if shadow:
-                # 增强阴影效果：更明显
-                shadow_color = (0, 0, 0, 200)  # 较深的黑色阴影
-                shadow_offset = 5  # 更大的偏移量
-                # 绘制阴影文本
-                draw.text((draw_x + shadow_offset, draw_y + shadow_offset), text, font=font, fill=shadow_color)
-            
-            # 绘制主文本 - 增强粗体和斜体效果
-            if bold:
-                # 增强粗体效果：在更大范围内绘制
-                for offset in range(-2, 2):
-                    draw.text((draw_x + offset, draw_y), text, font=font, fill=color)
-                    if offset != 0:  # 避免重复绘制中心位置
-                        draw.text((draw_x, draw_y + offset), text, font=font, fill=color)
-            else:
-                # 正常绘制
-                draw.text((draw_x, draw_y), text, font=font, fill=color)
-            
-            print(f"描边效果: {outline}, 阴影效果: {shadow}, 粗体: {bold}, 斜体: {italic}")
-            
-            # 斜体效果：在绘制完成后应用剪切变换
-            if italic:
-                # 使用简单的剪切变换来倾斜整个水印图像
-                shear_factor = 0.2  # 剪切因子
-                width, height = watermark_image.size
-                new_width = int(width + abs(shear_factor) * height)
-                
-                # 创建变换后的图像
-                sheared_image = Image.new("RGBA", (new_width, height), (0, 0, 0, 0))
-                
-                # 应用剪切变换
-                for y in range(height):
-                    offset = int(shear_factor * y)
-                    for x in range(width):
-                        if 0 <= x + offset < new_width:
+                    # 如果找不到字体文件，尝试直接使用字体名称
+                    try:
+                        font = self.font_index.load_font(font_family, font_size)
+                        self.log(f"使用系统字体: {font_family}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
+                    except:
+                        # 最后尝试使用常见的中文字体
+                        chinese_fonts = [
+                            "msyh.ttc",      # 微软雅黑
+                            "simhei.ttf",    # 黑体
+                            "simsun.ttc",    # 宋体
+                            "simkai.ttf",    # 楷体
+                            "arial.ttf",     # Arial
+                            "arialuni.ttf"   # Arial Unicode
+                        ]
+                        
+                        font = None
+                        for font_name in chinese_fonts:
                             try:
-                                sheared_image.putpixel((x + offset, y), watermark_image.getpixel((x, y)))
+                                font = self.font_index.load_font(font_name, font_size)
+                                self.log(f"使用中文字体: {font_name}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
+                                break
                             except:
-                                pass
+                                continue
+                        
+                        # 如果没有找到合适的中文字体，使用默认字体
+                        if font is None:
+                            font = self._load_default_font(font_size)
+                            self.log(f"未找到合适的字体，使用默认字体，字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
+            else:
+                # 尝试使用支持中文的系统字体
+                chinese_fonts = [
+                    "msyh.ttc",      # 微软雅黑
+                    "simhei.ttf",    # 黑体
+                    "simsun.ttc",    # 宋体
+                    "simkai.ttf",    # 楷体
+                    "arial.ttf",     # Arial
+                    "arialuni.ttf"   # Arial Unicode
+                ]
                 
-                # 替换原水印图像
-                watermark_image = sheared_image
-            
-            # 旋转水印
-            if rotation != 0:
-                print(f"旋转水印: {rotation}度")
-                watermark_image = watermark_image.rotate(rotation, expand=1, fillcolor=(0, 0, 0, 0))
-            
-            # 解析位置
-            custom_position = kwargs.get('custom_position', None)
-            x, y = self._parse_position(position, image.size, watermark_image.size, custom_position)
-            print(f"水印最终位置: ({x}, {y})")
-            print(f"背景图像大小: {image.size}")
-            print(f"水印图像大小: {watermark_image.size}")
-            
-            # 创建结果图像
-            result = image.copy()
-            
-            # 如果原图不是RGBA模式，需要转换为RGBA以支持透明度
-            if result.mode != "RGBA":
-                result = result.convert("RGBA")
-            
-            # 粘贴水印
-            result.paste(watermark_image, (x, y), watermark_image)
-            print("文本水印添加完成")
-            
-            # 如果原图不是RGBA模式，转换回原图模式以保持质量
-            if image.mode != "RGBA" and result.mode == "RGBA":
-                if image.mode == "RGB":
-                    result = result.convert("RGB")
-                elif image.mode == "L":
-                    result = result.convert("L")
-                # 其他模式保持RGBA
+                font = None
+                for font_name in chinese_fonts:
+                    try:
+                        font = self.font_index.load_font(font_name, font_size)
+                        self.log(f"使用中文字体: {font_name}, 字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
+                        break
+                    except:
+                        continue
                 
-            return result
+                # 如果没有找到合适的中文字体，使用默认字体
+                if font is None:
+                    font = self._load_default_font(font_size)
+                    self.log(f"未找到合适的字体，使用默认字体，字体大小: {font_size}, 粗体: {bold}, 斜体: {italic}")
+            
+            # 如果粗体或斜体效果不明显，通过多次绘制来增强效果
+            if bold or italic:
+                self.log(f"应用增强效果 - 粗体: {bold}, 斜体: {italic}")
         except Exception as e:
-            print(f"添加文本水印失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise Exception(f"添加文本水印失败: {str(e)}")
+            # 备用方案：使用默认字体
+            font = self._load_default_font(font_size)
+            self.log(f"加载字体失败，使用默认字体: {e}")
+        
+        return font
+    
+    def _load_default_font(self, font_size):
+        """
+        加载PIL默认字体，支持指定大小时（Pillow 10.1+）使用实际字体大小
+        """
+        try:
+            return ImageFont.load_default(size=font_size)
+        except TypeError:
+            # 旧版本PIL的默认字体不支持指定大小
+            return ImageFont.load_default()
+    
+    def _font_cache_id(self, font):
+        """
+        获取字体在缓存键中的标识（字体文件路径，默认字体时为其名称）
+        """
+        font_file = getattr(font, 'path', None)
+        if isinstance(font_file, str):
+            return font_file
+        return "<default>"
+    
+    def _render_text_layer(self, text, font, font_size, color, bold=False, italic=False,
+                           outline=False, shadow=False, rotation=0, effects=None):
+        """
+        渲染文本水印图层
+        
+        Args:
+            text: 水印文本
+            font: PIL字体对象
+            font_size: 实际字体大小（像素）
+            color: 已应用透明度的文本颜色 (R, G, B, A)
+            bold: 粗体
+            italic: 斜体
+            outline: 描边效果
+            shadow: 阴影效果
+            rotation: 旋转角度
+            effects: 效果像素参数，见 _scaled_effects，None表示原图尺寸下的参数
+        
+        Returns:
+            RGBA模式的水印图层
+        """
+        # 按文本实际包围盒加上效果外扩范围确定画布大小，不再使用估算的大画布
+        left, top, right, bottom = self.measure_text(font, text)
+        padding = TEXT_PADDING + self._effect_padding(bold, outline, shadow, effects)
+        watermark_width = max(1, right - left + padding * 2)
+        watermark_height = max(1, bottom - top + padding * 2)
+        self.log(f"文本大小: {right - left} x {bottom - top}, 创建水印图像大小: {watermark_width} x {watermark_height}")
+        
+        # 使包围盒左上角落在 (padding, padding)
+        draw_x = padding - left
+        draw_y = padding - top
+        
+        # 描边、阴影和粗体都由同一个字形遮罩派生，只进行一次字形光栅化
+        watermark_image = self._render_text_effects(
+            (watermark_width, watermark_height), (draw_x, draw_y), text, font, color,
+            bold=bold, outline=outline, shadow=shadow, effects=effects
+        )
+        
+        self.log(f"描边效果: {outline}, 阴影效果: {shadow}, 粗体: {bold}, 斜体: {italic}")
+        
+        # 斜体效果：在绘制完成后应用剪切变换
+        if italic:
+            watermark_image = self._apply_italic_shear(watermark_image)
+        
+        # 旋转水印
+        if rotation != 0:
+            self.log(f"旋转水印: {rotation}度")
+            watermark_image = watermark_image.rotate(rotation, expand=1, fillcolor=(0, 0, 0, 0))
+        
+        return watermark_image
     
     def add_image_watermark(self, image, watermark_image, position, **kwargs):
         """
@@ -353,94 +566,88 @@ class ImageProcessor:
         
         Args:
             image: PIL图像对象（背景图）
-            watermark_image: PIL图像对象（水印图）
+            watermark_image: PIL图像对象（水印图）或 PreparedWatermark 对象
             position: 水印位置 (x, y) 或 预设位置字符串
             kwargs: 其他参数
                 - scale: 缩放比例
                 - opacity: 透明度 (0-100)
                 - rotation: 旋转角度
                 - custom_position: 自定义位置 (x, y) 元组
+                - composite: 合成方式，见 _composite_watermark
+                - composite_kernel: 混合内核，'pillow' 或 'numpy'
+                - render_scale: 渲染比例，见 add_text_watermark
+                - return_bbox: 为True时同时返回水印在图片上的边界框
         
         Returns:
-            添加水印后的图像
+            添加水印后的图像；return_bbox为True时返回 (图像, (left, top, right, bottom))
         """
         try:
-            print("开始添加图片水印")
-            print(f"位置参数: {position}")
-            print(f"其他参数: {kwargs}")
+            self.log("开始添加图片水印")
+            self.log(f"位置参数: {position}")
+            self.log(f"其他参数: {kwargs}")
             
-            # 获取参数
-            scale = kwargs.get('scale', 1.0)
+            # 使用NumPy合成内核时，透明度在混合的同一遍中处理
             opacity = kwargs.get('opacity', 100)
-            rotation = kwargs.get('rotation', 0)
-            
-            # 调整水印图片大小
-            if scale != 1.0:
-                new_width = int(watermark_image.width * scale)
-                new_height = int(watermark_image.height * scale)
-                watermark_image = watermark_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                print(f"调整水印图片大小: {new_width} x {new_height}")
-            
-            # 处理透明度
-            # 透明度逻辑：opacity值越大越透明（即不透明度越小）
-            if opacity < 100:
-                if watermark_image.mode == "RGBA":
-                    # 分离alpha通道并调整透明度
-                    r, g, b, alpha = watermark_image.split()
-                    # 透明度逻辑：opacity值越大越透明，所以alpha值应该越小
-                    alpha = alpha.point(lambda x: int(x * (100 - opacity) / 100))
-                    watermark_image = Image.merge('RGBA', (r, g, b, alpha))
-                else:
-                    # 对于非RGBA图像，先转换为RGBA
-                    watermark_image = watermark_image.convert("RGBA")
-                    r, g, b, alpha = watermark_image.split()
-                    # 透明度逻辑：opacity值越大越透明，所以alpha值应该越小
-                    alpha = alpha.point(lambda x: int(x * (100 - opacity) / 100))
-                    watermark_image = Image.merge('RGBA', (r, g, b, alpha))
-                print(f"调整水印透明度: {opacity}% (值越大越透明)")
-            
-            # 确保水印图片是RGBA模式
-            if watermark_image.mode != "RGBA":
-                watermark_image = watermark_image.convert("RGBA")
-            
-            # 旋转水印
-            if rotation != 0:
-                watermark_image = watermark_image.rotate(rotation, expand=1)
-                print(f"旋转水印: {rotation}度")
-            
-            # 解析位置
-            custom_position = kwargs.get('custom_position', None)
-            x, y = self._parse_position(position, image.size, watermark_image.size, custom_position)
-            print(f"水印最终位置: ({x}, {y})")
-            print(f"背景图像大小: {image.size}")
-            print(f"水印图像大小: {watermark_image.size}")
-            
-            # 创建结果图像
-            result = image.copy()
-            
-            # 如果原图不是RGBA模式，需要转换为RGBA以支持透明度
-            if result.mode != "RGBA":
-                result = result.convert("RGBA")
-            
-            # 粘贴水印图片
-            result.paste(watermark_image, (x, y), watermark_image)
-            print("图片水印添加完成")
-            
-            # 如果原图不是RGBA模式，转换回原图模式以保持质量
-            if image.mode != "RGBA" and result.mode == "RGBA":
-                if image.mode == "RGB":
-                    result = result.convert("RGB")
-                elif image.mode == "L":
-                    result = result.convert("L")
-                # 其他模式保持RGBA
-                
+            composite = kwargs.get('composite', 'roi')
+            composite_kernel = kwargs.get('composite_kernel', 'pillow')
+            defer_opacity = (composite_kernel == 'numpy' and composite in ('roi', 'inplace') and
+                             image.mode in NATIVE_COMPOSITE_MODES and opacity < 100)
+            layer_opacity = 100 if defer_opacity else opacity
+            
+            watermark_image, (x, y) = self.render_image_watermark(
+                image.size, watermark_image, position, **dict(kwargs, opacity=layer_opacity))
+            self.log(f"背景图像大小: {image.size}")
+            
+            # 合成水印，默认只在水印所在区域内按原图模式混合
+            blend_opacity = (100 - opacity) / 100 if defer_opacity else 1.0
+            result = self._composite_watermark(image, watermark_image, (x, y), composite,
+                                               blend_opacity, composite_kernel)
+            self.log("图片水印添加完成")
+            
+            if kwargs.get('return_bbox', False):
+                return result, (x, y, x + watermark_image.width, y + watermark_image.height)
             return result
         except Exception as e:
-            print(f"添加图片水印失败: {str(e)}")
+            self.log(f"添加图片水印失败: {str(e)}")
             import traceback
             traceback.print_exc()
             raise Exception(f"添加图片水印失败: {str(e)}")
     
+    def render_image_watermark(self, image_size, watermark_image, position, **kwargs):
+        """
+        生成缩放、透明度和旋转处理后的图片水印图层并计算其位置，不修改图片
+        
+        Args:
+            image_size: 背景图片尺寸 (width, height)
+            watermark_image: PIL图像对象（水印图）或 PreparedWatermark 对象
+            position: 水印位置 (x, y) 或 预设位置字符串
+            kwargs: 与 add_image_watermark 相同
+        
+        Returns:
+            (RGBA模式的水印图层, 左上角位置 (x, y))
+        """
+        # 获取参数
+        render_scale = kwargs.get('render_scale', 1.0)
+        scale = kwargs.get('scale', 1.0) * render_scale
+        opacity = kwargs.get('opacity', 100)
+        rotation = kwargs.get('rotation', 0)
+        
+        # 缩放、透明度和旋转；预处理水印会复用相同参数下的结果
+        if isinstance(watermark_image, PreparedWatermark):
+            watermark_image = watermark_image.get_layer(scale, opacity, rotation)
+        else:
+            watermark_image = prepare_watermark_layer(watermark_image, scale, opacity, rotation,
+                                                      verbose=self.verbose)
+        
+        # 解析位置
+        custom_position = kwargs.get('custom_position', None)
+        x, y = self._parse_position(position, image_size, watermark_image.size, custom_position,
+                                    render_scale)
+        self.log(f"水印最终位置: ({x}, {y})")
+        self.log(f"水印图像大小: {watermark_image.size}")
+        
+        return watermark_image, (x, y)
+    
     def _find_font_file(self, font_family, bold=False, italic=False):
         """
         查找字体文件
@@ -453,87 +660,208 @@ class ImageProcessor:
         Returns:
             字体文件路径列表
         """
-        import platform
-        system = platform.system()
-        
-        font_dirs = []
-        if system == "Windows":
-            font_dirs = [
-                os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
-                os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft', 'Windows', 'Fonts')
-            ]
-        elif system == "Darwin":  # macOS
-            font_dirs = [
-                '/Library/Fonts',
-                '/System/Library/Fonts',
-                os.path.expanduser('~/Library/Fonts')
-            ]
-        else:  # Linux
-            font_dirs = [
-                '/usr/share/fonts',
-                '/usr/local/share/fonts',
-                os.path.expanduser('~/.fonts')
-            ]
-        
-        # 中文字体名称映射
-        chinese_font_mapping = {
-            "楷体": ["simkai.ttf", "kaiu.ttf", "kai.ttf"],
-            "宋体": ["simsun.ttc", "simsun.ttf"],
-            "黑体": ["simhei.ttf", "msyh.ttc"],
-            "微软雅黑": ["msyh.ttc", "msyh.ttf"],
-            "仿宋": ["simfang.ttf"],
-            "隶书": ["simli.ttf"],
-            "幼圆": ["simyou.ttf"],
-            "华文宋体": ["stsong.ttf"],
-            "华文黑体": ["stheit.ttf"],
-            "华文楷体": ["stkaiti.ttf"]
-        }
-        
-        font_files = []
-        
-        # 首先检查中文字体映射
-        if font_family in chinese_font_mapping:
-            for font_name in chinese_font_mapping[font_family]:
-                for font_dir in font_dirs:
-                    if os.path.exists(font_dir):
-                        font_path = os.path.join(font_dir, font_name)
-                        if os.path.exists(font_path):
-                            font_files.append(font_path)
-                            print(f"找到中文字体文件: {font_path}")
-        
-        # 如果没找到，再扫描字体目录
-        if not font_files:
-            for font_dir in font_dirs:
-                if os.path.exists(font_dir):
-                    for root, dirs, files in os.walk(font_dir):
-                        for file in files:
-                            if file.lower().endswith(('.ttf', '.ttc', '.otf')):
-                                # 改进的字体名称匹配
-                                file_lower = file.lower()
-                                family_lower = font_family.lower()
-                                
-                                # 检查文件名是否包含字体名称
-                                if family_lower in file_lower:
-                                    # 检查样式匹配
-                                    if bold and ("bold" in file_lower or "粗体" in file_lower or "黑" in file_lower):
-                                        font_files.insert(0, os.path.join(root, file))  # 粗体优先
-                                    elif italic and ("italic" in file_lower or "斜体" in file_lower):
-                                        font_files.insert(0, os.path.join(root, file))  # 斜体优先
-                                    else:
-                                        font_files.append(os.path.join(root, file))
-                                # 检查常见的中文字体别名
-                                elif font_family == "楷体" and ("kai" in file_lower or "楷" in file_lower):
-                                    font_files.append(os.path.join(root, file))
-                                elif font_family == "宋体" and ("song" in file_lower or "宋" in file_lower or "sun" in file_lower):
-                                    font_files.append(os.path.join(root, file))
-                                elif font_family == "黑体" and ("hei" in file_lower or "黑" in file_lower):
-                                    font_files.append(os.path.join(root, file))
-                                elif font_family == "微软雅黑" and ("yahei" in file_lower or "雅黑" in file_lower):
-                                    font_files.append(os.path.join(root, file))
-        
-        return font_files
+        # 查找结果来自持久化的字体索引，不再每次遍历字体目录
+        return self.font_index.find_font_files(font_family, bold, italic)
 
-    def _parse_position(self, position, image_size, watermark_size, custom_position=None):
+    def measure_text(self, font, text):
+        """
+        测量文本的包围盒，不分配任何图像
+        
+        垂直方向为墨迹范围，水平方向为排版宽度（包含首尾字形的留白）。
+        结果按 (字体文件, 字体大小, 文本) 缓存。
+        
+        Args:
+            font: PIL字体对象
+            text: 文本
+        
+        Returns:
+            以绘制原点为基准的 (left, top, right, bottom)
+        """
+        key = (self._font_cache_id(font), getattr(font, 'size', None), text)
+        bbox = self.metrics_cache.get(key)
+        if bbox is None:
+            if "\n" in text:
+                # 多行文本需要按行距排版，使用1x1的画布调用多行测量
+                bbox = ImageDraw.Draw(Image.new("L", (1, 1))).multiline_textbbox((0, 0), text, font=font)
+            else:
+                try:
+                    bbox = font.getbbox(text)
+                except AttributeError:
+                    # 兼容旧版本PIL
+                    width, height = font.getsize(text)
+                    bbox = (0, 0, width, height)
+            bbox = tuple(int(round(v)) for v in bbox)
+            self.metrics_cache.put(key, bbox, size=0)
+        return bbox
+    
+    def _scaled_effects(self, render_scale=1.0):
+        """
+        按渲染比例换算文本效果的像素参数，非零的量至少保留1像素以便预览中可见
+        
+        Returns:
+            (描边半径, 阴影偏移, 粗体平移量元组)
+        """
+        if render_scale == 1.0:
+            return (OUTLINE_RADIUS, SHADOW_OFFSET, tuple(BOLD_OFFSETS))
+        
+        def scale_px(value):
+            if value == 0:
+                return 0
+            scaled = max(1, round(abs(value) * render_scale))
+            return scaled if value > 0 else -scaled
+        
+        bold_offsets = tuple(dict.fromkeys((scale_px(dx), scale_px(dy)) for dx, dy in BOLD_OFFSETS))
+        return (scale_px(OUTLINE_RADIUS), scale_px(SHADOW_OFFSET), bold_offsets)
+    
+    def _effect_padding(self, bold=False, outline=False, shadow=False, effects=None):
+        """
+        计算文本效果在墨迹之外需要的外扩像素数
+        """
+        outline_radius, shadow_offset, bold_offsets = effects or self._scaled_effects()
+        pad = 0
+        if outline:
+            pad = max(pad, outline_radius)
+        if shadow:
+            pad = max(pad, shadow_offset)
+        if bold:
+            pad = max(pad, max(max(abs(dx), abs(dy)) for dx, dy in bold_offsets))
+        return pad
+    
+    def _render_text_effects(self, canvas_size, origin, text, font, color,
+                             bold=False, outline=False, shadow=False, effects=None):
+        """
+        文本效果引擎：光栅化一次字形遮罩，派生出描边、阴影和粗体效果后一次性合成
+        
+        - 描边：对遮罩做 (2r+1)x(2r+1) 的可分离最大值滤波（形态学膨胀）
+        - 阴影：平移后的遮罩
+        - 粗体：遮罩与若干平移副本取最大值
+        
+        所有运算只在字形包围盒（加上效果外扩范围）内进行，按描边、阴影、正文的顺序
+        逐层混合。每层按字形覆盖率对四个通道做线性插值 out = ink*m + out*(1-m)
+        （目标像素完全透明时直接取墨水颜色），取整方式与 ImageDraw 相同，
+        结果与依次调用 draw.text 逐像素一致：后绘制的半透明正文会替换下面的描边，
+        而不是叠加在描边之上。
+        
+        Args:
+            canvas_size: 画布尺寸 (width, height)
+            origin: 文本绘制位置 (x, y)
+            text: 水印文本
+            font: PIL字体对象
+            color: 文本颜色 (R, G, B, A)
+            bold: 粗体
+            outline: 描边效果
+            shadow: 阴影效果
+            effects: 效果像素参数，见 _scaled_effects
+        
+        Returns:
+            RGBA模式的文本图层
+        """
+        # 字形遮罩（唯一一次光栅化）
+        glyph_mask = Image.new("L", canvas_size, 0)
+        ImageDraw.Draw(glyph_mask).text(origin, text, font=font, fill=255)
+        
+        layer = Image.new("RGBA", canvas_size, (0, 0, 0, 0))
+        ink_box = glyph_mask.getbbox()
+        if ink_box is None:
+            return layer
+        
+        # 效果的最大外扩范围
+        outline_radius, shadow_offset, bold_offsets = effects or self._scaled_effects()
+        pad = self._effect_padding(bold, outline, shadow, effects)
+        left = max(0, ink_box[0] - pad)
+        top = max(0, ink_box[1] - pad)
+        right = min(canvas_size[0], ink_box[2] + pad)
+        bottom = min(canvas_size[1], ink_box[3] + pad)
+        mask = np.asarray(glyph_mask.crop((left, top, right, bottom)))
+        
+        # 按绘制顺序排列的 (颜色, 遮罩)
+        passes = []
+        if outline:
+            passes.append((OUTLINE_COLOR, self._dilate_square(mask, outline_radius)))
+        if shadow:
+            passes.append((SHADOW_COLOR, self._shift_mask(mask, shadow_offset, shadow_offset)))
+        text_mask = mask
+        if bold:
+            for dx, dy in bold_offsets:
+                text_mask = np.maximum(text_mask, self._shift_mask(mask, dx, dy))
+        passes.append((tuple(color), text_mask))
+        
+        # 逐层按覆盖率混合四个通道，与 ImageDraw 在RGBA图像上绘制的整数运算相同
+        region = np.zeros(mask.shape + (4,), dtype=np.int32)
+        for ink, effect_mask in passes:
+            ink = np.asarray(ink, dtype=np.int32)
+            coverage = effect_mask.astype(np.int32)[..., None]
+            # 完全透明的像素没有颜色，混合时直接使用墨水颜色
+            transparent = region[..., 3] == 0
+            base = region.copy()
+            base[transparent, :3] = ink[:3]
+            blended = base * (255 - coverage) + ink * coverage + 128
+            blended = (blended + (blended >> 8)) >> 8
+            region = np.where(coverage > 0, blended, region)
+        
+        layer.paste(Image.fromarray(region.astype(np.uint8), "RGBA"), (left, top))
+        return layer
+    
+    def _shift_mask(self, mask, dx, dy):
+        """
+        平移遮罩数组，移出范围的部分被丢弃，空出的部分填充为0
+        """
+        height, width = mask.shape
+        shifted = np.zeros_like(mask)
+        if abs(dx) >= width or abs(dy) >= height:
+            return shifted
+        src_y = slice(max(0, -dy), height - max(0, dy))
+        src_x = slice(max(0, -dx), width - max(0, dx))
+        dst_y = slice(max(0, dy), height - max(0, -dy))
+        dst_x = slice(max(0, dx), width - max(0, -dx))
+        shifted[dst_y, dst_x] = mask[src_y, src_x]
+        return shifted
+    
+    def _dilate_square(self, mask, radius):
+        """
+        正方形结构元素的形态学膨胀，按行、列分两次取最大值
+        """
+        result = mask
+        for dx in range(-radius, radius + 1):
+            if dx:
+                result = np.maximum(result, self._shift_mask(mask, dx, 0))
+        rows = result
+        for dy in range(-radius, radius + 1):
+            if dy:
+                result = np.maximum(result, self._shift_mask(rows, 0, dy))
+        return result
+    
+    def _apply_italic_shear(self, watermark_image, shear_factor=ITALIC_SHEAR_FACTOR):
+        """
+        对水印图层应用剪切变换，生成合成斜体效果
+        
+        第y行整体向右平移 int(shear_factor * y) 个像素，通过一次NumPy
+        高级索引赋值完成，不再逐像素调用 getpixel/putpixel。
+        
+        Args:
+            watermark_image: RGBA模式的水印图层
+            shear_factor: 剪切因子
+        
+        Returns:
+            剪切后的RGBA图层
+        """
+        width, height = watermark_image.size
+        new_width = int(width + abs(shear_factor) * height)
+        
+        source = np.asarray(watermark_image.convert("RGBA"))
+        sheared = np.zeros((height, new_width, 4), dtype=np.uint8)
+        
+        # 每一行的平移量，与原逐像素实现的取整方式保持一致
+        offsets = (shear_factor * np.arange(height)).astype(np.int64)
+        if shear_factor < 0:
+            offsets -= offsets.min()
+        rows = np.arange(height)[:, None]
+        cols = np.arange(width)[None, :] + offsets[:, None]
+        sheared[rows, cols] = source
+        
+        return Image.fromarray(sheared, "RGBA")
+    
+    def _parse_position(self, position, image_size, watermark_size, custom_position=None, render_scale=1.0):
         """
         解析水印位置
         
@@ -542,6 +870,7 @@ class ImageProcessor:
             image_size: 背景图片尺寸 (width, height)
             watermark_size: 水印尺寸 (width, height)
             custom_position: 自定义位置 (x, y) 元组
+            render_scale: 渲染比例，自定义位置（原图坐标）和边距按比例换算
         
         Returns:
             (x, y) 位置坐标
@@ -549,23 +878,24 @@ class ImageProcessor:
         img_width, img_height = image_size
         wm_width, wm_height = watermark_size
         
-        print(f"解析位置: {position}")
-        print(f"背景尺寸: {image_size}, 水印尺寸: {watermark_size}")
+        self.log(f"解析位置: {position}")
+        self.log(f"背景尺寸: {image_size}, 水印尺寸: {watermark_size}")
         
         # 如果提供了自定义位置，优先使用
         if custom_position is not None and isinstance(custom_position, tuple) and len(custom_position) == 2:
-            print(f"使用自定义位置: {custom_position}")
-            return custom_position
+            self.log(f"使用自定义位置: {custom_position}")
+            return self._scale_point(custom_position, render_scale)
         
         # 如果位置是元组，直接返回
         if isinstance(position, tuple) and len(position) == 2:
-            print(f"使用自定义位置: {position}")
-            return position
+            self.log(f"使用自定义位置: {position}")
+            return self._scale_point(position, render_scale)
+        
+        margin = round(POSITION_MARGIN * render_scale)
         
         # 如果位置是字符串，解析预设位置
         if isinstance(position, str):
             position = position.lower()
-            margin = 20  # 增大边距
             
             if position == 'top-left':
                 result = (margin, margin)
@@ -586,11 +916,19 @@ class ImageProcessor:
             elif position == 'middle-right':
                 result = (img_width - wm_width - margin, (img_height - wm_height) // 2)
             else:
-                result = (20, 20)  # 默认位置改为(20, 20)
+                result = (margin, margin)  # 默认位置改为(20, 20)
             
-            print(f"解析后位置: {result}")
+            self.log(f"解析后位置: {result}")
             return result
         
         # 默认返回左上角附近
-        print("使用默认位置: (20, 20)")
-        return (20, 20)
\ No newline at end of file
+        self.log(f"使用默认位置: ({margin}, {margin})")
+        return (margin, margin)
+    
+    def _scale_point(self, point, render_scale):
+        """
+        将原图坐标换算为渲染坐标
+        """
+        if render_scale == 1.0:
+            return point
+        return (round(point[0] * render_scale), round(point[1] * render_scale))
\ No newline at end of file
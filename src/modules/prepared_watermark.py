@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+预处理图片水印模块
+对同一张水印图片的缩放、透明度和旋转结果进行缓存，供批量处理复用
+"""
+
+from PIL import Image
+
+from .cache import LRUCache
+
+# 每个预处理水印缓存的变换结果的默认内存预算
+DEFAULT_VARIANT_CACHE_BYTES = 64 * 1024 * 1024
+
+# 金字塔最小层的边长
+PYRAMID_MIN_SIZE = 32
+
+
+def scaled_watermark_size(size, scale):
+    """
+    计算水印图片按比例缩放后的尺寸
+
+    Args:
+        size: 原始水印图片尺寸 (width, height)
+        scale: 缩放比例
+
+    Returns:
+        (width, height)，四舍五入且不小于1像素
+    """
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def prepare_watermark_layer(watermark_image, scale=1.0, opacity=100, rotation=0, verbose=True, size=None):
+    """
+    对水印图片依次应用缩放、透明度和旋转，得到可直接合成的RGBA图层
+
+    Args:
+        watermark_image: PIL图像对象（水印图）
+        scale: 缩放比例
+        opacity: 透明度 (0-100)，值越大越透明
+        rotation: 旋转角度
+        verbose: 是否输出调试信息
+        size: 缩放后的尺寸，None表示按 scale 计算；从金字塔层缩放时传入按原图计算的尺寸
+
+    Returns:
+        RGBA模式的水印图层
+    """
+    # 调整水印图片大小
+    if size is None and scale != 1.0:
+        size = scaled_watermark_size(watermark_image.size, scale)
+    if size is not None and tuple(size) != watermark_image.size:
+        new_width, new_height = size
+        watermark_image = watermark_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        if verbose:
+            print(f"调整水印图片大小: {new_width} x {new_height}")
+
+    # 处理透明度
+    # 透明度逻辑：opacity值越大越透明（即不透明度越小）
+    if opacity < 100:
+        if watermark_image.mode != "RGBA":
+            # 对于非RGBA图像，先转换为RGBA
+            watermark_image = watermark_image.convert("RGBA")
+        # 分离alpha通道并调整透明度
+        r, g, b, alpha = watermark_image.split()
+        # 透明度逻辑：opacity值越大越透明，所以alpha值应该越小
+        alpha = alpha.point(lambda x: int(x * (100 - opacity) / 100))
+        watermark_image = Image.merge('RGBA', (r, g, b, alpha))
+        if verbose:
+            print(f"调整水印透明度: {opacity}% (值越大越透明)")
+
+    # 确保水印图片是RGBA模式
+    if watermark_image.mode != "RGBA":
+        watermark_image = watermark_image.convert("RGBA")
+
+    # 旋转水印
+    if rotation != 0:
+        watermark_image = watermark_image.rotate(rotation, expand=1)
+        if verbose:
+            print(f"旋转水印: {rotation}度")
+
+    return watermark_image
+
+
+class PreparedWatermark:
+    """
+    预处理图片水印类
+
+    包装一张水印图片，按 (缩放比例, 透明度, 旋转角度) 缓存变换后的图层，
+    批量导出时每组参数只计算一次。可选构建多级金字塔（逐级减半），
+    缩放比例较小时从最接近的金字塔层开始缩放，减少重采样的像素量。
+    缓存的图层是共享的，调用方不应修改。
+    """
+
+    def __init__(self, image, use_pyramid=False, cache_bytes=DEFAULT_VARIANT_CACHE_BYTES, verbose=True):
+        """
+        初始化预处理水印
+
+        Args:
+            image: PIL图像对象（水印图）
+            use_pyramid: 是否构建多级金字塔
+            cache_bytes: 变换结果缓存的内存预算（字节）
+            verbose: 生成变换结果时是否输出调试信息
+        """
+        self.verbose = verbose
+        self.source = image if image.mode == "RGBA" else image.convert("RGBA")
+        self.source.load()
+        self.pyramid = [self.source]
+        self._variants = LRUCache(max_bytes=cache_bytes)
+        if use_pyramid:
+            self.build_pyramid()
+
+    @property
+    def size(self):
+        """
+        原始水印图片的尺寸
+        """
+        return self.source.size
+
+    def build_pyramid(self, min_size=PYRAMID_MIN_SIZE):
+        """
+        构建多级金字塔，每一级的宽高为上一级的一半
+
+        Args:
+            min_size: 最小层的最短边长度
+        """
+        level = self.source
+        pyramid = [level]
+        while min(level.size) // 2 >= min_size:
+            level = level.reduce(2)
+            pyramid.append(level)
+        self.pyramid = pyramid
+        self._variants.clear()
+
+    def get_layer(self, scale=1.0, opacity=100, rotation=0):
+        """
+        获取按指定参数变换后的水印图层
+
+        Args:
+            scale: 缩放比例（相对原始水印图片）
+            opacity: 透明度 (0-100)，值越大越透明
+            rotation: 旋转角度
+
+        Returns:
+            RGBA模式的水印图层
+        """
+        key = (round(scale, 6), opacity, rotation)
+        layer = self._variants.get(key)
+        if layer is None:
+            # 目标尺寸按原图计算，金字塔层只是缩放的起点，结果与直接从原图缩放的尺寸一致
+            size = scaled_watermark_size(self.source.size, scale)
+            base, base_scale = self._base_for_scale(scale)
+            layer = prepare_watermark_layer(base, scale / base_scale, opacity, rotation, self.verbose, size)
+            self._variants.put(key, layer)
+        return layer
+
+    def _base_for_scale(self, scale):
+        """
+        选择不小于目标尺寸的最小金字塔层
+
+        Returns:
+            (金字塔层图像, 该层相对原图的比例)
+        """
+        target_width = self.source.width * scale
+        base = self.source
+        for level in self.pyramid[1:]:
+            if level.width < target_width:
+                break
+            base = level
+        return base, base.width / self.source.width
+
+    def stats(self):
+        """
+        获取变换结果缓存的统计信息
+        """
+        return self._variants.stats()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PIL图像与Qt图像转换模块
+所有显示路径共用的转换函数，QImage直接建立在Pillow导出的像素数据上，不做通道交换和额外复制
+"""
+
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QImage, QPixmap
+
+# PIL模式 -> (QImage格式, 每像素字节数)，这些模式的内存布局与Qt格式一致，无需转换
+QIMAGE_FORMATS = {
+    "RGB": (QImage.Format_RGB888, 3),
+    "RGBA": (QImage.Format_RGBA8888, 4),
+    "RGBX": (QImage.Format_RGBX8888, 4),
+    "L": (QImage.Format_Grayscale8, 1)
+}
+
+
+def pil_to_qimage(image, copy=False):
+    """
+    将PIL图像转换为QImage
+
+    RGB、RGBA、RGBX和L模式只导出一次像素数据，QImage直接引用这块数据并按
+    实际行宽解析（不要求每行4字节对齐）；其他模式先转换为RGB或RGBA。
+
+    Args:
+        image: PIL图像对象
+        copy: 是否让QImage持有独立的像素数据。默认的QImage引用Python对象中的
+            数据，只能在当前线程中使用（如立即转换为QPixmap）；需要通过信号
+            跨线程传递或长期保存时应传入True
+
+    Returns:
+        QImage对象
+    """
+    if image.mode not in QIMAGE_FORMATS:
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    qformat, channels = QIMAGE_FORMATS[image.mode]
+    data = image.tobytes("raw", image.mode)
+    qimage = QImage(data, image.width, image.height, image.width * channels, qformat)
+    if copy:
+        return qimage.copy()
+    # QImage 不持有 data 的引用，挂在包装对象上保证数据与QImage同生命周期
+    qimage._pil_data = data
+    return qimage
+
+
+def fit_pixmap(pixmap, max_size):
+    """
+    按比例缩放QPixmap以适应指定区域，尺寸已经合适时直接返回原对象
+
+    Args:
+        pixmap: QPixmap对象
+        max_size: 区域尺寸 (width, height)
+
+    Returns:
+        缩放后的QPixmap
+    """
+    target = pixmap.size().scaled(QSize(*max_size), Qt.KeepAspectRatio)
+    if target == pixmap.size():
+        return pixmap
+    return pixmap.scaled(target, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+
+def pil_to_qpixmap(image, max_size=None):
+    """
+    将PIL图像转换为QPixmap（只能在界面线程中调用）
+
+    Args:
+        image: PIL图像对象
+        max_size: 显示区域尺寸，None表示不缩放
+
+    Returns:
+        QPixmap对象
+    """
+    pixmap = QPixmap.fromImage(pil_to_qimage(image))
+    if max_size is not None:
+        pixmap = fit_pixmap(pixmap, max_size)
+    return pixmap
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+缩略图磁盘缓存模块
+把生成的缩略图持久化到 ~/.photot_watermark/thumbs，重复导入同一批图片时不再解码原图
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from PIL import Image, features
+
+# 默认的磁盘占用上限
+DEFAULT_THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024
+
+# 超出上限时淘汰到上限的这个比例，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+# 缓存文件格式：优先使用体积更小的WebP
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "PNG"
+THUMBNAIL_EXT = ".webp" if THUMBNAIL_FORMAT == "WEBP" else ".png"
+
+
+class ThumbnailCache:
+    """
+    缩略图磁盘缓存类
+
+    缓存键由源文件的绝对路径、修改时间、文件大小和缩略图尺寸计算得到，
+    源文件变化后自动失效。每个缩略图保存为一个小文件，按前两位分目录存放。
+    命中时更新缓存文件的修改时间，超出容量上限时按修改时间淘汰最久未使用的文件。
+    所有操作都是线程安全的。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_THUMBNAIL_CACHE_BYTES):
+        """
+        初始化缩略图缓存
+
+        Args:
+            cache_dir: 缓存目录，默认位于配置目录下
+            max_bytes: 磁盘占用上限（字节）
+        """
+        if cache_dir is None:
+            cache_dir = Path.home() / ".photot_watermark" / "thumbs"
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None  # 首次写入时扫描目录得到
+        self._lock = threading.Lock()
+
+    def make_key(self, image_path, size):
+        """
+        计算缓存键
+
+        Args:
+            image_path: 源图片路径
+            size: 缩略图最大尺寸 (width, height)
+
+        Returns:
+            缓存键字符串，源文件不存在时返回 None
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        identity = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+    def get(self, image_path, size):
+        """
+        读取缓存的缩略图
+
+        Args:
+            image_path: 源图片路径
+            size: 缩略图最大尺寸
+
+        Returns:
+            PIL图像对象，未命中时返回 None
+        """
+        key = self.make_key(image_path, size)
+        if key is None:
+            return None
+        cache_file = self._cache_file(key)
+        try:
+            with Image.open(cache_file) as cached:
+                cached.load()
+                thumbnail = cached.copy()
+            os.utime(cache_file)
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return thumbnail
+
+    def put(self, image_path, size, thumbnail):
+        """
+        写入缩略图，超出容量上限时淘汰最久未使用的文件
+
+        Args:
+            image_path: 源图片路径
+            size: 缩略图最大尺寸
+            thumbnail: RGB或RGBA模式的缩略图
+        """
+        key = self.make_key(image_path, size)
+        if key is None:
+            return
+        cache_file = self._cache_file(key)
+        tmp_file = cache_file.with_name(f"{key}.{threading.get_ident()}.tmp")
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            if THUMBNAIL_FORMAT == "WEBP":
+                thumbnail.save(tmp_file, format="WEBP", quality=85)
+            else:
+                thumbnail.save(tmp_file, format="PNG")
+            os.replace(tmp_file, cache_file)
+            file_size = cache_file.stat().st_size
+        except Exception as e:
+            print(f"写入缩略图缓存失败: {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += file_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        """
+        删除所有缓存文件
+        """
+        with self._lock:
+            for path, _, _ in self._scan():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含命中、未命中和磁盘占用的字典
+        """
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _cache_file(self, key):
+        """
+        缓存键对应的文件路径
+        """
+        return self.cache_dir / key[:2] / f"{key}{THUMBNAIL_EXT}"
+
+    def _scan(self):
+        """
+        列出所有缓存文件（调用方需持有锁）
+
+        Returns:
+            (路径, 大小, 修改时间) 列表
+        """
+        entries = []
+        if not self.cache_dir.is_dir():
+            return entries
+        with os.scandir(self.cache_dir) as buckets:
+            for bucket in buckets:
+                if not bucket.is_dir():
+                    continue
+                with os.scandir(bucket.path) as files:
+                    for entry in files:
+                        if not entry.name.endswith(THUMBNAIL_EXT):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """
+        按修改时间从旧到新删除缓存文件，直到占用降到目标值（调用方需持有锁）
+        """
+        entries = self._scan()
+        entries.sort(key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        print(f"缩略图缓存已淘汰 {removed} 个文件，当前占用 {total / 1024 / 1024:.1f} MB")
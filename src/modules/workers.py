@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后台任务模块
+在线程中执行耗时操作，通过Qt信号向界面报告进度，避免阻塞界面
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage
+from PIL import Image
+
+from .batch_exporter import BatchExporter, ExportStats, apply_template, render_template_layers
+from .folder_scanner import FolderScanner
+from .qt_image import pil_to_qimage
+
+# 缩略图结果的分批发送间隔（毫秒）
+THUMBNAIL_BATCH_INTERVAL = 50
+
+# 预取线程数：预取只是为了让切换图片更快，不应与缩略图和渲染争抢CPU
+PREFETCH_WORKERS = 2
+
+
+class ExportWorker(QThread):
+    """
+    后台导出线程类
+
+    在线程中驱动 BatchExporter（其内部使用进程池），每完成一张图片发出
+    progress 信号。水印参数在创建时以模板形式传入，导出过程中不再读取界面控件。
+    """
+
+    # 每完成一张图片：(结果字典, 统计字典)
+    progress = pyqtSignal(dict, dict)
+    # 导出中途出错（如水印图片无法加载）：错误信息
+    export_failed = pyqtSignal(str)
+    # 导出结束（完成、取消或出错）：(统计字典, 是否被取消)
+    export_finished = pyqtSignal(dict, bool)
+
+    def __init__(self, template, export_settings, output_dir, image_paths, max_workers=None,
+                 overwrite=True, catalog=None, parent=None):
+        """
+        初始化导出线程
+
+        Args:
+            template: 水印模板数据（导出开始时的参数快照）
+            export_settings: 导出设置
+            output_dir: 输出目录
+            image_paths: 源图片路径列表
+            max_workers: 工作进程数，None表示使用CPU核心数
+            overwrite: 输出文件已存在时是否覆盖，False时跳过
+            catalog: ImageCatalog 对象，None表示不使用图片目录
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.image_paths = list(image_paths)
+        self.exporter = BatchExporter(template, export_settings, output_dir, max_workers=max_workers,
+                                      overwrite=overwrite, silent=True, catalog=catalog)
+        self.stats = ExportStats(len(self.image_paths))
+
+    def run(self):
+        """
+        线程入口：逐个接收导出结果并发出进度信号
+        """
+        try:
+            for result in self.exporter.run(self.image_paths):
+                self.stats.add(result)
+                self.progress.emit(result, self.stats.snapshot())
+        except Exception as e:
+            print(f"后台导出失败: {e}")
+            self.export_failed.emit(str(e))
+        self.export_finished.emit(self.stats.snapshot(), self.exporter.cancelled)
+
+    def pause(self):
+        """
+        暂停导出
+        """
+        self.exporter.pause()
+        self.stats.pause()
+
+    def resume(self):
+        """
+        继续导出
+        """
+        self.stats.resume()
+        self.exporter.resume()
+
+    def cancel(self):
+        """
+        取消导出，已提交的图片处理完成后线程结束
+        """
+        self.stats.resume()
+        self.exporter.cancel()
+
+    @property
+    def paused(self):
+        """
+        是否处于暂停状态
+        """
+        return self.exporter.paused
+
+
+class FolderScanWorker(QThread):
+    """
+    后台文件夹扫描线程类
+
+    在线程中驱动 FolderScanner，每得到一批图片就发出 images_found 信号，
+    界面可以在扫描进行中逐批添加到列表。
+    """
+
+    # 一批扫描到的图片：[ScannedImage]
+    images_found = pyqtSignal(list)
+    # 扫描进度：(已检查的文件数, 找到的图片数)
+    progress = pyqtSignal(int, int)
+    # 扫描结束：(统计字典, 是否被取消)
+    scan_finished = pyqtSignal(dict, bool)
+
+    def __init__(self, folder_path, validate=False, recursive=True, catalog=None, parent=None):
+        """
+        初始化扫描线程
+
+        Args:
+            folder_path: 要扫描的文件夹
+            validate: 是否读取文件头验证图片
+            recursive: 是否扫描子文件夹
+            catalog: ImageCatalog 对象，验证时复用其中的文件头信息
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.scanner = FolderScanner(folder_path, recursive=recursive, validate=validate, catalog=catalog)
+
+    def run(self):
+        """
+        线程入口：逐批发出扫描结果和进度
+        """
+        try:
+            for images in self.scanner.scan():
+                self.images_found.emit(images)
+                self.progress.emit(self.scanner.scanned, self.scanner.found)
+        except Exception as e:
+            print(f"扫描文件夹失败: {e}")
+        self.scan_finished.emit(self.scanner.stats(), self.scanner.cancelled)
+
+    def cancel(self):
+        """
+        取消扫描，正在扫描的文件夹结束后线程退出
+        """
+        self.scanner.cancel()
+
+
+class ThumbnailLoader(QObject):
+    """
+    后台缩略图加载类
+
+    在线程池中解码并缩小图片，结果按固定间隔分批通过 thumbnails_ready 信号
+    发送到界面线程。待处理队列可以随时调整顺序，线程池总是先处理排在
+    最前面的图片，界面据此优先加载可见行。
+    """
+
+    # 一批完成的缩略图：[(图片路径, QImage或None)]，None表示生成失败
+    thumbnails_ready = pyqtSignal(list)
+
+    def __init__(self, image_processor, size=(64, 64), max_workers=None, thumbnail_cache=None,
+                 catalog=None, parent=None):
+        """
+        初始化缩略图加载器
+
+        Args:
+            image_processor: ImageProcessor 对象
+            size: 缩略图最大尺寸
+            thumbnail_cache: ThumbnailCache 磁盘缓存，None表示不使用
+            max_workers: 线程数，None表示根据CPU核心数确定
+            catalog: ImageCatalog 对象，已知无法识别的文件不再尝试解码
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.image_processor = image_processor
+        self.size = size
+        self.thumbnail_cache = thumbnail_cache
+        self.catalog = catalog
+        self._pending = OrderedDict()  # 待处理的图片路径，按处理顺序排列
+        self._results = []
+        self._active = 0  # 正在生成的缩略图数量
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1))
+        self._timer = QTimer(self)
+        self._timer.setInterval(THUMBNAIL_BATCH_INTERVAL)
+        self._timer.timeout.connect(self._flush)
+
+    def request(self, image_paths):
+        """
+        将图片加入待处理队列末尾
+        """
+        with self._lock:
+            new_paths = [path for path in image_paths if path not in self._pending]
+            for path in new_paths:
+                self._pending[path] = None
+        # 每个任务执行时从队列头部取图片，而不是绑定提交时的图片
+        for _ in new_paths:
+            self._executor.submit(self._work)
+        if new_paths and not self._timer.isActive():
+            self._timer.start()
+
+    def prioritize(self, image_paths):
+        """
+        将指定图片（如当前可见的行）移到待处理队列的最前面
+        """
+        with self._lock:
+            for path in reversed(list(image_paths)):
+                if path in self._pending:
+                    self._pending.move_to_end(path, last=False)
+
+    def cancel(self, image_paths=None):
+        """
+        取消尚未开始的缩略图任务
+
+        Args:
+            image_paths: 要取消的图片路径，None表示全部取消
+        """
+        with self._lock:
+            if image_paths is None:
+                self._pending.clear()
+            else:
+                for path in image_paths:
+                    self._pending.pop(path, None)
+
+    def shutdown(self):
+        """
+        停止加载器，等待正在生成的缩略图完成
+        """
+        self.cancel()
+        self._timer.stop()
+        self._executor.shutdown(wait=True)
+
+    def _work(self):
+        """
+        线程池任务：取出队列头部的图片，优先从磁盘缓存读取缩略图
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            image_path, _ = self._pending.popitem(last=False)
+            self._active += 1
+        try:
+            thumbnail = None
+            if self.thumbnail_cache is not None:
+                thumbnail = self.thumbnail_cache.get(image_path, self.size)
+            if thumbnail is None:
+                if self.catalog is not None:
+                    # 解码前先查询目录（未记录时只读取文件头），同时为之后的会话保存元数据
+                    metadata = self.catalog.get(image_path)
+                    if metadata is None or not metadata.valid:
+                        raise Exception(f"无法识别的图片 {image_path}")
+                thumbnail = self.image_processor.create_thumbnail(image_path, self.size)
+                if self.thumbnail_cache is not None:
+                    self.thumbnail_cache.put(image_path, self.size, thumbnail)
+            qimage = pil_to_qimage(thumbnail, copy=True)
+        except Exception as e:
+            print(f"生成缩略图失败: {e}")
+            qimage = None
+        with self._lock:
+            self._results.append((image_path, qimage))
+            self._active -= 1
+
+    def _flush(self):
+        """
+        在界面线程中分批发送已完成的缩略图，全部完成后停止定时器
+        """
+        with self._lock:
+            results, self._results = self._results, []
+            idle = not self._pending and not self._active
+        if results:
+            self.thumbnails_ready.emit(results)
+        elif idle:
+            self._timer.stop()
+
+
+class ImagePrefetcher:
+    """
+    图片预取类
+
+    在后台线程中把当前图片附近的图片按预览尺寸解码到 ImageCache。
+    每次调用 prefetch 都会替换整个待处理队列，用户跳到别处时之前的
+    预取请求随之取消；已经开始解码的图片会完成并留在缓存中。
+    """
+
+    def __init__(self, image_cache, size, max_workers=PREFETCH_WORKERS):
+        """
+        初始化预取器
+
+        Args:
+            image_cache: ImageCache 对象
+            size: 预览代理图的最大尺寸
+            max_workers: 线程数
+        """
+        self.image_cache = image_cache
+        self.size = size
+        self._pending = OrderedDict()  # 待预取的图片路径，按处理顺序排列
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def prefetch(self, image_paths):
+        """
+        替换待预取队列，排在前面的图片先解码
+
+        Args:
+            image_paths: 要预取的图片路径（已缓存的会被跳过）
+        """
+        new_paths = [path for path in image_paths if not self.image_cache.has_proxy(path, self.size)]
+        with self._lock:
+            submitted = len(self._pending)
+            self._pending = OrderedDict.fromkeys(new_paths)
+        # 已提交但尚未执行的任务会取新队列中的图片，只需补足差额
+        for _ in range(len(new_paths) - submitted):
+            self._executor.submit(self._work)
+
+    def cancel(self):
+        """
+        取消尚未开始的预取
+        """
+        with self._lock:
+            self._pending.clear()
+
+    def shutdown(self):
+        """
+        停止预取器，等待正在解码的图片完成
+        """
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _work(self):
+        """
+        线程池任务：取出队列头部的图片并解码到缓存
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            image_path, _ = self._pending.popitem(last=False)
+        try:
+            self.image_cache.get_proxy(image_path, self.size)
+        except Exception as e:
+            print(f"预取图片失败: {e}")
+
+
+class PreviewRenderWorker(QThread):
+    """
+    预览渲染线程类
+
+    常驻线程，只保留最新的一个渲染请求：渲染期间到达的新请求会替换尚未
+    开始的旧请求，过时的请求不会被渲染。每个请求带有递增的序号，界面据此
+    丢弃晚于新请求返回的旧结果。
+
+    除渲染结果外，还会返回水印在代理图上的外接矩形，以及把所有水印图层
+    合成到透明背景上的拖拽图层，界面拖拽水印时直接在预览上重绘该图层。
+    """
+
+    # 渲染完成：(请求序号, 渲染结果PIL图像, 对应的QImage,
+    #           水印外接矩形 (left, top, right, bottom) 或None, 拖拽图层QImage或None)
+    rendered = pyqtSignal(int, object, QImage, object, object)
+    # 渲染失败：(请求序号, 错误信息)
+    render_failed = pyqtSignal(int, str)
+
+    def __init__(self, image_processor, parent=None):
+        """
+        初始化预览渲染线程
+
+        Args:
+            image_processor: ImageProcessor 对象
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.image_processor = image_processor
+        self._pending = None
+        self._stopped = False
+        self._condition = threading.Condition()
+
+    def request(self, generation, image, template, watermark=None, render_scale=1.0):
+        """
+        提交渲染请求，替换尚未开始的旧请求
+
+        Args:
+            generation: 请求序号
+            image: 要添加水印的图像（预览代理图，不会被修改）
+            template: 水印参数快照（模板格式）
+            watermark: 图片水印（PreparedWatermark），None表示不添加
+            render_scale: 代理图与原图的尺寸比
+        """
+        with self._condition:
+            self._pending = (generation, image, template, watermark, render_scale)
+            self._condition.notify()
+
+    def stop(self):
+        """
+        停止线程并等待退出
+        """
+        with self._condition:
+            self._stopped = True
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        """
+        线程入口：循环取出最新的请求进行渲染
+        """
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                generation, image, template, watermark, render_scale = self._pending
+                self._pending = None
+            try:
+                result, bbox = apply_template(self.image_processor, image, template, watermark,
+                                              composite='roi', render_scale=render_scale,
+                                              return_bbox=True)
+                drag_layer = None
+                if bbox is not None:
+                    drag_layer = pil_to_qimage(self._compose_drag_layer(image.size, template, watermark,
+                                                                        render_scale, bbox), copy=True)
+                self.rendered.emit(generation, result, pil_to_qimage(result, copy=True), bbox, drag_layer)
+            except Exception as e:
+                self.render_failed.emit(generation, str(e))
+
+    def _compose_drag_layer(self, image_size, template, watermark, render_scale, bbox):
+        """
+        把所有水印图层按合成顺序叠加到外接矩形大小的透明图层上
+
+        水印图层已在渲染时缓存，这里不会重新绘制文字或缩放水印图片
+        """
+        left, top, right, bottom = bbox
+        canvas = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+        for layer, (x, y) in render_template_layers(self.image_processor, image_size, template,
+                                                    watermark, render_scale):
+            canvas.alpha_composite(layer, (x - left, y - top))
+        return canvas
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量导出模块测试
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime
+from unittest import mock
+
+from PIL import Image, ImageChops
+
+from src.cli import collect_images, parse_rendition
+from src.modules.batch_exporter import (BatchExporter, ExportStats, apply_template, build_output_name,
+                                        render_template_layers)
+from src.modules.catalog import ImageCatalog
+from src.modules.image_processor import ImageProcessor
+
+TEMPLATE = {
+    "text": {"content": "Batch", "font_size": 30, "color": [255, 255, 255, 200], "opacity": 20},
+    "image": {"scale": 1.0, "opacity": 50, "rotation": 0},
+    "position": "bottom-right"
+}
+
+class TestOutputNames(unittest.TestCase):
+    """
+    输出文件命名测试类
+    """
+    
+    def test_naming_rules(self):
+        """
+        测试各命名规则及格式扩展名
+        """
+        settings = {"format": "原图格式", "prefix": "wm_", "suffix": "_s", "custom_name": "图片_{序号}",
+                    "sequence_start": 1, "sequence_digits": 3, "timestamp_format": "YYYYMMDD"}
+        path = "/photos/a.jpeg"
+        self.assertEqual(build_output_name(path, 0, dict(settings, naming_rule="保留原文件名")), ("a.jpg", "JPEG"))
+        self.assertEqual(build_output_name(path, 0, dict(settings, naming_rule="prefix"))[0], "wm_a.jpg")
+        self.assertEqual(build_output_name(path, 0, dict(settings, naming_rule="添加后缀"))[0], "a_s.jpg")
+        self.assertEqual(build_output_name(path, 4, dict(settings, naming_rule="自定义命名"))[0], "图片_005.jpg")
+        now = datetime(2025, 10, 5)
+        self.assertEqual(build_output_name(path, 1, dict(settings, naming_rule="时间戳命名"), now)[0],
+                         "20251005_002.jpg")
+        self.assertEqual(build_output_name("/p/b.bmp", 0, dict(settings, format="PNG")), ("b.png", "PNG"))
+
+class TestApplyTemplate(unittest.TestCase):
+    """
+    模板渲染测试类
+    """
+    
+    def test_bbox_matches_rendered_layers(self):
+        """
+        测试返回的外接矩形包含所有水印图层，且矩形外的像素未被修改
+        """
+        processor = ImageProcessor()
+        image = Image.new("RGB", (400, 300), (0, 0, 0))
+        watermark = Image.new("RGBA", (40, 30), (255, 0, 0, 255))
+        result, bbox = apply_template(processor, image, TEMPLATE, watermark, composite='roi',
+                                      return_bbox=True)
+        layers = render_template_layers(processor, image.size, TEMPLATE, watermark)
+        self.assertEqual(len(layers), 2)
+        for layer, (x, y) in layers:
+            self.assertTrue(bbox[0] <= x and bbox[1] <= y)
+            self.assertTrue(x + layer.width <= bbox[2] and y + layer.height <= bbox[3])
+        
+        changed = ImageChops.difference(image, result).getbbox()
+        self.assertIsNotNone(changed)
+        self.assertTrue(bbox[0] <= changed[0] and bbox[1] <= changed[1])
+        self.assertTrue(changed[2] <= bbox[2] and changed[3] <= bbox[3])
+        self.assertEqual(apply_template(processor, image, {"text": {"content": ""}}, return_bbox=True),
+                         (image, None))
+
+class TestBatchExporter(unittest.TestCase):
+    """
+    批量导出器测试类
+    """
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "out")
+        self.inputs = []
+        for i in range(4):
+            path = os.path.join(self.temp_dir, f"img{i}.jpg")
+            Image.new("RGB", (320, 240), (i * 40, 80, 120)).save(path)
+            self.inputs.append(path)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_serial_export(self):
+        """
+        测试串行导出全部成功并按设置缩放
+        """
+        settings = {"resize_enabled": True, "max_width": 160, "max_height": 160}
+        exporter = BatchExporter(TEMPLATE, settings, self.output_dir, max_workers=1)
+        results = list(exporter.run(self.inputs))
+        self.assertTrue(all(r["success"] for r in results))
+        with Image.open(os.path.join(self.output_dir, "img0.jpg")) as image:
+            self.assertEqual(image.size, (160, 120))
+    
+    def test_resize_before_watermark(self):
+        """
+        测试先缩小再按输出比例添加水印，水印的位置和大小与先加水印再缩小一致
+        """
+        source = os.path.join(self.temp_dir, "large.png")
+        Image.new("RGB", (1600, 1200), (40, 80, 120)).save(source)
+        settings = {"resize_enabled": True, "max_width": 400, "max_height": 400, "format": "PNG"}
+        exporter = BatchExporter(TEMPLATE, settings, self.output_dir, max_workers=1)
+        result = next(exporter.run([source]))
+        self.assertTrue(result["success"])
+        
+        def watermark_bbox(image):
+            # 忽略LANCZOS缩放在水印边缘产生的微弱振铃
+            plain = Image.new("RGB", (400, 300), (40, 80, 120))
+            difference = ImageChops.difference(image.convert("RGB"), plain).convert("L")
+            return difference.point(lambda value: 255 if value > 32 else 0).getbbox()
+        
+        legacy = apply_template(ImageProcessor(), Image.open(source), TEMPLATE)
+        legacy_bbox = watermark_bbox(legacy.resize((400, 300), Image.Resampling.LANCZOS))
+        with Image.open(result["output"]) as output:
+            self.assertEqual(output.size, (400, 300))
+            bbox = watermark_bbox(output)
+        for value, expected in zip(bbox, legacy_bbox):
+            self.assertLessEqual(abs(value - expected), 3)
+    
+    def test_rendition_fan_out(self):
+        """
+        测试多规格输出：每张图片只解码一次，各规格按自己的尺寸、格式和子文件夹输出
+        """
+        renditions = [parse_rendition(spec) for spec in
+                      ("full:0:jpeg:95", "web:160:jpeg:85", "preview:64:jpeg", "archive:0:png")]
+        exporter = BatchExporter(TEMPLATE, {"renditions": renditions}, self.output_dir, max_workers=1)
+        original_load = ImageProcessor.load_image
+        with mock.patch.object(ImageProcessor, "load_image", autospec=True, side_effect=original_load) as load:
+            results = list(exporter.run(self.inputs[:2]))
+        self.assertEqual(load.call_count, 2)
+        self.assertTrue(all(r["success"] and len(r["outputs"]) == 4 for r in results))
+        expected = {"full/img1.jpg": ((320, 240), "JPEG"), "web/img1.jpg": ((160, 120), "JPEG"),
+                    "preview/img1.jpg": ((64, 48), "JPEG"), "archive/img1.png": ((320, 240), "PNG")}
+        for name, (size, file_format) in expected.items():
+            with Image.open(os.path.join(self.output_dir, name)) as image:
+                self.assertEqual((image.size, image.format), (size, file_format))
+        
+        # 只补齐缺失的输出
+        os.remove(os.path.join(self.output_dir, "web", "img0.jpg"))
+        exporter = BatchExporter(TEMPLATE, {"renditions": renditions}, self.output_dir, max_workers=1,
+                                 overwrite=False)
+        results = sorted(exporter.run(self.inputs[:2]), key=lambda r: r["index"])
+        self.assertEqual(results[0]["outputs"], [os.path.join(self.output_dir, "web", "img0.jpg")])
+        self.assertEqual(results[0]["output"], os.path.join(self.output_dir, "web", "img0.jpg"))
+        self.assertTrue(results[1]["skipped"])
+        
+        with self.assertRaises(Exception):
+            BatchExporter(TEMPLATE, {"renditions": [{}, {"quality": 80}]}, self.output_dir).plan(self.inputs)
+    
+    def test_same_name_in_different_folders(self):
+        """
+        测试不同文件夹中的同名图片导出到不同的文件
+        """
+        inputs = []
+        for folder in ("a", "b"):
+            os.makedirs(os.path.join(self.temp_dir, folder))
+            inputs.append(os.path.join(self.temp_dir, folder, "x.jpg"))
+            shutil.copy(self.inputs[0], inputs[-1])
+        exporter = BatchExporter(TEMPLATE, {}, self.output_dir, max_workers=1)
+        outputs = [job["output"] for job in exporter.plan(inputs)]
+        self.assertEqual([os.path.basename(output) for output in outputs], ["x.jpg", "x_1.jpg"])
+        self.assertTrue(all(r["success"] for r in exporter.run(inputs)))
+        self.assertTrue(all(os.path.exists(output) for output in outputs))
+
+    def test_parallel_export_and_skip_existing(self):
+        """
+        测试多进程导出，以及不覆盖时跳过已存在的文件
+        """
+        exporter = BatchExporter(TEMPLATE, {}, self.output_dir, max_workers=2)
+        results = list(exporter.run(self.inputs))
+        self.assertEqual(sorted(r["index"] for r in results), [0, 1, 2, 3])
+        self.assertTrue(all(r["success"] for r in results))
+        
+        exporter = BatchExporter(TEMPLATE, {}, self.output_dir, max_workers=2, overwrite=False)
+        self.assertTrue(all(r["skipped"] for r in exporter.run(self.inputs)))
+
+    def test_silent_serial_export(self):
+        """
+        测试静默导出时图像处理过程不输出调试信息
+        """
+        output = io.StringIO()
+        exporter = BatchExporter(TEMPLATE, {}, self.output_dir, max_workers=1, silent=True)
+        with redirect_stdout(output):
+            results = list(exporter.run(self.inputs))
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertEqual(output.getvalue(), "")
+
+    def test_cancel_and_stats(self):
+        """
+        测试取消后不再处理后续图片，统计信息正确累计
+        """
+        exporter = BatchExporter(TEMPLATE, {}, self.output_dir, max_workers=1)
+        stats = ExportStats(len(self.inputs))
+        for result in exporter.run(self.inputs):
+            stats.add(result)
+            exporter.cancel()
+        snapshot = stats.snapshot()
+        self.assertEqual((snapshot["done"], snapshot["succeeded"], snapshot["failed"]), (1, 1, 0))
+        self.assertIsNotNone(snapshot["eta"])
+        self.assertTrue(exporter.cancelled)
+    
+    def test_collect_images(self):
+        """
+        测试命令行输入展开：文件夹、通配符和文件去重，忽略非图片文件
+        """
+        open(os.path.join(self.temp_dir, "notes.txt"), "w").close()
+        pattern = os.path.join(self.temp_dir, "img[01].jpg")
+        paths = collect_images([self.inputs[3], self.temp_dir, pattern])
+        self.assertEqual(paths, [self.inputs[3]] + self.inputs[:3])
+
+    def test_catalog_rejects_unrecognized_sources(self):
+        """
+        测试使用图片目录时，导出前即排除内容不是图片的文件
+        """
+        fake = os.path.join(self.temp_dir, "fake.jpg")
+        with open(fake, "w") as f:
+            f.write("not an image")
+        catalog = ImageCatalog(":memory:")
+        exporter = BatchExporter(TEMPLATE, {}, self.output_dir, max_workers=1, catalog=catalog)
+        self.assertTrue(exporter.plan([self.inputs[0]])[0]["source_valid"])
+        results = list(exporter.run([self.inputs[0], fake]))
+        self.assertEqual([r["success"] for r in results], [False, True])
+        self.assertIn("无法识别", results[0]["error"])
+        catalog.close()
+
+if __name__ == "__main__":
+    unittest.main()
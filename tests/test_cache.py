@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+缓存模块测试
+"""
+
+import unittest
+
+from src.modules.cache import LRUCache
+
+class TestLRUCache(unittest.TestCase):
+    """
+    LRU缓存测试类
+    """
+    
+    def test_eviction_by_budget(self):
+        """
+        测试超过内存预算时淘汰最久未使用的条目
+        """
+        cache = LRUCache(max_bytes=100, size_func=len)
+        cache.put("a", "x" * 40)
+        cache.put("b", "x" * 40)
+        cache.get("a")
+        cache.put("c", "x" * 40)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertLessEqual(cache.current_bytes, 100)
+    
+    def test_hit_miss_counters(self):
+        """
+        测试命中和未命中计数
+        """
+        cache = LRUCache(max_bytes=100, size_func=len)
+        cache.put("a", "x")
+        cache.get("a")
+        cache.get("missing")
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
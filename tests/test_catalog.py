@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片目录模块测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from src.modules.catalog import ImageCatalog
+from src.modules.image_cache import ImageCache
+from src.modules.image_processor import ImageProcessor
+
+class TestImageCatalog(unittest.TestCase):
+    """
+    图片目录测试类
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.photo = os.path.join(self.temp_dir, "photo.jpg")
+        exif = Image.Exif()
+        exif[0x0112] = 6  # 方向：顺时针旋转90度
+        exif[0x010F] = "Acme"
+        exif[0x0110] = "Cam 1"
+        exif.get_ifd(0x8769)[0x9003] = "2024:05:06 07:08:09"
+        Image.new("RGB", (640, 480)).save(self.photo, exif=exif)
+        self.logo = os.path.join(self.temp_dir, "logo.png")
+        Image.new("RGBA", (100, 50)).save(self.logo)
+        self.fake = os.path.join(self.temp_dir, "fake.jpg")
+        with open(self.fake, "w") as f:
+            f.write("not an image")
+        self.db_path = os.path.join(self.temp_dir, "catalog.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_header_metadata(self):
+        """
+        测试记录尺寸和EXIF，无法识别的文件同样记录，不存在的文件不返回
+        """
+        catalog = ImageCatalog(self.db_path)
+        entries = catalog.get_many([self.photo, self.logo, self.fake, os.path.join(self.temp_dir, "missing.jpg")])
+        catalog.close()
+        self.assertEqual(sorted(entries), sorted([self.photo, self.logo, self.fake]))
+        metadata = entries[self.photo]
+        self.assertEqual((metadata.format, metadata.size, metadata.display_size), ("JPEG", (640, 480), (480, 640)))
+        self.assertEqual((metadata.taken, metadata.camera), ("2024-05-06 07:08:09", "Acme Cam 1"))
+        self.assertFalse(entries[self.fake].valid)
+
+    def test_reopened_catalog_reuses_rows(self):
+        """
+        测试重新打开后未变化的文件不再读取，文件修改后重新读取
+        """
+        ImageCatalog(self.db_path).get_many([self.logo, self.fake])
+        catalog = ImageCatalog(self.db_path)
+        with mock.patch("src.modules.catalog.Image.open") as image_open:
+            self.assertEqual(catalog.get(self.logo).size, (100, 50))
+            self.assertFalse(catalog.get(self.fake).valid)
+        image_open.assert_not_called()
+        os.utime(self.logo, (1, 1))
+        self.assertEqual(catalog.get(self.logo).size, (100, 50))
+        self.assertEqual((catalog.stats()["hits"], catalog.stats()["misses"]), (2, 1))
+        catalog.close()
+
+    def test_query_filters(self):
+        """
+        测试按格式、尺寸、文件夹和拍摄时间筛选
+        """
+        catalog = ImageCatalog(":memory:")
+        catalog.get_many([self.photo, self.logo, self.fake])
+        self.assertEqual([m.path for m in catalog.query(formats={"PNG"})], [os.path.abspath(self.logo)])
+        self.assertEqual([m.path for m in catalog.query(min_size=(200, 200))], [os.path.abspath(self.photo)])
+        self.assertEqual(len(catalog.query(folder=self.temp_dir, taken_after="2024-01-01")), 1)
+        self.assertEqual(catalog.query(folder=self.temp_dir + "x"), [])
+        catalog.close()
+
+    def test_image_cache_uses_catalog_size(self):
+        """
+        测试会话图片缓存查询尺寸时使用目录中记录的尺寸，不打开文件
+        """
+        catalog = ImageCatalog(":memory:")
+        catalog.get(self.photo)
+        cache = ImageCache(ImageProcessor(verbose=False), catalog=catalog)
+        with mock.patch("src.modules.image_cache.Image.open") as image_open:
+            self.assertEqual(cache.get_size(self.photo), (640, 480))
+        image_open.assert_not_called()
+        catalog.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成内核模块测试
+"""
+
+import unittest
+
+from PIL import Image
+
+from src.modules.compositor import blend_into
+
+class TestCompositor(unittest.TestCase):
+    """
+    定点alpha合成内核测试类
+    """
+    
+    def test_numpy_kernel_matches_paste(self):
+        """
+        测试NumPy合成内核与 Image.paste 遮罩混合的结果一致
+        """
+        logo = Image.linear_gradient("L").resize((64, 48)).convert("RGBA")
+        logo.putalpha(Image.linear_gradient("L").resize((64, 48)))
+        for mode in ["RGB", "RGBA", "L"]:
+            expected = Image.new(mode, (100, 80), 90)
+            expected.paste(logo, (50, 40), logo)
+            actual = blend_into(Image.new(mode, (100, 80), 90), logo, (50, 40))
+            diff = max(abs(a - b) for a, b in zip(expected.tobytes(), actual.tobytes()))
+            self.assertLessEqual(diff, 1, mode)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文件夹扫描模块测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.modules.catalog import ImageCatalog
+from src.modules.folder_scanner import FolderScanner
+
+class TestFolderScanner(unittest.TestCase):
+    """
+    文件夹扫描测试类
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.images = []
+        for i in range(4):
+            path = os.path.join(self.temp_dir, f"img{i}.jpg")
+            Image.new("RGB", (320, 240), (i * 40, 80, 120)).save(path)
+            self.images.append(path)
+        sub_dir = os.path.join(self.temp_dir, "a", "b")
+        os.makedirs(sub_dir)
+        self.nested = os.path.join(sub_dir, "nested.png")
+        Image.new("RGB", (50, 30)).save(self.nested)
+        self.images.append(self.nested)
+        with open(os.path.join(self.temp_dir, "fake.jpg"), "w") as fake:
+            fake.write("not an image")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_parallel_recursive_scan(self):
+        """
+        测试并行扫描子文件夹，验证时排除内容不是图片的文件并记录尺寸
+        """
+        scanner = FolderScanner(self.temp_dir, validate=True, max_workers=2)
+        images = [image for batch in scanner.scan() for image in batch]
+        self.assertEqual(sorted(image.path for image in images), sorted(self.images))
+        self.assertEqual({image.path: image.size for image in images}[self.nested], (50, 30))
+        self.assertEqual(scanner.stats(), {"folders": 3, "scanned": 6, "found": 5, "rejected": 1})
+        self.assertFalse(scanner.cancelled)
+
+    def test_non_recursive_scan(self):
+        """
+        测试不扫描子文件夹，未验证时按扩展名接受文件
+        """
+        scanner = FolderScanner(self.temp_dir, recursive=False)
+        self.assertEqual(sum(len(batch) for batch in scanner.scan()), 5)
+
+    def test_validate_with_catalog(self):
+        """
+        测试使用图片目录验证时结果相同，文件头信息写入目录
+        """
+        catalog = ImageCatalog(":memory:")
+        scanner = FolderScanner(self.temp_dir, validate=True, catalog=catalog)
+        self.assertEqual(sum(len(batch) for batch in scanner.scan()), 5)
+        self.assertEqual(scanner.stats()["rejected"], 1)
+        self.assertEqual(catalog.stats()["misses"], 6)
+        catalog.close()
+
+if __name__ == "__main__":
+    unittest.main()
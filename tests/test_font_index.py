@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+字体索引模块测试
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from src.modules.font_index import FontIndex
+
+SAMPLE_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+@unittest.skipUnless(os.path.exists(SAMPLE_FONT), "需要系统中的DejaVu字体")
+class TestFontIndex(unittest.TestCase):
+    """
+    字体索引测试类
+    """
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.font_dir = os.path.join(self.temp_dir, "fonts")
+        os.makedirs(self.font_dir)
+        shutil.copy(SAMPLE_FONT, self.font_dir)
+        self.cache_file = os.path.join(self.temp_dir, "font_index.json")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_lookup_by_family_name(self):
+        """
+        测试按字体族名称查找并写入索引文件
+        """
+        index = FontIndex(cache_file=self.cache_file, font_dirs=[self.font_dir])
+        files = index.find_font_files("DejaVu Sans")
+        self.assertEqual(os.path.basename(files[0]), "DejaVuSans.ttf")
+        self.assertTrue(os.path.exists(self.cache_file))
+    
+    def test_index_invalidated_by_directory_change(self):
+        """
+        测试字体目录变化后索引重新扫描
+        """
+        FontIndex(cache_file=self.cache_file, font_dirs=[self.font_dir]).find_font_files("x")
+        shutil.copy(SAMPLE_FONT, os.path.join(self.font_dir, "Extra.ttf"))
+        os.utime(self.font_dir, (0, 0))
+        index = FontIndex(cache_file=self.cache_file, font_dirs=[self.font_dir])
+        self.assertTrue(index.find_font_files("extra"))
+    
+    def test_directory_precedence(self):
+        """
+        测试多个目录中有同名字体文件时靠前的目录优先
+        """
+        other_dir = os.path.join(self.temp_dir, "other", "nested")
+        os.makedirs(other_dir)
+        shutil.copy(SAMPLE_FONT, other_dir)
+        for font_dirs in ([self.font_dir, other_dir], [other_dir, self.font_dir]):
+            index = FontIndex(cache_file=self.cache_file, font_dirs=font_dirs)
+            expected = os.path.join(font_dirs[0], "DejaVuSans.ttf")
+            self.assertEqual(index.find_font_files("DejaVu Sans")[0], expected)
+            self.assertEqual(index.files["dejavusans.ttf"], expected)
+    
+    def test_quiet_rebuild_leaves_no_temp_files(self):
+        """
+        测试 verbose 为 False 时重建索引不输出信息，写入索引后不留下临时文件
+        """
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for _ in range(2):
+                FontIndex(cache_file=self.cache_file, font_dirs=[self.font_dir], verbose=False).rebuild()
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["font_index.json", "fonts"])
+    
+    def test_loaded_fonts_are_reused(self):
+        """
+        测试相同路径和大小的字体对象被复用
+        """
+        index = FontIndex(cache_file=self.cache_file, font_dirs=[self.font_dir])
+        path = os.path.join(self.font_dir, "DejaVuSans.ttf")
+        self.assertIs(index.load_font(path, 20), index.load_font(path, 20))
+        with self.assertRaises(OSError):
+            index.load_font("missing-font.ttf", 20)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会话图片缓存模块测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from src.modules.image_cache import ImageCache
+from src.modules.image_processor import ImageProcessor
+
+class TestImageCache(unittest.TestCase):
+    """
+    会话图片缓存测试类
+    """
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.processor = ImageProcessor(verbose=False)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_session_cache_reuses_decoded_images(self):
+        """
+        测试会话图片缓存：重复获取代理图不再解码，源文件修改后重新解码
+        """
+        source = os.path.join(self.temp_dir, "photo.jpg")
+        Image.new("RGB", (1600, 1200), (10, 20, 200)).save(source)
+        cache = ImageCache(self.processor)
+        with mock.patch.object(self.processor, "load_image_at_size",
+                               wraps=self.processor.load_image_at_size) as load:
+            proxy, full_size = cache.get_proxy(source, (400, 400))
+            self.assertIs(cache.get_proxy(source, (400, 400))[0], proxy)
+            self.assertEqual((proxy.size, full_size), ((400, 300), (1600, 1200)))
+            self.assertEqual(load.call_count, 1)
+            
+            os.utime(source, (1, 1))
+            self.assertFalse(cache.has_proxy(source, (400, 400)))
+            cache.get_proxy(source, (400, 400))
+            self.assertEqual(load.call_count, 2)
+        self.assertEqual(cache.get_size(source), (1600, 1200))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片列表模型模块测试
+"""
+
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QIcon, QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from src.modules.image_list_model import ImageListModel
+
+app = QApplication.instance() or QApplication([])
+
+class TestImageListModel(unittest.TestCase):
+    """
+    图片列表模型测试类
+    """
+
+    def setUp(self):
+        self.loader = mock.Mock()
+        pixmap = QPixmap(16, 16)
+        pixmap.fill(QColor("gray"))
+        self.placeholder = QIcon(pixmap)
+        self.model = ImageListModel(self.loader, self.placeholder)
+
+    def test_row_count_and_dedup(self):
+        """
+        测试重复添加的路径（包括同一批中的重复路径）被忽略
+        """
+        self.assertEqual(self.model.add_paths(["/a/1.jpg", "/a/2.jpg", "/a/1.jpg"]), ["/a/1.jpg", "/a/2.jpg"])
+        self.assertEqual(self.model.add_paths(["/a/2.jpg", "/a/3.jpg"]), ["/a/3.jpg"])
+        self.assertEqual(self.model.add_paths(["/a/3.jpg"]), [])
+        self.assertEqual(self.model.rowCount(), 3)
+        self.assertEqual(self.model.paths(), ["/a/1.jpg", "/a/2.jpg", "/a/3.jpg"])
+        self.assertEqual(self.model.data(self.model.index(2)), "3.jpg")
+        self.assertIn("/a/1.jpg", self.model)
+
+    def test_thumbnail_requested_on_first_display(self):
+        """
+        测试缩略图生成前返回占位图标且只请求一次，生成后返回缩略图
+        """
+        self.model.add_paths(["/a/1.jpg", "/a/2.jpg"])
+        self.loader.request.assert_not_called()
+        index = self.model.index(0)
+        self.assertIs(self.model.data(index, Qt.DecorationRole), self.placeholder)
+        self.assertIs(self.model.data(index, Qt.DecorationRole), self.placeholder)
+        self.loader.request.assert_called_once_with(["/a/1.jpg"])
+
+        changed = []
+        self.model.dataChanged.connect(lambda first, last, roles: changed.append((first.row(), roles)))
+        thumbnail = QImage(8, 6, QImage.Format_RGB32)
+        thumbnail.fill(QColor("red"))
+        self.model.set_thumbnails([("/a/1.jpg", thumbnail), ("/a/2.jpg", None), ("/a/removed.jpg", thumbnail)])
+        self.assertEqual(changed, [(0, [Qt.DecorationRole])])
+        icon = self.model.data(index, Qt.DecorationRole)
+        self.assertIsNot(icon, self.placeholder)
+        self.assertEqual(icon.availableSizes()[0].width(), 8)
+
+        # 生成失败的图片保持占位图标，不再重复请求
+        self.assertIs(self.model.data(self.model.index(1), Qt.DecorationRole), self.placeholder)
+        self.assertEqual(self.loader.request.call_count, 1)
+
+    def test_remove_row_reindexes(self):
+        """
+        测试删除一行后，后面各行的路径与行号对应关系正确
+        """
+        paths = [f"/a/{i}.jpg" for i in range(5)]
+        self.model.add_paths(paths)
+        self.assertEqual(self.model.remove_row(1), "/a/1.jpg")
+        self.assertEqual(self.model.rowCount(), 4)
+        self.assertNotIn("/a/1.jpg", self.model)
+        self.assertEqual(self.model.row_of("/a/1.jpg"), -1)
+        for row, path in enumerate(["/a/0.jpg", "/a/2.jpg", "/a/3.jpg", "/a/4.jpg"]):
+            self.assertEqual(self.model.row_of(path), row)
+            self.assertEqual(self.model.path(row), path)
+
+        # 删除后重新添加的路径追加到末尾
+        self.assertEqual(self.model.add_paths(["/a/1.jpg"]), ["/a/1.jpg"])
+        self.assertEqual(self.model.row_of("/a/1.jpg"), 4)
+
+if __name__ == "__main__":
+    unittest.main()
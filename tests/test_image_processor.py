@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图像处理模块测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, JpegImagePlugin
+
+from src.modules.image_processor import ImageProcessor
+
+class TestTextWatermark(unittest.TestCase):
+    """
+    文本水印测试类
+    """
+    
+    def setUp(self):
+        self.processor = ImageProcessor()
+    
+    def test_layer_cache_reused_for_same_size(self):
+        """
+        测试同尺寸图片复用水印图层且结果一致
+        """
+        first = self.processor.add_text_watermark(
+            Image.new("RGB", (400, 300), (10, 20, 30)), "Cache", "center", outline=True)
+        second = self.processor.add_text_watermark(
+            Image.new("RGB", (400, 300), (10, 20, 30)), "Cache", "center", outline=True)
+        stats = self.processor.get_layer_cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(first.tobytes(), second.tobytes())
+        self.assertEqual(first.mode, "RGB")
+    
+    def test_render_scale_maps_proxy_to_full_resolution(self):
+        """
+        测试在代理图上按比例渲染时，水印位置和大小与原图渲染结果成比例
+        """
+        def ink_box(result, base):
+            return ImageChops.difference(result, base).getbbox()
+        
+        full = Image.new("RGB", (2000, 1600), (40, 40, 40))
+        proxy = full.resize((500, 400))
+        for position, custom in (("bottom-right", None), ("custom", (900, 700))):
+            full_box = ink_box(self.processor.add_text_watermark(
+                full, "Proxy", position, font_size=60, custom_position=custom), full)
+            proxy_box = ink_box(self.processor.add_text_watermark(
+                proxy, "Proxy", position, font_size=60, custom_position=custom, render_scale=0.25), proxy)
+            for full_value, proxy_value in zip(full_box, proxy_box):
+                self.assertLessEqual(abs(full_value * 0.25 - proxy_value), 4)
+        
+        logo = Image.new("RGBA", (400, 200), (255, 0, 0, 255))
+        full_box = ink_box(self.processor.add_image_watermark(full, logo, "top-right", scale=0.5), full)
+        proxy_box = ink_box(self.processor.add_image_watermark(
+            proxy, logo, "top-right", scale=0.5, render_scale=0.25), proxy)
+        self.assertEqual(tuple(v // 4 for v in full_box), proxy_box)
+    
+    def test_layer_cache_keyed_on_font_size(self):
+        """
+        测试不同尺寸的图片不会共用图层
+        """
+        self.processor.add_text_watermark(Image.new("RGB", (400, 300)), "Cache", "center")
+        self.processor.add_text_watermark(Image.new("RGB", (1600, 1200)), "Cache", "center")
+        self.assertEqual(self.processor.get_layer_cache_stats()["misses"], 2)
+    
+    def test_text_layer_sized_to_text(self):
+        """
+        测试水印画布按文本包围盒和效果外扩确定大小，且不裁掉墨迹
+        """
+        font = self.processor._load_font(None, None, 40)
+        left, top, right, bottom = self.processor.measure_text(font, "Wm")
+        self.assertEqual(len(self.processor.metrics_cache), 1)
+        plain = self.processor._render_text_layer("Wm", font, 40, (255, 255, 255, 255))
+        self.assertEqual(plain.size, (right - left + 4, bottom - top + 4))
+        
+        effects = self.processor._render_text_layer("Wm", font, 40, (255, 255, 255, 255),
+                                                    outline=True, shadow=True)
+        self.assertEqual(effects.size, (plain.width + 10, plain.height + 10))
+        ink = effects.getchannel("A").getbbox()
+        self.assertTrue(ink[0] > 0 and ink[1] > 0)
+        self.assertTrue(ink[2] < effects.width and ink[3] < effects.height)
+    
+    def test_effects_engine_single_pass(self):
+        """
+        测试效果引擎：纯文本与 draw.text 一致，描边和阴影向外扩展
+        """
+        font = self.processor._load_font(None, None, 32)
+        expected = Image.new("RGBA", (200, 80), (0, 0, 0, 0))
+        ImageDraw.Draw(expected).text((20, 20), "Wm", font=font, fill=(255, 0, 0, 150))
+        plain = self.processor._render_text_effects((200, 80), (20, 20), "Wm", font, (255, 0, 0, 150))
+        self.assertEqual(plain.tobytes(), expected.tobytes())
+        
+        effects = self.processor._render_text_effects(
+            (200, 80), (20, 20), "Wm", font, (255, 0, 0, 150), outline=True, shadow=True, bold=True)
+        plain_box = plain.getchannel("A").getbbox()
+        effects_box = effects.getchannel("A").getbbox()
+        self.assertLess(effects_box[0], plain_box[0])
+        self.assertGreater(effects_box[3], plain_box[3])
+    
+    def test_effects_translucent_text_over_outline(self):
+        """
+        测试半透明正文叠加描边和阴影时逐像素与依次调用 ImageDraw 绘制一致，
+        正文覆盖处替换下面的描边颜色而不是叠加
+        """
+        font = self.processor._load_font(None, None, 32)
+        color = (255, 255, 255, 51)
+        layer = self.processor._render_text_effects((200, 80), (20, 20), "Wm", font, color,
+                                                    outline=True, shadow=True)
+        
+        glyph = Image.new("L", (200, 80), 0)
+        ImageDraw.Draw(glyph).text((20, 20), "Wm", font=font, fill=255)
+        mask = np.asarray(glyph)
+        outline_radius, shadow_offset, _ = self.processor._scaled_effects()
+        expected = Image.new("RGBA", (200, 80), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(expected)
+        for ink, effect_mask in [((0, 0, 0, 255), self.processor._dilate_square(mask, outline_radius)),
+                                 ((0, 0, 0, 200), self.processor._shift_mask(mask, shadow_offset, shadow_offset)),
+                                 (color, mask)]:
+            draw.bitmap((0, 0), Image.fromarray(np.ascontiguousarray(effect_mask), "L"), fill=ink)
+        self.assertEqual(layer.tobytes(), expected.tobytes())
+        
+        # 字形完全覆盖的像素就是正文颜色本身
+        y, x = np.argwhere(mask == 255)[0]
+        self.assertEqual(layer.getpixel((int(x), int(y))), color)
+    
+    def test_roi_composite_matches_full_frame(self):
+        """
+        测试区域合成与整幅RGBA转换合成的结果一致
+        """
+        image = Image.radial_gradient("L").resize((300, 200)).convert("RGB")
+        logo = Image.new("RGBA", (60, 40), (255, 0, 0, 128))
+        for position in [(10, 10), (-20, 180)]:
+            full = self.processor._composite_watermark(image, logo, position, 'full')
+            roi = self.processor._composite_watermark(image, logo, position, 'roi')
+            self.assertEqual(full.tobytes(), roi.tobytes())
+        
+        target = image.copy()
+        result = self.processor._composite_watermark(target, logo, (0, 0), 'inplace')
+        self.assertIs(result, target)
+        self.assertNotEqual(image.getpixel((5, 5)), target.getpixel((5, 5)))
+    
+    def test_italic_shear_matches_row_offsets(self):
+        """
+        测试斜体剪切与逐像素平移的结果一致
+        """
+        layer = Image.new("RGBA", (7, 12))
+        for y in range(12):
+            for x in range(7):
+                layer.putpixel((x, y), (x * 30, y * 20, 5, 255))
+        sheared = self.processor._apply_italic_shear(layer, 0.2)
+        self.assertEqual(sheared.size, (9, 12))
+        for y in range(12):
+            offset = int(0.2 * y)
+            for x in range(7):
+                self.assertEqual(sheared.getpixel((x + offset, y)), layer.getpixel((x, y)))
+
+class TestThumbnail(unittest.TestCase):
+    """
+    缩略图测试类
+    """
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.processor = ImageProcessor()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_thumbnail_size_and_mode(self):
+        """
+        测试缩略图保持宽高比，并统一为RGB或RGBA模式
+        """
+        jpeg_path = os.path.join(self.temp_dir, "photo.jpg")
+        Image.new("RGB", (640, 480), (200, 10, 10)).save(jpeg_path)
+        thumbnail = self.processor.create_thumbnail(jpeg_path, (64, 64))
+        self.assertEqual((thumbnail.size, thumbnail.mode), ((64, 48), "RGB"))
+        
+        png_path = os.path.join(self.temp_dir, "logo.png")
+        Image.new("LA", (100, 200)).save(png_path)
+        thumbnail = self.processor.create_thumbnail(png_path, (64, 64))
+        self.assertEqual((thumbnail.size, thumbnail.mode), ((32, 64), "RGBA"))
+    
+    def test_load_at_size_uses_draft(self):
+        """
+        测试按尺寸解码：JPEG使用draft缩小解码，结果尺寸与完整解码后缩小一致
+        """
+        path = os.path.join(self.temp_dir, "large.jpg")
+        Image.new("RGB", (1600, 1200), (30, 60, 90)).save(path)
+        original_draft = JpegImagePlugin.JpegImageFile.draft
+        with mock.patch.object(JpegImagePlugin.JpegImageFile, "draft", autospec=True,
+                               side_effect=original_draft) as draft:
+            image = self.processor.load_image_at_size(path, (200, 200))
+        draft.assert_called_once()
+        self.assertEqual(image.size, (200, 150))
+        self.assertEqual(self.processor.load_image_at_size(path, (4000, 4000)).size, (1600, 1200))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+预处理图片水印模块测试
+"""
+
+import unittest
+
+from PIL import Image
+
+from src.modules.image_processor import ImageProcessor
+from src.modules.prepared_watermark import PreparedWatermark, prepare_watermark_layer
+
+class TestPreparedWatermark(unittest.TestCase):
+    """
+    预处理图片水印测试类
+    """
+    
+    def setUp(self):
+        self.logo = Image.radial_gradient("L").convert("RGBA")
+    
+    def test_layer_memoized_per_parameters(self):
+        """
+        测试相同参数只计算一次且结果与直接处理一致
+        """
+        prepared = PreparedWatermark(self.logo)
+        layer = prepared.get_layer(0.5, 30, 45)
+        self.assertIs(prepared.get_layer(0.5, 30, 45), layer)
+        self.assertEqual(layer.tobytes(), prepare_watermark_layer(self.logo, 0.5, 30, 45).tobytes())
+        self.assertEqual(prepared.stats()["misses"], 1)
+    
+    def test_pyramid_levels(self):
+        """
+        测试金字塔逐级减半，缩放后的尺寸与原图缩放一致
+        """
+        prepared = PreparedWatermark(self.logo, use_pyramid=True)
+        self.assertEqual([level.width for level in prepared.pyramid], [256, 128, 64, 32])
+        self.assertEqual(prepared.get_layer(0.2).size, (51, 51))
+        
+        # 奇数尺寸的水印，从金字塔层缩放的尺寸与直接从原图缩放一致
+        logo = self.logo.resize((257, 131))
+        prepared = PreparedWatermark(logo, use_pyramid=True)
+        for scale in (0.13, 0.29, 0.32, 0.35, 0.45, 0.48, 0.77):
+            self.assertEqual(prepared.get_layer(scale).size, prepare_watermark_layer(logo, scale).size, scale)
+    
+    def test_image_watermark_accepts_prepared(self):
+        """
+        测试 add_image_watermark 直接接受预处理水印
+        """
+        processor = ImageProcessor()
+        prepared = PreparedWatermark(self.logo)
+        image = Image.new("RGB", (400, 300))
+        expected = processor.add_image_watermark(image, self.logo, "center", scale=0.5, opacity=40)
+        actual = processor.add_image_watermark(image, prepared, "center", scale=0.5, opacity=40)
+        self.assertEqual(expected.tobytes(), actual.tobytes())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PIL与Qt图像转换模块测试
+"""
+
+import unittest
+
+from PIL import Image
+
+from src.modules.qt_image import pil_to_qimage
+
+class TestQtImage(unittest.TestCase):
+    """
+    PIL到QImage转换测试类
+    """
+    
+    def test_formats_and_unaligned_stride(self):
+        """
+        测试各模式的像素值与通道顺序，宽度不是4的倍数时行宽正确
+        """
+        for mode, color, expected in [("RGB", (10, 20, 30), (10, 20, 30, 255)),
+                                      ("RGBA", (10, 20, 30, 128), (10, 20, 30, 128)),
+                                      ("L", 77, (77, 77, 77, 255)),
+                                      ("P", 0, (0, 0, 0, 255))]:
+            image = Image.new(mode, (7, 5), color)
+            image.putpixel((6, 4), image.getpixel((0, 0)))
+            image.putpixel((0, 1), 255 if mode in ("L", "P") else (255,) * len(color))
+            for copy in (False, True):
+                qimage = pil_to_qimage(image, copy=copy)
+                pixel = qimage.pixelColor(6, 4)
+                self.assertEqual((qimage.width(), qimage.height()), (7, 5))
+                self.assertEqual((pixel.red(), pixel.green(), pixel.blue(), pixel.alpha()), expected, mode)
+
+if __name__ == "__main__":
+    unittest.main()
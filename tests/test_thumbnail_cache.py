@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+缩略图缓存模块测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.modules.image_processor import ImageProcessor
+from src.modules.thumbnail_cache import ThumbnailCache
+
+class TestThumbnailCache(unittest.TestCase):
+    """
+    缩略图磁盘缓存测试类
+    """
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.processor = ImageProcessor(verbose=False)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_disk_cache_hit_and_invalidation(self):
+        """
+        测试磁盘缓存命中，以及源文件修改后失效
+        """
+        source = os.path.join(self.temp_dir, "photo.jpg")
+        Image.new("RGB", (640, 480), (10, 200, 10)).save(source)
+        cache = ThumbnailCache(os.path.join(self.temp_dir, "thumbs"))
+        self.assertIsNone(cache.get(source, (64, 64)))
+        cache.put(source, (64, 64), self.processor.create_thumbnail(source, (64, 64)))
+        self.assertEqual(cache.get(source, (64, 64)).size, (64, 48))
+        self.assertIsNone(cache.get(source, (128, 128)))
+        
+        os.utime(source, (1, 1))
+        self.assertIsNone(cache.get(source, (64, 64)))
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 3))
+    
+    def test_disk_cache_eviction(self):
+        """
+        测试超出容量上限时淘汰最久未使用的缩略图
+        """
+        cache = ThumbnailCache(os.path.join(self.temp_dir, "thumbs"))
+        sources = []
+        for i in range(3):
+            source = os.path.join(self.temp_dir, f"img{i}.png")
+            Image.new("RGB", (8, 8), (i, 0, 0)).save(source)
+            sources.append(source)
+        for source in sources[:2]:
+            cache.put(source, (8, 8), Image.open(source).convert("RGB"))
+        one_file = cache.stats()["bytes"] // 2
+        os.utime(cache._cache_file(cache.make_key(sources[0], (8, 8))), (1, 1))
+        
+        cache.max_bytes = int(one_file * 2.5)
+        cache.put(sources[2], (8, 8), Image.open(sources[2]).convert("RGB"))
+        self.assertIsNone(cache.get(sources[0], (8, 8)))
+        self.assertIsNotNone(cache.get(sources[1], (8, 8)))
+        self.assertIsNotNone(cache.get(sources[2], (8, 8)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后台任务模块测试
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PIL import Image
+from PyQt5.QtWidgets import QApplication
+
+from src.modules.image_cache import ImageCache
+from src.modules.image_processor import ImageProcessor
+from src.modules import workers
+from src.modules.workers import ImagePrefetcher, PreviewRenderWorker, ThumbnailLoader
+
+app = QApplication.instance() or QApplication([])
+
+
+def wait_until(condition, timeout=5.0):
+    """
+    处理Qt事件直到条件成立或超时
+
+    Returns:
+        条件是否成立
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.005)
+    return True
+
+class TestThumbnailLoader(unittest.TestCase):
+    """
+    缩略图加载器测试类
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.processor = ImageProcessor(verbose=False)
+        self.paths = []
+        for i in range(5):
+            path = os.path.join(self.temp_dir, f"img{i}.jpg")
+            Image.new("RGB", (160, 120), (i * 40, 80, 120)).save(path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_prioritized_paths_loaded_first(self):
+        """
+        测试调整顺序后的图片先生成，所有结果分批送达界面线程
+        """
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+        create_thumbnail = self.processor.create_thumbnail
+
+        def blocking_thumbnail(path, size):
+            order.append(path)
+            if path == self.paths[0]:
+                started.set()
+                release.wait(5)
+            return create_thumbnail(path, size)
+
+        loader = ThumbnailLoader(self.processor, size=(32, 32), max_workers=1)
+        results = {}
+        loader.thumbnails_ready.connect(results.update)
+        broken = os.path.join(self.temp_dir, "broken.jpg")
+        with open(broken, "w") as f:
+            f.write("not an image")
+        with mock.patch.object(self.processor, "create_thumbnail", side_effect=blocking_thumbnail):
+            loader.request(self.paths + [broken])
+            self.assertTrue(started.wait(5))
+            # 第一张正在生成，其余仍在队列中
+            loader.prioritize([self.paths[4], self.paths[3]])
+            release.set()
+            self.assertTrue(wait_until(lambda: len(results) == 6))
+        loader.shutdown()
+
+        self.assertEqual(order[:3], [self.paths[0], self.paths[4], self.paths[3]])
+        self.assertEqual(order[3:5], self.paths[1:3])
+        self.assertIsNone(results[broken])
+        for path in self.paths:
+            self.assertEqual((results[path].width(), results[path].height()), (32, 24))
+
+class TestImagePrefetcher(unittest.TestCase):
+    """
+    图片预取测试类
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(5):
+            path = os.path.join(self.temp_dir, f"img{i}.jpg")
+            Image.new("RGB", (400, 300), (i * 40, 80, 120)).save(path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_prefetch_replaces_queue(self):
+        """
+        测试每次预取替换待处理队列，预取的代理图进入图片缓存
+        """
+        cache = ImageCache(ImageProcessor(verbose=False))
+        started = threading.Event()
+        release = threading.Event()
+        get_proxy = cache.get_proxy
+
+        def blocking_get_proxy(path, size):
+            if path == self.paths[0]:
+                started.set()
+                release.wait(5)
+            return get_proxy(path, size)
+
+        prefetcher = ImagePrefetcher(cache, (100, 100), max_workers=1)
+        with mock.patch.object(cache, "get_proxy", side_effect=blocking_get_proxy):
+            prefetcher.prefetch(self.paths[:3])
+            self.assertTrue(started.wait(5))
+            # 第一张正在解码，新的请求替换尚未开始的 img1、img2
+            prefetcher.prefetch(self.paths[3:])
+            release.set()
+            self.assertTrue(wait_until(lambda: all(cache.has_proxy(path, (100, 100)) for path in self.paths[3:])))
+        prefetcher.shutdown()
+
+        self.assertEqual([cache.has_proxy(path, (100, 100)) for path in self.paths],
+                         [True, False, False, True, True])
+        proxy, full_size = cache.get_proxy(self.paths[3], (100, 100))
+        self.assertEqual((proxy.size, full_size), ((100, 75), (400, 300)))
+
+class TestPreviewRenderWorker(unittest.TestCase):
+    """
+    预览渲染线程测试类
+    """
+
+    def test_only_latest_request_rendered(self):
+        """
+        测试渲染期间到达的多个请求只渲染最新的一个，结果带有对应的请求序号
+        """
+        processor = ImageProcessor(verbose=False)
+        template = {"text": {"content": "Preview", "font_size": 20}, "position": "center"}
+        image = Image.new("RGB", (200, 150), (30, 60, 90))
+        started = threading.Event()
+        release = threading.Event()
+        apply_template = workers.apply_template
+
+        def blocking_apply(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return apply_template(*args, **kwargs)
+
+        worker = PreviewRenderWorker(processor)
+        rendered = []
+        worker.rendered.connect(lambda generation, result, qimage, bbox, drag_layer: rendered.append(
+            (generation, result.size, bbox is not None, drag_layer is not None)))
+        with mock.patch.object(workers, "apply_template", side_effect=blocking_apply):
+            worker.start()
+            worker.request(1, image, template)
+            self.assertTrue(started.wait(5))
+            # 第一个请求渲染期间连续提交，只有最后一个会被渲染
+            for generation in (2, 3, 4):
+                worker.request(generation, image, template)
+            release.set()
+            self.assertTrue(wait_until(lambda: len(rendered) == 2))
+            # 等待一段时间，确认被替换的请求不会再被渲染
+            wait_until(lambda: len(rendered) > 2, timeout=0.2)
+        worker.stop()
+
+        self.assertEqual([item[0] for item in rendered], [1, 4])
+        self.assertEqual(rendered[-1][1:], ((200, 150), True, True))
+
+if __name__ == "__main__":
+    unittest.main()